@@ -0,0 +1,39 @@
+# Training-CSV rebuild time with a cold vs warm analysis cache.
+# Usage: python3 benchmarks/bench_analysis_cache.py [capture.pcap ...]
+import glob
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from traffic_monitor.analysis_cache import AnalysisCache
+from traffic_monitor.training import build_training_csv
+
+
+def timed_build(files, csv_path, cache):
+    start = time.perf_counter()
+    build_training_csv(files, csv_path, cache)
+    return time.perf_counter() - start
+
+
+def main():
+    files = sys.argv[1:] or sorted(glob.glob("capture_*.pcap*"))
+    if not files:
+        print("No capture files given and no capture_*.pcap in the current directory.")
+        return
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = os.path.join(workdir, "traffic_data.csv")
+        cache = AnalysisCache(os.path.join(workdir, "analysis.sqlite"))
+        uncached = timed_build(files, csv_path, None)
+        cold = timed_build(files, csv_path, cache)
+        warm = timed_build(files, csv_path, cache)
+        cache.close()
+    print(f"\n{len(files)} captures")
+    print(f"no cache:   {uncached:8.2f} s")
+    print(f"cold cache: {cold:8.2f} s (parse + store)")
+    print(f"warm cache: {warm:8.2f} s ({uncached / warm if warm > 0 else 0:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
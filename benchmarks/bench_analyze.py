@@ -0,0 +1,80 @@
+# Compare the single-pass native analyzer with the old four-pass tshark path.
+# Usage: python3 benchmarks/bench_analyze.py [capture.pcap ...]
+import glob
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from traffic_monitor.pcap_reader import summarize_pcap
+
+REPEATS = 3
+
+
+def analyze_tshark(pcap_file):
+    # The analyze_traffic implementation this benchmark replaces
+    result = subprocess.run(["tshark", "-r", pcap_file, "-T", "fields", "-e", "frame.number"],
+                            capture_output=True, text=True, check=True)
+    total_packets = len(result.stdout.splitlines())
+
+    proto_result = subprocess.run(["tshark", "-r", pcap_file, "-qz", "io,phs"],
+                                  capture_output=True, text=True, check=True)
+    tcp_count = udp_count = 0
+    for line in proto_result.stdout.splitlines():
+        parts = line.split()
+        if len(parts) >= 2 and "tcp" in parts[0].lower():
+            tcp_count = int(parts[1]) if parts[1].isdigit() else 0
+        elif len(parts) >= 2 and "udp" in parts[0].lower():
+            udp_count = int(parts[1]) if parts[1].isdigit() else 0
+
+    if tcp_count == 0 and udp_count == 0 and total_packets > 0:
+        proto_fallback = subprocess.run(["tshark", "-r", pcap_file, "-T", "fields", "-e", "ip.proto"],
+                                        capture_output=True, text=True, check=True)
+        proto_lines = proto_fallback.stdout.splitlines()
+        tcp_count = sum(1 for line in proto_lines if line.strip() == "6")
+        udp_count = sum(1 for line in proto_lines if line.strip() == "17")
+
+    subprocess.run(["tshark", "-r", pcap_file, "-T", "fields", "-e", "ip.src", "-q", "-z", "conv,ip"],
+                   capture_output=True, text=True, check=True)
+    return total_packets, tcp_count, udp_count
+
+
+def best_of(func, arg):
+    best = None
+    result = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func(arg)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    files = sys.argv[1:] or sorted(glob.glob("capture_*.pcap*"))
+    if not files:
+        print("No capture files given and no capture_*.pcap in the current directory.")
+        return
+    try:
+        subprocess.run(["tshark", "-v"], capture_output=True, check=True)
+        have_tshark = True
+    except (OSError, subprocess.CalledProcessError):
+        print("tshark not found - reporting native timings only.")
+        have_tshark = False
+
+    print(f"{'file':40} {'packets':>8} {'native ms':>10} {'pkt/s':>10} {'tshark ms':>10} {'speedup':>8}")
+    for path in files:
+        native_time, summary = best_of(summarize_pcap, path)
+        rate = summary["total"] / native_time if native_time > 0 else 0
+        line = f"{os.path.basename(path)[:40]:40} {summary['total']:>8} {native_time*1000:>10.1f} {rate:>10.0f}"
+        if have_tshark and not path.endswith((".gz", ".zst")):
+            tshark_time, (total, tcp, udp) = best_of(analyze_tshark, path)
+            line += f" {tshark_time*1000:>10.1f} {tshark_time/native_time:>7.1f}x"
+            if (total, tcp, udp) != (summary["total"], summary["tcp"], summary["udp"]):
+                line += f"  (tshark counts {total}/{tcp}/{udp} vs native {summary['total']}/{summary['tcp']}/{summary['udp']})"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# Capture + analysis cost of the tshark backend (write the window, read it back)
+# against the in-process AF_PACKET ring, on the loopback interface with a local
+# UDP/TCP sender. Needs root (or CAP_NET_RAW) for af-packet and tshark on the PATH.
+# Usage: sudo python3 benchmarks/bench_capture_backends.py [rate pkt/s, 0 = as fast as possible] [seconds] [windows]
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from traffic_monitor.analysis import SummaryAnalyzer
+from traffic_monitor.capture import make_capture
+
+SENDER = r"""
+import socket, sys, time
+rate, seconds = float(sys.argv[1]), float(sys.argv[2])
+udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+server = socket.socket()
+server.bind(("127.0.0.1", 0))
+server.listen()
+tcp = socket.create_connection(server.getsockname())
+peer, _ = server.accept()
+payload = b"x" * 64
+sent = 0
+start = time.perf_counter()
+end = start + seconds
+while True:
+    now = time.perf_counter()
+    if now >= end:
+        break
+    if rate and sent > (now - start) * rate:
+        time.sleep(0.0005)
+        continue
+    for _ in range(20):
+        if sent % 4:
+            udp.sendto(payload, ("127.0.0.1", 9))
+        else:
+            tcp.send(payload)
+            peer.recv(65536)
+        sent += 1
+print(sent)
+"""
+
+
+def cpu_seconds():
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def run(backend, rate, seconds, windows, workdir):
+    with open(os.devnull, "w") as devnull:
+        sys.stdout, real_stdout = devnull, sys.stdout
+        try:
+            capture = make_capture(backend, "lo", os.path.join(workdir, backend))
+        finally:
+            sys.stdout = real_stdout
+    if capture.name != backend:
+        capture.close()
+        return None
+    analyzer = SummaryAnalyzer()
+    sender = subprocess.Popen([sys.executable, "-c", SENDER, str(rate), str(windows * (seconds + 1) + 2)],
+                              stdout=subprocess.PIPE, text=True)
+    time.sleep(0.5)
+    packets = dropped = written = 0
+    cpu = wall = 0.0
+    for _ in range(windows):
+        started, cpu_start = time.perf_counter(), cpu_seconds()
+        if backend == "af-packet":
+            features = analyzer.run_packets(capture.packets(seconds), seconds)
+            path = capture.last_file
+        else:
+            path = capture.capture(seconds)
+            features = analyzer.run(path, seconds)
+        wall += time.perf_counter() - started
+        cpu += cpu_seconds() - cpu_start
+        packets += features["total_packets"]
+        dropped += capture.last_dropped
+        written += os.path.getsize(path)
+        os.remove(path)
+    sender.kill()
+    capture.close()
+    return {"packets": packets, "dropped": dropped, "wall": wall, "cpu": cpu, "written": written}
+
+
+def main():
+    rate = float(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    seconds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    windows = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    print(f"loopback traffic at {'max' if not rate else f'{rate:.0f} pkt/s'}, "
+          f"{windows} windows of {seconds}s, summary analysis")
+    print(f"{'backend':10} {'packets':>9} {'pkt/s':>9} {'dropped':>8} {'CPU s':>7} {'CPU us/pkt':>11} {'MB written':>11}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for backend in ("tshark", "af-packet"):
+            if backend == "tshark" and not shutil.which("tshark"):
+                print(f"{backend:10} skipped: tshark not on the PATH")
+                continue
+            try:
+                result = run(backend, rate, seconds, windows, workdir)
+            except OSError as e:
+                print(f"{backend:10} skipped: {e}")
+                continue
+            if result is None:
+                print(f"{backend:10} skipped: unavailable (needs root on Linux)")
+                continue
+            packets = result["packets"]
+            print(f"{backend:10} {packets:>9} {packets / result['wall']:>9.0f} {result['dropped']:>8} "
+                  f"{result['cpu']:>7.2f} {result['cpu'] / max(packets, 1) * 1e6:>11.2f} "
+                  f"{result['written'] / 1024 / 1024:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# Cost of capture filters, header-only snaplen and 1-in-N analysis sampling.
+# Offline (always): bytes a capture of the given pcap would write at each snaplen,
+# and analysis time/accuracy at each sampling rate.
+# Live (--interface, needs root, tshark and tcpreplay): replays the pcap at top
+# speed onto the interface while tshark captures with each option set, and
+# reports tshark CPU time, bytes written and packets captured/dropped.
+# Usage: python3 benchmarks/bench_capture_options.py capture.pcap [--interface IFACE]
+#            [--filter "tcp or udp"] [--snaplen 96] [--sample-every 10]
+import argparse
+import os
+import re
+import signal
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from traffic_monitor.capture import DROPPED_RE, HEADER_SNAPLEN, capture_options
+from traffic_monitor.pcap_reader import iter_packets, summarize_pcap, top_source_ip
+
+CAPTURED_RE = re.compile(r"(\d+) packets? captured")
+
+
+def write_truncated(source, path, snaplen):
+    # What a capture with this snaplen would have written (classic pcap framing)
+    linktype = None
+    with open(path, "wb") as f:
+        for ts, lt, data, orig_len in iter_packets(source):
+            if linktype is None:
+                linktype = lt
+                f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, snaplen or 262144, lt))
+            data = data[:snaplen] if snaplen else data
+            f.write(struct.pack("<IIII", int(ts), int(ts % 1 * 1e6), len(data), orig_len))
+            f.write(data)
+    return os.path.getsize(path)
+
+
+def timed(func, *args):
+    start = time.process_time()
+    result = func(*args)
+    return time.process_time() - start, result
+
+
+def offline(pcap, snaplen, sample_every, tmpdir):
+    print(f"{'snaplen':>8} {'bytes written':>14} {'vs full':>8}")
+    truncated = os.path.join(tmpdir, "truncated.pcap")
+    full_size = write_truncated(pcap, os.path.join(tmpdir, "full.pcap"), 0)
+    size = write_truncated(pcap, truncated, snaplen)
+    print(f"{'full':>8} {full_size:>14} {'100%':>8}")
+    print(f"{snaplen:>8} {size:>14} {size / full_size:>8.0%}")
+
+    print(f"\n{'analysis':24} {'cpu ms':>8} {'packets':>9} {'tcp %':>7} {'udp %':>7} {'top ip':>16}")
+    runs = [("full", pcap, 1), (f"snaplen {snaplen}", truncated, 1),
+            (f"snaplen {snaplen} + 1/{sample_every}", truncated, sample_every)]
+    for name, path, n in runs:
+        cpu, summary = timed(summarize_pcap, path, n)
+        total = summary["total"] or 1
+        print(f"{name:24} {cpu * 1000:>8.0f} {summary['total']:>9} {summary['tcp'] / total:>7.1%} "
+              f"{summary['udp'] / total:>7.1%} {top_source_ip(summary):>16}")
+
+
+def live_capture(interface, pcap, args, path):
+    proc = subprocess.Popen(["tshark", "-q", "-i", interface, *args, "-w", path],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    time.sleep(2)  # let tshark open the interface before replaying
+    subprocess.run(["tcpreplay", "--topspeed", "-q", "-i", interface, pcap], capture_output=True, check=True)
+    time.sleep(1)
+    proc.send_signal(signal.SIGINT)
+    stderr = proc.stderr.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    captured = CAPTURED_RE.search(stderr)
+    return {
+        "cpu": usage.ru_utime + usage.ru_stime,  # includes tshark's dumpcap child
+        "bytes": os.path.getsize(path) if os.path.exists(path) else 0,
+        "captured": int(captured.group(1)) if captured else 0,
+        "dropped": sum(int(n) for n in DROPPED_RE.findall(stderr)),
+    }
+
+
+def live(interface, pcap, bpf_filter, snaplen, tmpdir):
+    configs = [("full", []), (f"filter {bpf_filter!r}", capture_options(bpf_filter)),
+               (f"snaplen {snaplen}", capture_options(None, snaplen)),
+               ("filter + snaplen", capture_options(bpf_filter, snaplen))]
+    print(f"\n{'live capture':32} {'tshark cpu s':>12} {'bytes written':>14} {'captured':>9} {'dropped':>8}")
+    for i, (name, args) in enumerate(configs):
+        result = live_capture(interface, pcap, args, os.path.join(tmpdir, f"live_{i}.pcapng"))
+        print(f"{name:32} {result['cpu']:>12.2f} {result['bytes']:>14} {result['captured']:>9} {result['dropped']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark capture filters, snaplen and sampling")
+    parser.add_argument("pcap", help="high-rate capture to replay/analyze")
+    parser.add_argument("--interface", help="replay onto this interface with tcpreplay and capture live")
+    parser.add_argument("--filter", default="tcp or udp", help="BPF filter for the live runs")
+    parser.add_argument("--snaplen", type=int, default=HEADER_SNAPLEN)
+    parser.add_argument("--sample-every", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        offline(args.pcap, args.snaplen, args.sample_every, tmpdir)
+        if args.interface:
+            try:
+                live(args.interface, args.pcap, args.filter, args.snaplen, tmpdir)
+            except (OSError, subprocess.CalledProcessError) as e:
+                print(f"Live benchmark failed (needs root, tshark and tcpreplay): {e}")
+
+
+if __name__ == "__main__":
+    main()
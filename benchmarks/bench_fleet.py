@@ -0,0 +1,77 @@
+# Fleet protocol throughput: N local sender processes against one local collector.
+# Usage: python3 benchmarks/bench_fleet.py [windows per node] [node counts, e.g. 1,4,16]
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from traffic_monitor.fleet import CollectorServer, FleetCollector, FleetReporter, encode_frame
+
+
+def fake_window(rng, ts):
+    packets = rng.randint(100, 50000)
+    tcp = rng.random()
+    udp = (1 - tcp) * rng.random()
+    return {
+        "ts": ts, "duration": 10.0, "packets": packets, "bytes": packets * rng.randint(60, 1500),
+        "tcp_ratio": tcp, "udp_ratio": udp, "other_ratio": 1 - tcp - udp,
+        "prediction": -1 if rng.random() < 0.01 else 1, "score": -rng.random(),
+        "top_talkers": [(f"192.168.{rng.randint(0, 3)}.{rng.randint(1, 254)}", rng.randint(1, packets))
+                        for _ in range(5)],
+    }
+
+
+def sender(port, node, windows):
+    rng = random.Random(node)
+    reporter = FleetReporter(("127.0.0.1", port), node, flush_interval=0.05, max_batch=500, max_queue=windows)
+    start = time.time() - windows * 10
+    for i in range(windows):
+        reporter.send(fake_window(rng, start + i * 10))
+    reporter.close()
+
+
+def run(nodes, windows, workdir):
+    collector = FleetCollector(os.path.join(workdir, f"fleet_{nodes}"), verbose=False)
+    server = CollectorServer(("127.0.0.1", 0), collector)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=sender, args=(port, f"node{i:03d}", windows)) for i in range(nodes)]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    expected = nodes * windows
+    while collector.records < expected and any(p.is_alive() for p in processes):
+        time.sleep(0.01)
+    while collector.records < expected and time.perf_counter() - started < 60:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+    server.shutdown()
+    server.server_close()
+    collector.close()
+    return collector.records, elapsed
+
+
+def main():
+    windows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    node_counts = [int(n) for n in sys.argv[2].split(",")] if len(sys.argv) > 2 else [1, 4, 16]
+    rng = random.Random(0)
+    batch = [fake_window(rng, i * 10.0) for i in range(500)]
+    raw, packed = len(encode_frame("node000", batch, compress=False)), len(encode_frame("node000", batch))
+    print(f"wire size per window: {raw / len(batch):.1f} B raw, {packed / len(batch):.1f} B zlib "
+          f"(batches of {len(batch)})")
+    print(f"{'nodes':>5} {'windows':>9} {'seconds':>8} {'windows/s':>10}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for nodes in node_counts:
+            received, elapsed = run(nodes, windows, workdir)
+            print(f"{nodes:>5} {received:>9} {elapsed:>8.2f} {received / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
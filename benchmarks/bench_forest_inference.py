@@ -0,0 +1,55 @@
+# Startup time, peak memory and agreement: sklearn pickles vs exported NumPy forest.
+# Usage: python3 benchmarks/bench_forest_inference.py [model.pkl scaler.pkl forest.npz]
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter so import cost and RSS are measured cold
+CHILD = r"""
+import json, resource, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+from traffic_monitor.anomaly_scorer import AnomalyScorer
+scorer = AnomalyScorer.load({model!r}, {scaler!r}, mmap=False)
+loaded = time.perf_counter()
+import numpy as np
+rng = np.random.default_rng(0)
+X = np.column_stack([rng.lognormal(5, 1, 10000), rng.dirichlet([2, 6, 3], 10000)])
+scorer.score_batch(X[:1])
+first = time.perf_counter()
+t = time.perf_counter(); scores = scorer.decision_batch(X); batch = time.perf_counter() - t
+print(json.dumps({{"load": loaded - start, "first": first - start, "batch": batch,
+                  "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  "sklearn": "sklearn" in sys.modules, "scores": scores[:2000].tolist()}}))
+"""
+
+
+def run(model, scaler):
+    code = CHILD.format(root=ROOT, model=model, scaler=scaler)
+    out = subprocess.run([sys.executable, "-W", "ignore", "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+def main():
+    if len(sys.argv) == 4:
+        model, scaler, forest = sys.argv[1:]
+    else:
+        model = os.path.join(ROOT, "anomaly_model.pkl")
+        scaler = os.path.join(ROOT, "anomaly_scaler.pkl")
+        forest = os.path.join(ROOT, "anomaly_forest.npz")
+
+    results = {"sklearn pickles": run(model, scaler), "numpy .npz": run(forest, None)}
+    print(f"{'backend':16} {'load ms':>9} {'first score ms':>15} {'10k batch ms':>13} {'peak RSS MB':>12} {'sklearn?':>9}")
+    for name, r in results.items():
+        print(f"{name:16} {r['load']*1000:>9.1f} {r['first']*1000:>15.1f} {r['batch']*1000:>13.1f} "
+              f"{r['rss_kb']/1024:>12.1f} {str(r['sklearn']):>9}")
+    a = results["sklearn pickles"]["scores"]
+    b = results["numpy .npz"]["scores"]
+    print(f"max |decision_function difference| over {len(a)} windows: {max(abs(x - y) for x, y in zip(a, b)):.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# Measure LED driver timing on the fake GPIO backend (no Raspberry Pi needed).
+# Usage: python3 benchmarks/bench_led_timing.py [seconds per rate]
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from traffic_monitor.fake_gpio import FakeGPIO
+from traffic_monitor.led_controller import LedController, LedState
+
+GREEN, RED = 18, 23
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    gpio = FakeGPIO(record=True)
+    gpio.setup(GREEN, gpio.OUT)
+    gpio.setup(RED, gpio.OUT)
+    leds = LedController(gpio, GREEN, RED)
+    leds.start()
+
+    print(f"{'interval':>9} {'toggles':>8} {'mean ms':>9} {'jitter ms':>10} {'max err ms':>11}")
+    for interval in (0.05, 0.2, 0.5):
+        start = time.monotonic()
+        leds.set_target(LedState(interval, red_on=interval < 0.1))
+        time.sleep(seconds)
+        edges = [ts for ts, _ in gpio.transitions_for(GREEN) if ts >= start]
+        gaps = [(b - a) * 1000 for a, b in zip(edges[1:], edges[2:])]
+        if len(gaps) < 2:
+            continue
+        errors = [abs(gap - interval * 1000) for gap in gaps]
+        print(f"{interval:>9.2f} {len(edges):>8} {statistics.mean(gaps):>9.2f} "
+              f"{statistics.pstdev(gaps):>10.3f} {max(errors):>11.3f}")
+
+    # Latency from set_target() to the red pin changing
+    latencies = []
+    for i in range(50):
+        before = len(gpio.transitions_for(RED))
+        posted = time.monotonic()
+        leds.set_target(LedState(0.5, red_on=i % 2 == 0))
+        while len(gpio.transitions_for(RED)) == before:
+            time.sleep(0.0001)
+        latencies.append((gpio.transitions_for(RED)[-1][0] - posted) * 1000)
+    leds.stop()
+    latencies.sort()
+    print(f"state change -> GPIO latency: median {statistics.median(latencies):.3f} ms, "
+          f"max {latencies[-1]:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+# Headless replay of saved or synthetic pcaps through the Pi pipeline: a replay
+# capture backend hands each pcap to Monitor.process() as a window spanning its
+# own packet timestamps (analyze -> store -> log -> stats -> detector -> LEDs),
+# with simulated GPIO and no prompts. Stage latencies come from the monitor's own
+# metrics timers; reports packets/sec, per-stage histograms and peak RSS, and
+# --json saves the numbers to compare runs.
+# With --flood-at, a TCP flood is mixed into synthetic background traffic and
+# the time from its first packet to the red LED is measured for the fast alert
+# path and for the window path.
+# Usage: python3 benchmarks/bench_replay.py capture_*.pcap
+#        python3 benchmarks/bench_replay.py --synthetic 20 --rate 5000 --duration 10 --mix tcp=0.6,udp=0.3,other=0.1
+#        python3 benchmarks/bench_replay.py --flood-at 60 --rate 200 --mix tcp=0.4,udp=0.5,other=0.1
+import argparse
+import contextlib
+import heapq
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from traffic_monitor.alerts import RED_LED_PIN, GpioAlerts, traffic_level
+from traffic_monitor.analysis import ANALYZE_SECONDS, SummaryAnalyzer
+from traffic_monitor.capture import CAPTURE_SECONDS
+from traffic_monitor.capture_store import CaptureStore
+from traffic_monitor.detectors import DETECT_SECONDS, NullDetector
+from traffic_monitor.fast_alerts import FastAlerter
+from traffic_monitor.monitor import LOG_SECONDS, Monitor
+from traffic_monitor.pcap_reader import PROTO_TCP, decode, iter_packets
+from traffic_monitor.rolling_stats import QuantileSketch, StatsEngine, parse_windows
+from traffic_monitor.synthetic_traffic import DEFAULT_MIX, generate_pcap
+from traffic_monitor.traffic_logger import BufferedLogger, TextSink
+
+TIMERS = {"capture": CAPTURE_SECONDS, "analyze": ANALYZE_SECONDS, "detect": DETECT_SECONDS, "log": LOG_SECONDS}
+# "window" is the whole Monitor.process() call, store, stats and LEDs included
+STAGES = tuple(TIMERS) + ("window",)
+
+
+class LatencyHistogram:
+    # Log2 microsecond buckets for the printed histogram, a sketch for percentiles
+    def __init__(self):
+        self.buckets = {}
+        self.sketch = QuantileSketch()
+        self.total = 0.0
+
+    def add(self, seconds):
+        bucket = int(math.log2(max(seconds * 1e6, 1.0)))
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.sketch.add(seconds)
+        self.total += seconds
+
+    def summary(self):
+        count = self.sketch.count
+        return {
+            "count": count,
+            "mean_ms": self.total / count * 1000 if count else 0.0,
+            "p50_ms": self.sketch.quantile(0.5) * 1000 if count else 0.0,
+            "p95_ms": self.sketch.quantile(0.95) * 1000 if count else 0.0,
+            "p99_ms": self.sketch.quantile(0.99) * 1000 if count else 0.0,
+            "max_ms": self.sketch.max * 1000 if count else 0.0,
+        }
+
+    def format(self, width=40):
+        lines = []
+        peak = max(self.buckets.values(), default=1)
+        for bucket in range(min(self.buckets, default=0), max(self.buckets, default=-1) + 1):
+            n = self.buckets.get(bucket, 0)
+            low = 2 ** bucket
+            label = f"{low}us" if low < 1000 else f"{low / 1000:.0f}ms"
+            lines.append(f"    >= {label:>7} {n:6} {'#' * max(round(n / peak * width), 1 if n else 0)}")
+        return "\n".join(lines)
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class ReplayCapture:
+    # Capture backend that "captures" the next saved pcap: copies it into the
+    # spool dir the way tshark would write the window
+    name = "replay"
+
+    def __init__(self, pcaps, output_dir):
+        self.pcaps = list(pcaps)
+        self.output_dir = output_dir
+        self.interface = "replay"
+        self.index = 0
+        self.last_dropped = 0
+
+    def capture(self, duration=None):
+        os.makedirs(self.output_dir, exist_ok=True)
+        output_file = os.path.join(self.output_dir, f"capture_{self.index:05d}.pcap")
+        with CAPTURE_SECONDS.time():
+            shutil.copyfile(self.pcaps[self.index], output_file)
+        self.index += 1
+        return output_file
+
+    def close(self):
+        pass
+
+
+def pcap_span(path):
+    # First and last packet timestamps; None for an empty capture
+    first = last = None
+    for ts, _, _, _ in iter_packets(path):
+        if first is None:
+            first = ts
+        last = ts
+    return None if first is None else (first, last)
+
+
+def replay(pcaps, workdir, led_window="5m", sample_every=1, verbose=False):
+    histograms = {stage: LatencyHistogram() for stage in STAGES}
+    # The Pi's backends, with a simulated GPIO and a replay capture
+    capture = ReplayCapture(pcaps, os.path.join(workdir, "stream"))
+    store = CaptureStore(os.path.join(workdir, "captures"), max_bytes=float("inf"), max_age=float("inf"))
+    logger = BufferedLogger([TextSink(os.path.join(workdir, "traffic_log.txt"))])
+    monitor = Monitor(capture, SummaryAnalyzer(sample_every), GpioAlerts(fake_gpio=True), NullDetector(),
+                      StatsEngine(parse_windows("1m,5m,1h")), logger, store, led_window)
+    packets = 0
+    elapsed = 0.0
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if verbose else devnull):
+        try:
+            for pcap in pcaps:
+                # The window spans the capture's own packets, so the rolling stats follow capture time
+                start, end = pcap_span(pcap) or (time.time(), time.time())
+                before = {stage: (timer.count, timer.sum) for stage, timer in TIMERS.items()}
+                started = time.perf_counter()
+                captured = capture.capture()
+                process_started = time.perf_counter()
+                features = monitor.process(captured, start, end)
+                finished = time.perf_counter()
+                elapsed += finished - started
+                histograms["window"].add(finished - process_started)
+                for stage, timer in TIMERS.items():
+                    count, total = before[stage]
+                    if timer.count > count:
+                        histograms[stage].add(timer.sum - total)
+                packets += features["total_packets"] if features else 0
+        finally:
+            monitor.close()
+    return {
+        "windows": len(pcaps),
+        "packets": packets,
+        "seconds": elapsed,
+        "packets_per_sec": packets / elapsed if elapsed > 0 else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {stage: histograms[stage].summary() for stage in STAGES},
+    }, histograms
+
+
+def synthetic_windows(directory, windows, rate, duration, mix, hosts, seed):
+    paths = []
+    start = time.time() - windows * duration
+    for i in range(windows):
+        path = os.path.join(directory, f"synthetic_{i:05d}.pcap")
+        generate_pcap(path, int(rate * duration), rate, mix, hosts, start + i * duration,
+                      None if seed is None else seed + i)
+        paths.append(path)
+    return paths
+
+
+def flood_packets(directory, trial, rate, mix, hosts, flood_at, flood_rate, flood_seconds, seed):
+    # Background traffic with a TCP flood from about flood_at seconds in; returns
+    # the merged packets and the timestamp of the first flood packet
+    start = time.time() - 3600
+    background = os.path.join(directory, f"background_{trial}.pcap")
+    flood = os.path.join(directory, f"flood_{trial}.pcap")
+    generate_pcap(background, int(rate * (flood_at + flood_seconds)), rate, mix, hosts, start, seed)
+    # A random phase, so the onset doesn't always line up with a micro-window
+    onset = start + flood_at + random.Random(seed).random()
+    generate_pcap(flood, int(flood_rate * flood_seconds), flood_rate, "tcp=1", 4, onset, seed + 1)
+    return list(heapq.merge(iter_packets(background), iter_packets(flood), key=lambda packet: packet[0])), onset
+
+
+def fast_path_latency(packets, onset, alerter, gpio):
+    # Packets are fed as fast as they decode, so the detection delay is measured
+    # in capture time; the LED delay is the real time from the raise to the pin
+    started = time.perf_counter()
+    for ts, linktype, data, orig_len in packets:
+        alerter.add(ts, orig_len, decode(data, linktype))
+        if alerter.last_raise:
+            break
+    elapsed = time.perf_counter() - started
+    if not alerter.last_raise:
+        return None, None, elapsed
+    raised_ts, raised_at = alerter.last_raise
+    deadline = time.monotonic() + 1.0
+    led = None
+    while led is None and time.monotonic() < deadline:
+        led = next((ts for ts, value in gpio.transitions_for(RED_LED_PIN) if value and ts >= raised_at), None)
+        time.sleep(0.0005)
+    return raised_ts - onset, None if led is None else led - raised_at, elapsed
+
+
+def window_path_latency(packets, onset, duration, led_window):
+    # First window end at which the rolling average turns the red LED on
+    stats = StatsEngine(parse_windows(led_window))
+    window_end = packets[0][0] + duration
+    total = tcp = 0
+    for ts, linktype, data, orig_len in packets + [(math.inf, None, b"", 0)]:
+        while ts >= window_end and window_end <= packets[-1][0] + duration:
+            if total:
+                stats.update({"packets": total, "tcp_ratio": tcp / total}, window_end)
+                packets_avg = stats.snapshot("packets", led_window, window_end)["mean"]
+                tcp_avg = stats.snapshot("tcp_ratio", led_window, window_end)["mean"]
+                if window_end > onset and traffic_level(packets_avg, tcp_avg)[0].red_on:
+                    return window_end - onset
+            total = tcp = 0
+            window_end += duration
+        total += 1
+        info = decode(data, linktype) if linktype is not None else None
+        if info is not None and info[0] == PROTO_TCP:
+            tcp += 1
+    return None
+
+
+def alert_latency(workdir, args):
+    results = []
+    for trial in range(args.trials):
+        packets, onset = flood_packets(workdir, trial, args.rate, args.mix, args.hosts, args.flood_at,
+                                       args.flood_rate, args.flood_seconds, args.seed + trial * 2)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            alerts = GpioAlerts(fake_gpio=True)
+            alerts.gpio.record = True  # fast_path_latency reads the red LED's transitions
+            alerter = FastAlerter(alerts, interval=args.fast_interval, span=args.fast_span,
+                                  raise_after=args.fast_raise, window_seconds=args.duration)
+            try:
+                detect, led, elapsed = fast_path_latency(packets, onset, alerter, alerts.gpio)
+            finally:
+                alerts.close()
+        fed = sum(1 for packet in packets if packet[0] <= (alerter.last_raise or (math.inf,))[0])
+        results.append({
+            "fast_detect_s": detect,
+            "fast_led_ms": None if led is None else led * 1000,
+            "fast_total_s": None if detect is None or led is None else detect + led,
+            "fast_packets_per_sec": fed / elapsed if elapsed > 0 else 0.0,
+            "window_s": window_path_latency(packets, onset, args.duration, args.led_window),
+        })
+    return results
+
+
+def print_latency(results, args):
+    def seconds(value):
+        return "never" if value is None else f"{value:.2f}"
+
+    print(f"\nTCP flood at {args.flood_rate:.0f} pkt/s over {args.rate:.0f} pkt/s background ({args.mix}); "
+          f"{args.fast_interval:g}s micro-windows, {args.fast_span:g}s span, raise after {args.fast_raise}")
+    print(f"{'trial':>5} {'detect s':>9} {'LED ms':>8} {'fast total s':>13} {'fast pkt/s':>11} "
+          f"{'window path s':>14}")
+    for trial, r in enumerate(results, 1):
+        led = "never" if r["fast_led_ms"] is None else f"{r['fast_led_ms']:.2f}"
+        print(f"{trial:>5} {seconds(r['fast_detect_s']):>9} {led:>8} {seconds(r['fast_total_s']):>13} "
+              f"{r['fast_packets_per_sec']:>11.0f} {seconds(r['window_s']):>14}")
+    totals = sorted(r["fast_total_s"] for r in results if r["fast_total_s"] is not None)
+    if totals:
+        print(f"fast path onset -> red LED: median {totals[len(totals) // 2]:.2f}s, max {totals[-1]:.2f}s "
+              f"(window path: {args.duration:.0f}s windows, {args.led_window} rolling average)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay pcaps through the monitor pipeline and time each stage")
+    parser.add_argument("pcaps", nargs="*", help="saved captures, replayed in order as windows")
+    parser.add_argument("--synthetic", type=int, metavar="WINDOWS", help="generate this many synthetic windows")
+    parser.add_argument("--rate", type=float, default=2000.0, help="synthetic packets per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="synthetic window length in seconds")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="synthetic protocol mix")
+    parser.add_argument("--hosts", type=int, default=50, help="synthetic source hosts")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--sample-every", type=int, default=1, help="analyze 1 in N packets")
+    parser.add_argument("--flood-at", type=float, metavar="SECONDS",
+                        help="measure alert latency: start a TCP flood this far into synthetic background traffic")
+    parser.add_argument("--flood-rate", type=float, default=2000.0, help="flood packets per second")
+    parser.add_argument("--flood-seconds", type=float, default=60.0, help="how long the flood lasts")
+    parser.add_argument("--trials", type=int, default=3, help="flood scenarios to replay")
+    parser.add_argument("--led-window", default="5m", help="rolling window of the window path's LED decision")
+    parser.add_argument("--fast-interval", type=float, default=0.25, help="fast path micro-window in seconds")
+    parser.add_argument("--fast-span", type=float, default=1.0, help="seconds of micro-windows per check")
+    parser.add_argument("--fast-raise", type=int, default=2, help="hot micro-windows before an alert")
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show the monitor's own output")
+    args = parser.parse_args()
+    if args.flood_at is not None:
+        with tempfile.TemporaryDirectory() as workdir:
+            results = alert_latency(workdir, args)
+        print_latency(results, args)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"alert_latency": results}, f, indent=2)
+            print(f"\nResults written to {args.json}")
+        return
+    if not args.pcaps and not args.synthetic:
+        parser.error("give pcap files, --synthetic WINDOWS or --flood-at SECONDS")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        pcaps = list(args.pcaps)
+        if args.synthetic:
+            print(f"Generating {args.synthetic} windows of {args.duration:.0f}s at {args.rate:.0f} pkt/s ({args.mix})...")
+            pcaps += synthetic_windows(workdir, args.synthetic, args.rate, args.duration,
+                                       args.mix, args.hosts, args.seed)
+        results, histograms = replay(pcaps, workdir, sample_every=args.sample_every, verbose=args.verbose)
+
+    print(f"\n{results['windows']} windows, {results['packets']} packets in {results['seconds']:.2f}s "
+          f"= {results['packets_per_sec']:.0f} packets/s")
+    if results["peak_rss_mb"] is not None:
+        print(f"Peak RSS: {results['peak_rss_mb']:.1f} MB")
+    print(f"\n{'stage':10} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for stage in STAGES:
+        s = results["stages"][stage]
+        print(f"{stage:10} {s['mean_ms']:>9.2f} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} "
+              f"{s['p99_ms']:>9.2f} {s['max_ms']:>9.2f}")
+    for stage in STAGES:
+        print(f"\n  {stage}")
+        print(histograms[stage].format())
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
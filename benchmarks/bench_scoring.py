@@ -0,0 +1,46 @@
+# Per-sample vs batched anomaly scoring latency, plus model load time.
+# Usage: python3 benchmarks/bench_scoring.py [model.pkl scaler.pkl] [windows]
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from traffic_monitor.anomaly_scorer import AnomalyScorer
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    model_path = sys.argv[1] if len(sys.argv) > 2 else os.path.join(ROOT, "anomaly_model.pkl")
+    scaler_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(ROOT, "anomaly_scaler.pkl")
+    windows = int(sys.argv[-1]) if len(sys.argv) in (2, 4) else 1000
+
+    import_time, _ = timed(__import__, "sklearn.ensemble")
+    load_time, scorer = timed(AnomalyScorer.load, model_path, scaler_path, None, False)
+    mmap_time, _ = timed(AnomalyScorer.load, model_path, scaler_path, None, True)
+    print(f"sklearn import: {import_time*1000:.1f} ms")
+    print(f"model load: {load_time*1000:.1f} ms (mmap_mode='r': {mmap_time*1000:.1f} ms)")
+
+    rng = np.random.default_rng(0)
+    totals = rng.lognormal(5, 1, windows)
+    ratios = rng.dirichlet([2, 6, 3], windows)
+    rows = np.column_stack([totals, ratios])
+
+    scorer.score_batch(rows[:10])  # warm-up
+    single_time, single = timed(lambda: [scorer.score(row) for row in rows])
+    batch_time, batch = timed(scorer.score_batch, rows)
+    assert np.allclose(single, batch)
+    print(f"{windows} windows, one call each: {single_time*1000:.1f} ms ({single_time/windows*1e6:.0f} us/window)")
+    print(f"{windows} windows, one batch:     {batch_time*1000:.1f} ms ({batch_time/windows*1e6:.1f} us/window)")
+    print(f"speedup: {single_time/batch_time:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
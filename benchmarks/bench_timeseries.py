@@ -0,0 +1,58 @@
+# Query latency of the history store over a year of samples.
+# Usage: python3 benchmarks/bench_timeseries.py [seconds between samples]
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from traffic_monitor.timeseries import TimeSeriesStore
+
+REPEATS = 20
+
+
+def best_ms(func, *args):
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    step = float(sys.argv[1]) if len(sys.argv) > 1 else 60
+    now = time.time()
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as root:
+        store = TimeSeriesStore(root)
+        started = time.perf_counter()
+        ts = now - 365 * 86400
+        samples = 0
+        while ts < now:
+            store.add(ts, {"packets": rng.randint(0, 5000), "tcp_ratio": rng.random()})
+            ts += step
+            samples += 1
+        elapsed = time.perf_counter() - started
+        print(f"{samples} samples ({step:g}s apart) written in {elapsed:.1f}s "
+              f"({elapsed / samples * 1e6:.0f} us/sample)")
+        for name, series in store.files.items():
+            print(f"  {name:4} {len(series):>8} records {os.path.getsize(series.path) / 1024:>8.0f} KiB")
+
+        print(f"{'query':36} {'best ms':>8}")
+        queries = [
+            ("aggregate, last hour", store.aggregate, now - 3600, now),
+            ("aggregate, one day (ragged edges)", store.aggregate, now - 86400 * 8.3, now - 86400 * 7.1),
+            ("aggregate, last 30 days", store.aggregate, now - 30 * 86400, now),
+            ("aggregate, last year", store.aggregate, now - 365 * 86400, now),
+            ("hourly records, one week", store.query, now - 7 * 86400, now, "1h"),
+        ]
+        for label, func, *args in queries:
+            print(f"{label:36} {best_ms(func, *args):>8.2f}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
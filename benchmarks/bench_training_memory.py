@@ -0,0 +1,72 @@
+# Peak memory and time of chunked training vs loading the whole CSV at once.
+# Usage: python3 benchmarks/bench_training_memory.py [rows] [chunk_rows] [sample_size]
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from traffic_monitor.flow_features import FEATURE_NAMES
+
+# Each variant runs in a fresh interpreter so ru_maxrss is its own peak
+CHILD = r"""
+import json, resource, sys, time, warnings
+warnings.simplefilter("ignore")
+sys.path.insert(0, {root!r})
+import pandas as pd
+from traffic_monitor.training import feature_columns, fit_model, train_model
+start = time.perf_counter()
+if {chunked!r}:
+    train_model({csv!r}, {model_dir!r}, chunk_rows={chunk_rows!r}, sample_size={sample_size!r})
+else:
+    # The previous implementation: whole CSV in memory, full labeled copy
+    df = pd.read_csv({csv!r})
+    features = df[feature_columns(df)]
+    model, scaler = fit_model(features)
+    df["anomaly"] = model.predict(scaler.transform(features))
+    df.to_csv({csv!r}.replace(".csv", "_labeled.csv"), index=False)
+print(json.dumps({{"seconds": time.perf_counter() - start,
+                  "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+
+def write_csv(path, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    with open(path, "w") as f:
+        f.write(",".join(["timestamp"] + FEATURE_NAMES + ["top_ip"]) + "\n")
+        for start in range(0, rows, 100000):
+            n = min(100000, rows - start)
+            values = rng.lognormal(3, 1, (n, len(FEATURE_NAMES)))
+            lines = (f"2025-07-30 14:05:00,{','.join(f'{v:.4f}' for v in row)},10.0.0.{i % 250}"
+                     for i, row in enumerate(values))
+            f.write("\n".join(lines) + "\n")
+
+
+def run(csv_path, model_dir, chunked, chunk_rows, sample_size):
+    code = CHILD.format(root=ROOT, csv=csv_path, model_dir=model_dir, chunked=chunked,
+                        chunk_rows=chunk_rows, sample_size=sample_size)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    chunk_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    sample_size = int(sys.argv[3]) if len(sys.argv) > 3 else 50000
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = os.path.join(workdir, "traffic_data.csv")
+        write_csv(csv_path, rows)
+        size_mb = os.path.getsize(csv_path) / 1024 / 1024
+        print(f"{rows} rows, {size_mb:.0f} MB CSV")
+        print(f"{'variant':28} {'seconds':>8} {'peak MB':>8}")
+        for label, chunked in (("whole CSV in memory", False), (f"chunked ({chunk_rows} rows)", True)):
+            result = run(csv_path, workdir, chunked, chunk_rows, sample_size)
+            print(f"{label:28} {result['seconds']:>8.1f} {result['peak_mb']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
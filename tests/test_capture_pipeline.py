@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+
+from traffic_monitor.capture_pipeline import CapturePipeline
+
+
+class IdleCapturePipeline(CapturePipeline):
+    # A stand-in for tshark that writes nothing; the test drops segments in itself
+    def capture_command(self):
+        return [sys.executable, "-c", "import time; time.sleep(60)"]
+
+
+def segment(directory, counter, stamp):
+    path = os.path.join(directory, f"capture_{counter:05d}_{stamp}.pcap")
+    open(path, "wb").close()
+    return path
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+
+def test_processed_segments_are_removed_from_the_spool(tmp_path):
+    spool = str(tmp_path)
+    analyzed = []
+    pipeline = IdleCapturePipeline("lo", spool, lambda path: analyzed.append(os.path.basename(path)))
+    # The 5-digit counter wraps between the second and third segment
+    paths = [segment(spool, 99998, "20261017100000"), segment(spool, 99999, "20261017100010"),
+             segment(spool, 1, "20261017100020"), segment(spool, 2, "20261017100030")]
+    pipeline.start()
+    try:
+        # Everything but the newest segment, which tshark would still be writing
+        assert wait_for(lambda: len(analyzed) == 3)
+        assert analyzed == [os.path.basename(path) for path in paths[:3]]
+        assert wait_for(lambda: os.listdir(spool) == [os.path.basename(paths[3])])
+    finally:
+        pipeline.stop(5)
+    assert analyzed[-1] == os.path.basename(paths[3])
+    assert os.listdir(spool) == []
+
+
+def test_keep_segments_leaves_the_spool_alone(tmp_path):
+    spool = str(tmp_path)
+    analyzed = []
+    pipeline = IdleCapturePipeline("lo", spool, analyzed.append, keep_segments=True)
+    segment(spool, 1, "20261017100000")
+    segment(spool, 2, "20261017100010")
+    pipeline.start()
+    pipeline.stop(5)
+    assert len(analyzed) == 2
+    assert len(os.listdir(spool)) == 2
@@ -0,0 +1,34 @@
+from traffic_monitor.alerts import ConsoleAlerts
+from traffic_monitor.fast_alerts import FastAlerter
+from traffic_monitor.flow_features import FEATURE_NAMES
+from traffic_monitor.pcap_reader import decode, iter_packets
+from traffic_monitor.synthetic_traffic import generate_pcap
+
+
+class RecordingScorer:
+    feature_names = FEATURE_NAMES
+
+    def __init__(self):
+        self.rows = []
+
+    def score_batch(self, rows):
+        self.rows.extend(rows)
+        return [1] * len(rows), [0.0] * len(rows)
+
+
+def test_fast_path_scales_only_additive_counts(tmp_path):
+    pcap = str(tmp_path / "traffic.pcap")
+    generate_pcap(pcap, 1000, 200.0, hosts=10, start=1_700_000_000.0, seed=3)
+    scorer = RecordingScorer()
+    alerter = FastAlerter(ConsoleAlerts(), scorer, interval=0.25, span=1.0, window_seconds=10)
+    for ts, linktype, data, orig_len in iter_packets(pcap):
+        alerter.add(ts, orig_len, decode(data, linktype))
+    assert scorer.rows
+    for row in scorer.rows:
+        features = dict(zip(FEATURE_NAMES, row))
+        # ~200 packets per one-second span, scored as a 10s window
+        assert 1500 <= features["total_packets"] <= 2500
+        # Cardinalities are not multiplied by the span scale: at most 10 sources,
+        # and never more flows than the 1000 packets in the capture
+        assert features["distinct_src"] <= 11
+        assert features["active_flows"] <= 1000
@@ -0,0 +1,31 @@
+from traffic_monitor.fleet import FleetCollector
+
+
+def window(ts, packets, duration=10.0):
+    return {"ts": ts, "duration": duration, "packets": packets, "bytes": packets * 100, "tcp_ratio": 0.5,
+            "udp_ratio": 0.5, "other_ratio": 0.0, "prediction": 1, "score": None, "top_talkers": []}
+
+
+def test_two_windows_in_one_tick_do_not_double_a_node_rate(tmp_path):
+    collector = FleetCollector(str(tmp_path), tick=10.0, verbose=False)
+    try:
+        # 100, 50 and 80 packets/s
+        collector.ingest("a", [window(1010, 1000)])
+        collector.ingest("b", [window(1010, 500)])
+        collector.ingest("c", [window(1010, 800)])
+        summary, alerts = collector.close_tick(1010)
+        assert summary["packets_per_sec"] == 230
+        # Next tick a's window arrives twice over (one was late), c's misses the tick
+        collector.ingest("a", [window(1020, 1000), window(1030, 1000)])
+        collector.ingest("b", [window(1020, 500)])
+        summary, alerts = collector.close_tick(1020)
+        assert summary["nodes"] == 3
+        assert summary["packets_per_sec"] == 230
+        assert alerts == []
+        # A node silent for more than two windows drops out
+        collector.ingest("a", [window(1050, 1000)])
+        summary, _ = collector.close_tick(1050)
+        assert summary["nodes"] == 1
+        assert summary["packets_per_sec"] == 100
+    finally:
+        collector.close()
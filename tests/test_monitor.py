@@ -0,0 +1,36 @@
+from traffic_monitor.alerts import ConsoleAlerts
+from traffic_monitor.analysis import FlowAnalyzer
+from traffic_monitor.monitor import Monitor
+from traffic_monitor.rolling_stats import StatsEngine
+from traffic_monitor.synthetic_traffic import generate_pcap
+
+
+class RecordingDetector:
+    name = "recording"
+    feature_names = None
+
+    def __init__(self):
+        self.scored = []
+
+    def score(self, features):
+        self.scored.append(dict(features))
+        return 1, 0.0
+
+    def close(self):
+        pass
+
+
+def test_process_scales_only_additive_counts(tmp_path):
+    pcap = str(tmp_path / "window.pcap")
+    generate_pcap(pcap, 1000, 500.0, hosts=20, start=1_700_000_000, seed=1)
+    detector = RecordingDetector()
+    monitor = Monitor(None, FlowAnalyzer(), ConsoleAlerts(), detector, StatsEngine())
+    raw = monitor.process(pcap, 1_700_000_000, 1_700_000_002, stats_scale=5.0)
+    scored = detector.scored[0]
+    assert raw["total_packets"] == 1000
+    assert scored["total_packets"] == 5000
+    assert scored["new_flows"] == raw["new_flows"] * 5
+    # Cardinalities and rates are not extrapolated from a short window
+    for name in ("distinct_src", "distinct_dst", "active_flows", "packets_per_sec", "tcp_ratio"):
+        assert scored[name] == raw[name]
+    assert monitor.stats.snapshot("packets", "1m", 1_700_000_002)["last"] == 5000
@@ -0,0 +1,45 @@
+import os
+
+from traffic_monitor.analysis_cache import AnalysisCache
+from traffic_monitor.synthetic_traffic import generate_pcap
+from traffic_monitor.training import build_training_csv
+
+
+def synthetic_captures(directory, count=3):
+    # Consecutive 10s captures sharing hosts, so a carried flow table would change the rows
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"capture_{i}.pcap")
+        generate_pcap(path, 2000, 200.0, hosts=20, start=1_700_000_000 + i * 10, seed=i)
+        paths.append(path)
+    return paths
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_build_csv_same_with_and_without_cache(tmp_path):
+    pcaps = synthetic_captures(str(tmp_path))
+    build_training_csv(pcaps, str(tmp_path / "plain.csv"))
+    cache = AnalysisCache(str(tmp_path / "cache.sqlite"))
+    try:
+        build_training_csv(pcaps, str(tmp_path / "cold.csv"), cache)
+        build_training_csv(pcaps, str(tmp_path / "warm.csv"), cache)
+        assert cache.hits == len(pcaps)
+    finally:
+        cache.close()
+    plain = read(tmp_path / "plain.csv")
+    assert read(tmp_path / "cold.csv") == plain
+    assert read(tmp_path / "warm.csv") == plain
+
+
+def test_build_csv_rows_do_not_depend_on_file_order(tmp_path):
+    pcaps = synthetic_captures(str(tmp_path))
+    build_training_csv(pcaps, str(tmp_path / "forward.csv"))
+    build_training_csv(pcaps[::-1], str(tmp_path / "reverse.csv"))
+    forward = read(tmp_path / "forward.csv").splitlines()
+    reverse = read(tmp_path / "reverse.csv").splitlines()
+    assert forward[0] == reverse[0]
+    assert forward[1:] == reverse[1:][::-1]
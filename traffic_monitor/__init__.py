@@ -0,0 +1,3 @@
+# Network traffic monitor: capture, analysis, alert and detector backends plus
+# the shared monitor loop. Run `python3 -m traffic_monitor --help`. Submodules
+# are imported on demand so the Pi monitor never pays for numpy or sklearn.
@@ -0,0 +1,112 @@
+# Alert backends: turn the rolling averages (and the detector's verdict) into
+# something a person notices. "gpio" drives the Pi's LEDs through the
+# non-blocking LedController, "console" prints level changes. Either can be
+# overridden by the fast alert path (fast_alerts.py) between window updates.
+import threading
+
+from .led_controller import LedController, LedState, load_gpio
+
+GREEN_LED_PIN = 18  # Traffic volume (physical pin 12)
+RED_LED_PIN = 23    # High TCP traffic (physical pin 16)
+HIGH_PACKETS = 1000
+MEDIUM_PACKETS = 250
+TCP_ALERT_RATIO = 0.7
+
+
+def traffic_level(avg_packets, avg_tcp_ratio, anomaly=False):
+    # Returns (LedState, messages) for the current averages
+    if avg_packets > HIGH_PACKETS:
+        green_interval = 0.2
+        messages = [f"Average packets ({avg_packets:.1f}) > {HIGH_PACKETS} - Fast green blinking"]
+    elif avg_packets > MEDIUM_PACKETS:
+        green_interval = 0.5
+        messages = [f"Average packets ({avg_packets:.1f}) > {MEDIUM_PACKETS} - Medium green blinking"]
+    else:
+        green_interval = 1.0
+        messages = [f"Average packets ({avg_packets:.1f}) <= {MEDIUM_PACKETS} - Slow green blinking"]
+
+    red_on = avg_tcp_ratio > TCP_ALERT_RATIO
+    if red_on:
+        messages.append(f"Average TCP ratio ({avg_tcp_ratio*100:.1f}%) > {TCP_ALERT_RATIO*100:.0f}% - Red LED on")
+    if anomaly:
+        messages.append("Anomalous window - red LED on, green heartbeat")
+        return LedState(green_interval, True, "heartbeat"), messages
+    return LedState(green_interval, red_on), messages
+
+
+class ConsoleAlerts:
+    name = "console"
+
+    def __init__(self, fake_gpio=False):
+        self.state = None
+        self.fast = None  # reason while the fast alert path holds the red LED on
+        self._lock = threading.Lock()
+
+    def update(self, avg_packets, avg_tcp_ratio, anomaly=False):
+        # Prints only when the level changes
+        state, messages = traffic_level(avg_packets, avg_tcp_ratio, anomaly)
+        with self._lock:
+            if state != self.state:
+                for message in messages:
+                    print(message)
+            self.state = state
+            self.show(self.current())
+        return state
+
+    def fast_alert(self, reason=None):
+        # Raised (reason) or cleared (None) by the fast path, between window updates
+        with self._lock:
+            if reason and not self.fast:
+                print(f"🚨 Fast alert: {reason} - Red LED on")
+            elif not reason and self.fast:
+                print("Fast alert cleared")
+            self.fast = reason
+            self.show(self.current())
+
+    def current(self):
+        # The window-level state, with the red LED forced on during a fast alert
+        state = self.state or LedState()
+        if self.fast and not state.red_on:
+            return LedState(state.blink_interval, True, state.pattern)
+        return state
+
+    def show(self, state):
+        pass
+
+    def close(self):
+        pass
+
+
+class GpioAlerts(ConsoleAlerts):
+    name = "gpio"
+
+    def __init__(self, fake_gpio=False):
+        super().__init__()
+        self.gpio = load_gpio(fake_gpio)
+        self.gpio.setmode(self.gpio.BCM)
+        self.gpio.setup(GREEN_LED_PIN, self.gpio.OUT)
+        self.gpio.setup(RED_LED_PIN, self.gpio.OUT)
+        self.leds = LedController(self.gpio, GREEN_LED_PIN, RED_LED_PIN)
+        self.leds.start()
+
+    def show(self, state):
+        # Non-blocking: hands the new target to the LED driver thread
+        self.leds.set_target(state)
+
+    def close(self):
+        self.leds.stop()
+        self.gpio.cleanup()
+        print("GPIO cleaned up")
+
+
+ALERTS = {
+    "gpio": GpioAlerts,
+    "console": ConsoleAlerts,
+}
+
+
+def make_alerts(name, fake_gpio=False):
+    try:
+        return ALERTS[name](fake_gpio)
+    except KeyError:
+        raise ValueError(f"Unknown alert backend {name!r} (choose from {', '.join(ALERTS)})")
@@ -0,0 +1,132 @@
+# Analysis backends. Each turns a capture file into a feature dict with at least
+# total_packets, tcp_ratio, udp_ratio, other_ratio and top_ip; the flow backend
+# adds the flow_features.FEATURE_NAMES columns the anomaly model uses.
+from . import metrics
+from .flow_features import FEATURE_VERSION, WindowFeatureExtractor, extract_features
+from .pcap_reader import SUMMARY_VERSION, iter_packets, summarize_packets, top_source_ip
+
+ANALYZE_SECONDS = metrics.timer("traffic_analyze_seconds", "Time to parse and analyze one capture window")
+WINDOWS = metrics.counter("traffic_windows_total", "Capture windows analyzed")
+PACKETS = metrics.counter("traffic_packets_total", "Packets seen in analyzed windows")
+ANALYSIS_ERRORS = metrics.counter("traffic_analysis_errors_total", "Capture windows that could not be analyzed")
+CACHE_HITS = metrics.counter("traffic_analysis_cache_hits_total", "Captures answered from the analysis cache")
+
+
+class Analyzer:
+    name = None
+    version = None
+
+    def __init__(self, sample_every=1, cache=None, stream=False):
+        self.sample_every = max(sample_every, 1)
+        # stream=True: the windows are consecutive slices of one live capture and
+        # may depend on the ones before, so they are never cached
+        self.stream = stream
+        self.cache = None if stream else cache
+
+    def analyze(self, pcap_file, duration=None):
+        return self.analyze_packets(iter_packets(pcap_file), duration)
+
+    def analyze_packets(self, packets, duration=None):
+        raise NotImplementedError
+
+    def variant(self, duration=None):
+        # Everything besides the file itself that changes the result
+        return f"{self.name}:v{self.version}:every={self.sample_every}:duration={duration}"
+
+    def run(self, pcap_file, duration=None):
+        # Timed and counted analyze(); returns None when the file can't be read
+        features = self.cache.get(pcap_file, self.variant(duration)) if self.cache is not None else None
+        if features is not None:
+            CACHE_HITS.inc()
+        else:
+            try:
+                with ANALYZE_SECONDS.time():
+                    features = self.analyze(pcap_file, duration)
+            except (OSError, ValueError) as e:
+                ANALYSIS_ERRORS.inc()
+                print(f"Error analyzing file {pcap_file}: {e}")
+                return None
+            if self.cache is not None:
+                self.cache.put(pcap_file, self.variant(duration), features)
+        WINDOWS.inc()
+        PACKETS.inc(features["total_packets"])
+        return features
+
+    def run_packets(self, packets, duration=None):
+        # Counted analyze_packets() for in-process captures: the packets are
+        # analyzed while they arrive, so there is no separate analysis time
+        try:
+            features = self.analyze_packets(packets, duration)
+        except (OSError, ValueError) as e:
+            ANALYSIS_ERRORS.inc()
+            print(f"Error analyzing live capture: {e}")
+            return None
+        WINDOWS.inc()
+        PACKETS.inc(features["total_packets"])
+        return features
+
+
+class SummaryAnalyzer(Analyzer):
+    # Protocol counts and top talker only: the cheapest pass, used on the Pi
+    name = "summary"
+    version = SUMMARY_VERSION
+
+    def analyze_packets(self, packets, duration=None):
+        summary = summarize_packets(packets, self.sample_every)
+        total = summary["total"]
+        return {
+            "total_packets": total,
+            "tcp_ratio": summary["tcp"] / total if total else 0.0,
+            "udp_ratio": summary["udp"] / total if total else 0.0,
+            "other_ratio": summary["other"] / total if total else 0.0,
+            "bytes": summary["bytes"],
+            "top_ip": top_source_ip(summary),
+            "top_talkers": sorted(summary["src_packets"].items(), key=lambda item: item[1], reverse=True)[:5],
+            "sampled_packets": summary["sampled"],
+        }
+
+
+class FlowAnalyzer(Analyzer):
+    # Bounded flow table features for the anomaly model and training CSVs
+    name = "flow"
+    version = FEATURE_VERSION
+
+    def __init__(self, sample_every=1, cache=None, stream=False):
+        super().__init__(sample_every, cache, stream)
+        # A live monitor carries one flow table across its windows, so new_flows
+        # counts flows first seen in the window. Offline, cached or not, every
+        # file is analyzed on its own with a fresh table.
+        self.extractor = WindowFeatureExtractor() if stream else None
+
+    def analyze_packets(self, packets, duration=None):
+        return extract_features(packets, self.extractor, duration, self.sample_every)
+
+
+ANALYZERS = {
+    "summary": SummaryAnalyzer,
+    "flow": FlowAnalyzer,
+}
+
+
+def make_analyzer(name, sample_every=1, cache=None, stream=False):
+    try:
+        return ANALYZERS[name](sample_every, cache, stream)
+    except KeyError:
+        raise ValueError(f"Unknown analysis backend {name!r} (choose from {', '.join(ANALYZERS)})")
+
+
+def format_analysis(pcap_file, features, sample_every=1):
+    total = features["total_packets"]
+    lines = [f"Analysis for {pcap_file}:", f"Total packets: {total}"]
+    if features.get("sampled_packets", total) < total:
+        lines.append(f"Decoded 1 in {sample_every} ({features['sampled_packets']} packets); "
+                     f"protocol counts are estimates")
+    if total > 0:
+        lines.append(f"TCP packets: {features['tcp_ratio']*100:.1f}%")
+        lines.append(f"UDP packets: {features['udp_ratio']*100:.1f}%")
+        lines.append(f"Other packets: {features['other_ratio']*100:.1f}%")
+        if "active_flows" in features:
+            lines.append(f"Flows: {features['active_flows']} active, {features['new_flows']} new | "
+                         f"SYN ratio: {features['syn_ratio']:.2f} | Port entropy: {features['dst_port_entropy']:.2f}")
+    lines.append(f"Top source IP: {features['top_ip']}")
+    return "\n".join(lines)
@@ -0,0 +1,91 @@
+# Persistent cache of per-capture analysis results. Captures never change once
+# written, so a result keyed by (path, size, mtime) and the analyzer variant
+# (name, extractor version, sampling, duration) stays valid until the file is
+# replaced or the extractor changes. Least-recently-used rows are evicted once
+# the cache holds more than max_entries results.
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "traffic_monitor", "analysis.sqlite")
+
+
+def file_key(path):
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+class AnalysisCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=100000):
+        self.path = path
+        self.max_entries = max_entries
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results (path TEXT, size INTEGER, mtime_ns INTEGER, variant TEXT, "
+            "features TEXT, last_used REAL, PRIMARY KEY (path, size, mtime_ns, variant))")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self._touched = []
+        self._pending = []
+
+    def get(self, path, variant):
+        # Cached feature dict for this file and analyzer variant, or None
+        try:
+            key = file_key(path)
+        except OSError:
+            return None
+        row = self.conn.execute(
+            "SELECT features FROM results WHERE path = ? AND size = ? AND mtime_ns = ? AND variant = ?",
+            (*key, variant)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched.append((time.time(), *key, variant))
+        return json.loads(row[0])
+
+    def put(self, path, variant, features):
+        try:
+            key = file_key(path)
+        except OSError:
+            return
+        self._pending.append((*key, variant, json.dumps(features), time.time()))
+        if len(self._pending) >= 500:
+            self.flush()
+
+    def flush(self):
+        # Batched writes: one transaction per 500 new results plus the LRU touches
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)", self._pending)
+            self.conn.executemany(
+                "UPDATE results SET last_used = ? WHERE path = ? AND size = ? AND mtime_ns = ? AND variant = ?",
+                self._touched)
+        self._pending = []
+        self._touched = []
+        self.evict()
+
+    def evict(self):
+        count = self.conn.execute("SELECT count(*) FROM results").fetchone()[0]
+        if count > self.max_entries:
+            with self.conn:
+                self.conn.execute(
+                    "DELETE FROM results WHERE rowid IN "
+                    "(SELECT rowid FROM results ORDER BY last_used LIMIT ?)", (count - self.max_entries,))
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM results")
+
+    def __len__(self):
+        return self.conn.execute("SELECT count(*) FROM results").fetchone()[0]
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,74 @@
+# Model loading and batch scoring for the IsolationForest anomaly detector.
+# The model/scaler pair is loaded once per process and every call scores a
+# whole matrix of windows with a single NumPy/sklearn call.
+import functools
+import threading
+
+import numpy as np
+
+from .flow_features import BASE_FEATURES
+
+
+class AnomalyScorer:
+    def __init__(self, model, scaler, threshold=None):
+        self.model = model
+        self.scaler = scaler
+        # score_samples below the threshold is an anomaly; sklearn's own cut-off by default
+        self.fixed_threshold = threshold
+        self.threshold = model.offset_ if threshold is None else threshold
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, model_path, scaler_path=None, threshold=None, mmap=True):
+        if model_path.endswith(".npz"):
+            # Exported forest: scaler is bundled and sklearn is never imported
+            from .forest_inference import load_forest
+            model, scaler = load_forest(model_path)
+            return cls(model, scaler, threshold)
+        import joblib
+        # mmap_mode maps the tree arrays straight from the page cache when the
+        # pickle was written uncompressed; joblib falls back to a normal load otherwise
+        mmap_mode = "r" if mmap else None
+        model = joblib.load(model_path, mmap_mode=mmap_mode)
+        scaler = joblib.load(scaler_path, mmap_mode=mmap_mode)
+        return cls(model, scaler, threshold)
+
+    def _current(self):
+        with self._lock:
+            return self.model, self.scaler, self.threshold
+
+    def swap(self, model, scaler):
+        # Hot-swap a retrained model; a configured fixed threshold is kept
+        with self._lock:
+            self.model = model
+            self.scaler = scaler
+            self.threshold = model.offset_ if self.fixed_threshold is None else self.fixed_threshold
+
+    @property
+    def feature_names(self):
+        # Models trained before the flow-table features only know the base four
+        return list(getattr(self.scaler, "feature_names_in_", BASE_FEATURES))
+
+    def score_batch(self, rows):
+        # Continuous scores, one per row; lower means more anomalous
+        model, scaler, _ = self._current()
+        X = np.asarray(rows, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        # StandardScaler.transform by hand: same result, no feature-name checks per call
+        return model.score_samples((X - scaler.mean_) / scaler.scale_)
+
+    def decision_batch(self, rows):
+        _, _, threshold = self._current()
+        return self.score_batch(rows) - threshold
+
+    def predict_batch(self, rows):
+        return np.where(self.decision_batch(rows) < 0, -1, 1)
+
+    def score(self, features):
+        return float(self.score_batch([features])[0])
+
+
+@functools.lru_cache(maxsize=4)
+def get_scorer(model_path, scaler_path=None, threshold=None):
+    return AnomalyScorer.load(model_path, scaler_path, threshold)
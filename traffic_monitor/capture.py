@@ -0,0 +1,285 @@
+# Capture backends. A backend writes one window of traffic to a capture file
+# and returns its path (None on failure); CAPTURE_BACKENDS maps --capture names
+# to classes so other capture methods can be added without touching the monitor.
+import os
+import re
+import struct
+import subprocess
+import time
+from datetime import datetime
+
+from . import metrics
+from .pcap_reader import LINKTYPE_ETHERNET, LINKTYPE_RAW, PCAP_MAGIC_NS
+
+DROPPED_RE = re.compile(r"(\d+) packets? dropped")
+# Enough for Ethernet/VLAN + IPv4 or IPv6 + the TCP/UDP ports and flags the analysis reads
+HEADER_SNAPLEN = 96
+
+CAPTURE_SECONDS = metrics.timer("traffic_capture_seconds", "Duration of each capture window")
+DROPS = metrics.counter("traffic_dropped_packets_total", "Packets the capture reported as dropped")
+CAPTURE_ERRORS = metrics.counter("traffic_capture_errors_total", "Failed captures")
+
+_u32 = struct.Struct("<I").unpack_from
+_u32x2 = struct.Struct("<II").unpack_from
+
+
+def list_interfaces():
+    try:
+        result = subprocess.run(["tshark", "-D"], capture_output=True, text=True, check=True)
+        return result.stdout.splitlines()
+    except subprocess.CalledProcessError as e:
+        print(f"Error running tshark: {e}")
+        return []
+    except FileNotFoundError:
+        print("tshark not found. Install it with 'sudo apt install tshark -y' (Linux) "
+              "or Wireshark with tshark on the PATH (Windows).")
+        return []
+
+
+def choose_interface():
+    # Interactive pick from `tshark -D`; returns the interface name or None
+    interfaces = list_interfaces()
+    if not interfaces:
+        print("No network interfaces found. Exiting.")
+        return None
+
+    print("Available network interfaces:")
+    for i, iface in enumerate(interfaces, 1):
+        print(f"{i}. {iface}")
+
+    choice = int(input("Select interface number: ")) - 1
+    if not 0 <= choice < len(interfaces):
+        print("Invalid interface number.")
+        return None
+
+    return interfaces[choice].split()[1].split("(")[0]
+
+
+def capture_options(bpf_filter=None, snaplen=0):
+    # Extra tshark arguments: a BPF capture filter runs in the kernel, so rejected
+    # packets never reach userspace; snaplen truncates what is copied and written.
+    args = []
+    if bpf_filter:
+        args += ["-f", bpf_filter]
+    if snaplen:
+        args += ["-s", str(snaplen)]
+    return args
+
+
+class TsharkCapture:
+    # One tshark process per window: tshark -i IFACE -a duration:N -w FILE
+    name = "tshark"
+
+    def __init__(self, interface, output_dir, bpf_filter=None, snaplen=0, prefix="capture"):
+        self.interface = interface
+        self.output_dir = output_dir
+        self.bpf_filter = bpf_filter
+        self.snaplen = snaplen
+        self.prefix = prefix
+        self.capture_args = capture_options(bpf_filter, snaplen)
+        self.last_dropped = 0
+
+    def output_path(self):
+        timestamp = datetime.now().strftime("%H%M%S_%d%m%Y")
+        return os.path.join(self.output_dir, f"{self.prefix}_{timestamp}.pcap")
+
+    def capture(self, duration):
+        os.makedirs(self.output_dir, exist_ok=True)
+        output_file = self.output_path()
+        try:
+            with CAPTURE_SECONDS.time():
+                result = subprocess.run(["tshark", "-i", self.interface, "-a", f"duration:{duration}",
+                                         *self.capture_args, "-w", output_file],
+                                        stderr=subprocess.PIPE, text=True, check=True)
+        except (OSError, subprocess.CalledProcessError) as e:
+            CAPTURE_ERRORS.inc()
+            print(f"Error capturing packets: {e}")
+            return None
+        self.last_dropped = sum(int(n) for n in DROPPED_RE.findall(result.stderr))
+        DROPS.inc(self.last_dropped)
+        return output_file
+
+    def close(self):
+        pass
+
+
+# AF_PACKET / TPACKET_V3 constants from linux/if_packet.h
+SOL_PACKET = 263
+PACKET_RX_RING = 5
+PACKET_STATISTICS = 6
+PACKET_VERSION = 10
+TPACKET_V3 = 2
+TP_STATUS_KERNEL = 0
+TP_STATUS_USER = 1
+PACKET_OUTGOING = 4
+ETH_P_ALL = 0x0003
+SO_ATTACH_FILTER = 26
+TPACKET3_HDR = struct.Struct("<IIIIIIHH")  # next_offset, sec, nsec, snaplen, len, status, mac, net
+SLL_PKTTYPE_OFFSET = 58  # sockaddr_ll.sll_pkttype, after the 48-byte aligned tpacket3_hdr
+# ARPHRD_* interface types -> pcap link types; loopback frames carry a zeroed Ethernet header
+ARPHRD_LINKTYPES = {1: LINKTYPE_ETHERNET, 772: LINKTYPE_ETHERNET, 65534: LINKTYPE_RAW}
+DLT_NAMES = {LINKTYPE_ETHERNET: "EN10MB", LINKTYPE_RAW: "RAW"}  # tcpdump -y names
+
+
+def compile_filter(bpf_filter, snaplen=0, linktype=LINKTYPE_ETHERNET):
+    # Classic BPF program for SO_ATTACH_FILTER; the kernel has no compiler, so
+    # tcpdump's -ddd output is used. Raises OSError when it is missing.
+    # The program is compiled for the socket's link type, not tcpdump's default device.
+    args = ["tcpdump", "-ddd", "-y", DLT_NAMES[linktype]] + (["-s", str(snaplen)] if snaplen else []) + [bpf_filter]
+    try:
+        result = subprocess.run(args, capture_output=True, text=True, check=True)
+    except subprocess.CalledProcessError as e:
+        raise OSError(f"cannot compile filter {bpf_filter!r}: {e.stderr.strip()}")
+    lines = result.stdout.split("\n")
+    return [tuple(int(n) for n in line.split()) for line in lines[1:1 + int(lines[0])]]
+
+
+class AfPacketCapture:
+    # In-process capture from an mmap'd TPACKET_V3 ring on a raw AF_PACKET socket.
+    # packets() yields each frame as a memoryview into the ring, so the analysis
+    # reads headers where the kernel put them. The window is also written to a
+    # pcap (for the store and later training) but never read back. Needs root or
+    # CAP_NET_RAW; make_capture() falls back to tshark when the socket can't be opened.
+    name = "af-packet"
+
+    def __init__(self, interface, output_dir, bpf_filter=None, snaplen=0, prefix="capture",
+                 block_size=1 << 20, block_count=8, block_timeout_ms=100):
+        import mmap
+        import select
+        import socket
+
+        self.interface = interface
+        self.output_dir = output_dir
+        self.bpf_filter = bpf_filter
+        self.snaplen = snaplen
+        self.prefix = prefix
+        self.block_size = block_size
+        self.block_count = block_count
+        self.block_timeout = block_timeout_ms / 1000
+        self.last_dropped = 0
+        self.last_file = None
+        self.linktype = self._linktype(interface)
+        self.skip_outgoing = self.linktype == LINKTYPE_ETHERNET and self._hatype(interface) == 772
+        program = compile_filter(bpf_filter, snaplen, self.linktype) if bpf_filter else None
+        self.sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+        try:
+            if program:
+                import ctypes
+
+                code = ctypes.create_string_buffer(b"".join(struct.pack("HBBI", *op) for op in program))
+                self._filter_code = code  # must outlive the setsockopt call
+                self.sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER,
+                                     struct.pack("HL", len(program), ctypes.addressof(code)))
+            self.sock.setsockopt(SOL_PACKET, PACKET_VERSION, TPACKET_V3)
+            self.sock.setsockopt(SOL_PACKET, PACKET_RX_RING, struct.pack(
+                "7I", block_size, block_count, 2048, block_size * block_count // 2048, block_timeout_ms, 0, 0))
+            self.sock.bind((interface, ETH_P_ALL))
+            self.ring = mmap.mmap(self.sock.fileno(), block_size * block_count, mmap.MAP_SHARED,
+                                  mmap.PROT_READ | mmap.PROT_WRITE)
+        except OSError:
+            self.sock.close()
+            raise
+        self.view = memoryview(self.ring)
+        self.block = 0
+        self.poller = select.poll()
+        self.poller.register(self.sock, select.POLLIN | select.POLLERR)
+
+    @staticmethod
+    def _hatype(interface):
+        try:
+            with open(f"/sys/class/net/{interface}/type") as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return 1
+
+    def _linktype(self, interface):
+        return ARPHRD_LINKTYPES.get(self._hatype(interface), LINKTYPE_ETHERNET)
+
+    def _ready_blocks(self):
+        # Blocks the kernel has handed over, oldest first, at most one full ring
+        view = self.view
+        for _ in range(self.block_count):
+            if not _u32(view, self.block * self.block_size + 8)[0] & TP_STATUS_USER:
+                return
+            yield self.block * self.block_size
+            self.block = (self.block + 1) % self.block_count
+
+    def _release(self, offset):
+        struct.pack_into("<I", self.view, offset + 8, TP_STATUS_KERNEL)
+
+    def _drops(self):
+        # Reading the counters also resets them
+        received, dropped, _ = struct.unpack("3I", self.sock.getsockopt(SOL_PACKET, PACKET_STATISTICS, 12))
+        return dropped
+
+    def packets(self, duration):
+        # Yields (ts, linktype, frame memoryview, original length) for `duration`
+        # seconds and writes them to a new capture file (self.last_file)
+        for offset in list(self._ready_blocks()):
+            self._release(offset)  # traffic from before the window
+        self._drops()
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.last_file = output_file = os.path.join(
+            self.output_dir, f"{self.prefix}_{datetime.now().strftime('%H%M%S_%d%m%Y')}.pcap")
+        start = time.time()
+        end = start + duration
+        view, linktype, snaplen, skip_outgoing = self.view, self.linktype, self.snaplen, self.skip_outgoing
+        record = struct.Struct("<IIII")
+        with CAPTURE_SECONDS.time(), open(output_file, "wb", buffering=1 << 20) as out:
+            out.write(struct.pack("<IHHiIII", PCAP_MAGIC_NS, 2, 4, 0, 0, snaplen or 262144, linktype))
+            # One more block timeout after the end lets the kernel retire the last partial block
+            while time.time() < end + self.block_timeout:
+                self.poller.poll(max(1, int((end + self.block_timeout - time.time()) * 1000)))
+                for offset in list(self._ready_blocks()):
+                    count, packet = _u32x2(view, offset + 12)
+                    packet += offset
+                    for _ in range(count):
+                        next_offset, sec, nsec, caplen, length, _, mac, _ = TPACKET3_HDR.unpack_from(view, packet)
+                        ts = sec + nsec / 1e9
+                        # On loopback every packet is seen leaving and arriving; keep one copy
+                        if start <= ts <= end and not (skip_outgoing
+                                                       and view[packet + SLL_PKTTYPE_OFFSET] == PACKET_OUTGOING):
+                            if snaplen and caplen > snaplen:
+                                caplen = snaplen
+                            frame = view[packet + mac:packet + mac + caplen]
+                            out.write(record.pack(sec, nsec, caplen, length))
+                            out.write(frame)
+                            yield ts, linktype, frame, length
+                        packet += next_offset
+                    self._release(offset)
+        self.last_dropped = self._drops()
+        DROPS.inc(self.last_dropped)
+
+    def capture(self, duration):
+        # File-based interface, for callers that analyze the capture file themselves
+        for _ in self.packets(duration):
+            pass
+        return self.last_file
+
+    def close(self):
+        self.sock.close()
+        try:
+            self.view.release()
+            self.ring.close()
+        except BufferError:
+            pass  # a caller still holds a frame; the mapping goes when it does
+
+
+CAPTURE_BACKENDS = {
+    "tshark": TsharkCapture,
+    "af-packet": AfPacketCapture,
+}
+
+
+def make_capture(name, interface, output_dir, **options):
+    try:
+        backend = CAPTURE_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown capture backend {name!r} (choose from {', '.join(CAPTURE_BACKENDS)})")
+    try:
+        return backend(interface, output_dir, **options)
+    except OSError as e:
+        if backend is TsharkCapture:
+            raise
+        print(f"{name} capture unavailable on {interface} ({e}) - falling back to tshark.")
+        return TsharkCapture(interface, output_dir, **options)
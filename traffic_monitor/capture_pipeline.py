@@ -0,0 +1,181 @@
+# Continuous capture: one long-lived tshark ring-buffer process produces
+# fixed-length segment files, a consumer thread analyzes them while the
+# next window is still being captured.
+import glob
+import os
+import queue
+import subprocess
+import threading
+import time
+from datetime import datetime
+
+POLL_INTERVAL = 0.2
+
+
+class CaptureWindow:
+    __slots__ = ("index", "path", "start", "end")
+
+    def __init__(self, index, path, start, end):
+        self.index = index
+        self.path = path
+        self.start = start
+        self.end = end
+
+
+def segment_start_time(path):
+    # tshark ring-buffer files are named <prefix>_<NNNNN>_<YYYYmmddHHMMSS>.pcap
+    stamp = os.path.splitext(os.path.basename(path))[0].rsplit("_", 1)[-1]
+    try:
+        return datetime.strptime(stamp, "%Y%m%d%H%M%S").timestamp()
+    except ValueError:
+        return os.path.getmtime(path)
+
+
+class CapturePipeline:
+    def __init__(self, interface, output_dir, analyze, on_result=None, duration=10,
+                 queue_size=4, prefix="capture", capture_args=(), keep_segments=False):
+        self.interface = interface
+        self.output_dir = output_dir
+        self.analyze = analyze
+        self.on_result = on_result
+        self.duration = duration
+        self.prefix = prefix
+        self.capture_args = list(capture_args)
+        # The spool is a hand-off: a segment still there once it has been handled
+        # (no store took it, or it failed to analyze) is deleted unless kept
+        self.keep_segments = keep_segments
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.process = None
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._stats = {
+            "windows_captured": 0,
+            "windows_analyzed": 0,
+            "analysis_errors": 0,
+            "queue_max_depth": 0,
+            "backpressure_events": 0,
+            "backpressure_seconds": 0.0,
+            "last_analysis_seconds": 0.0,
+            "last_lag_seconds": 0.0,
+            "max_lag_seconds": 0.0,
+        }
+
+    def capture_command(self):
+        pattern = os.path.join(self.output_dir, f"{self.prefix}.pcap")
+        return ["tshark", "-q", "-i", self.interface, "-b", f"duration:{self.duration}",
+                *self.capture_args, "-w", pattern]
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.process = subprocess.Popen(self.capture_command(), stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.DEVNULL)
+        self._threads = [
+            threading.Thread(target=self._produce, name="capture-producer", daemon=True),
+            threading.Thread(target=self._consume, name="capture-consumer", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def running(self):
+        return not self._stop.is_set() and self.process is not None and self.process.poll() is None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self.queue.qsize()
+        stats["queue_capacity"] = self.queue.maxsize
+        return stats
+
+    def _segments(self):
+        return glob.glob(os.path.join(self.output_dir, f"{self.prefix}_*"))
+
+    def _enqueue(self, window):
+        # Block instead of dropping: tshark keeps writing segments to disk, so
+        # nothing is lost while the consumer catches up, but the wait is recorded.
+        try:
+            self.queue.put_nowait(window)
+        except queue.Full:
+            started = time.monotonic()
+            with self._lock:
+                self._stats["backpressure_events"] += 1
+            self.queue.put(window)
+            with self._lock:
+                self._stats["backpressure_seconds"] += time.monotonic() - started
+        with self._lock:
+            self._stats["windows_captured"] += 1
+            self._stats["queue_max_depth"] = max(self._stats["queue_max_depth"], self.queue.qsize())
+
+    def _produce(self):
+        seen = set()
+        starts = {}  # Segment on disk -> start time, parsed once per file
+        index = 0
+        while True:
+            stopping = self._stop.is_set() or (self.process and self.process.poll() is not None)
+            # Segments moved or deleted since the last poll are forgotten, so both
+            # stay as small as the spool directory
+            starts = {path: starts.get(path) or segment_start_time(path) for path in self._segments()}
+            seen.intersection_update(starts)
+            # Oldest first by the start stamp: the 5-digit file counter wraps, the name order breaks
+            segments = sorted((path for path in starts if path not in seen), key=lambda path: (starts[path], path))
+            # The newest segment is still being written unless tshark has exited
+            complete = segments if stopping else segments[:-1]
+            for path in complete:
+                seen.add(path)
+                index += 1
+                self._enqueue(CaptureWindow(index, path, starts[path], time.time()))
+            if stopping:
+                break
+            time.sleep(POLL_INTERVAL)
+        self.queue.put(None)
+
+    def _consume(self):
+        while True:
+            window = self.queue.get()
+            if window is None:
+                break
+            try:
+                self._handle(window)
+            finally:
+                if not self.keep_segments:
+                    try:
+                        os.remove(window.path)
+                    except FileNotFoundError:
+                        pass
+
+    def _handle(self, window):
+        started = time.monotonic()
+        try:
+            result = self.analyze(window.path)
+        except Exception as e:
+            print(f"Error analyzing window {window.index}: {e}")
+            with self._lock:
+                self._stats["analysis_errors"] += 1
+            return
+        elapsed = time.monotonic() - started
+        lag = time.time() - window.end
+        with self._lock:
+            self._stats["windows_analyzed"] += 1
+            self._stats["last_analysis_seconds"] = elapsed
+            self._stats["last_lag_seconds"] = lag
+            self._stats["max_lag_seconds"] = max(self._stats["max_lag_seconds"], lag)
+        if self.on_result:
+            self.on_result(window, result)
+
+
+def format_stats(stats):
+    return (f"windows {stats['windows_analyzed']}/{stats['windows_captured']} | "
+            f"queue {stats['queue_depth']}/{stats['queue_capacity']} (max {stats['queue_max_depth']}) | "
+            f"backpressure {stats['backpressure_events']}x {stats['backpressure_seconds']:.1f}s | "
+            f"analysis {stats['last_analysis_seconds']*1000:.0f}ms | lag {stats['last_lag_seconds']:.1f}s")
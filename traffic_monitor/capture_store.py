@@ -0,0 +1,184 @@
+# Bounded on-disk ring buffer for finished capture segments.
+# Segments are moved into the store (optionally compressed), listed in an
+# append-only index and deleted oldest-first once the size or age limit is hit.
+import bisect
+import gzip
+import os
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime
+
+INDEX_NAME = "index.txt"
+COMPRESSIONS = ("none", "gzip", "zstd")
+
+
+class CaptureStore:
+    def __init__(self, root, max_bytes=1024 ** 3, max_age=7 * 86400, compression="none"):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}', expected one of {COMPRESSIONS}")
+        if compression == "zstd":
+            try:
+                import zstandard  # noqa: F401
+            except ImportError:
+                raise ValueError("zstd compression needs the 'zstandard' package (pip3 install zstandard)")
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compression = compression
+        self.index_path = os.path.join(root, INDEX_NAME)
+        self._lock = threading.Lock()
+        # Parallel lists sorted by segment start time, so lookups are a bisect
+        self._starts = []
+        self._segments = []
+        self._total_bytes = 0
+        self._dead_lines = 0
+        os.makedirs(root, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        live = {}
+        lines = 0
+        with open(self.index_path) as f:
+            for line in f:
+                parts = line.split()
+                lines += 1
+                if len(parts) == 5 and parts[0] == "+":
+                    live[parts[4]] = (float(parts[1]), float(parts[2]), int(parts[3]), parts[4])
+                elif len(parts) == 2 and parts[0] == "-":
+                    live.pop(parts[1], None)
+        segments = sorted(seg for seg in live.values() if os.path.exists(os.path.join(self.root, seg[3])))
+        self._segments = segments
+        self._starts = [seg[0] for seg in segments]
+        self._total_bytes = sum(seg[2] for seg in segments)
+        self._dead_lines = lines - len(segments)
+        self._compact_if_needed()
+
+    def _append_index(self, line):
+        with open(self.index_path, "a") as f:
+            f.write(line)
+
+    def _compact_if_needed(self):
+        if self._dead_lines <= max(len(self._segments), 64):
+            return
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for start, end, size, name in self._segments:
+                f.write(f"+ {start:.3f} {end:.3f} {size} {name}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+        self._dead_lines = 0
+
+    def _compress(self, src, dest):
+        if self.compression == "gzip":
+            with open(src, "rb") as fin, gzip.open(dest, "wb", compresslevel=1) as fout:
+                shutil.copyfileobj(fin, fout, 1 << 16)
+        else:
+            import zstandard
+            with open(src, "rb") as fin, open(dest, "wb") as fout:
+                zstandard.ZstdCompressor(level=3).copy_stream(fin, fout)
+        os.remove(src)
+
+    def add(self, path, start, end):
+        # Moves a finished segment into the store and returns its new path
+        name = os.path.basename(path)
+        if self.compression == "gzip":
+            name += ".gz"
+        elif self.compression == "zstd":
+            name += ".zst"
+        dest = os.path.join(self.root, name)
+        if self.compression == "none":
+            shutil.move(path, dest)
+        else:
+            self._compress(path, dest)
+        size = os.path.getsize(dest)
+        with self._lock:
+            position = bisect.bisect_right(self._starts, start)
+            self._starts.insert(position, start)
+            self._segments.insert(position, (start, end, size, name))
+            self._total_bytes += size
+            self._append_index(f"+ {start:.3f} {end:.3f} {size} {name}\n")
+            self._enforce_retention(time.time())
+        return dest
+
+    def _enforce_retention(self, now):
+        expired = 0
+        total = self._total_bytes
+        for start, end, size, name in self._segments:
+            if total <= self.max_bytes and end >= now - self.max_age:
+                break
+            total -= size
+            expired += 1
+        if not expired:
+            return
+        removed = self._segments[:expired]
+        del self._segments[:expired]
+        del self._starts[:expired]
+        self._total_bytes = total
+        with open(self.index_path, "a") as f:
+            for _, _, _, name in removed:
+                try:
+                    os.remove(os.path.join(self.root, name))
+                except FileNotFoundError:
+                    pass
+                f.write(f"- {name}\n")
+        # Each removal leaves an add and a remove line behind
+        self._dead_lines += 2 * expired
+        self._compact_if_needed()
+
+    def find(self, timestamp):
+        # Segment covering the given time, or None. O(log n) on the start index.
+        with self._lock:
+            position = bisect.bisect_right(self._starts, timestamp) - 1
+            if position < 0:
+                return None
+            start, end, size, name = self._segments[position]
+            if timestamp > end:
+                return None
+            return os.path.join(self.root, name)
+
+    def segments_between(self, start, end):
+        with self._lock:
+            first = max(bisect.bisect_right(self._starts, start) - 1, 0)
+            last = bisect.bisect_right(self._starts, end)
+            return [os.path.join(self.root, seg[3]) for seg in self._segments[first:last] if seg[1] >= start]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "segments": len(self._segments),
+                "bytes": self._total_bytes,
+                "oldest": self._starts[0] if self._starts else None,
+                "newest": self._segments[-1][1] if self._segments else None,
+            }
+
+
+def parse_time(text):
+    try:
+        return float(text)  # Unix timestamp
+    except ValueError:
+        pass
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d", "%H:%M:%S", "%H:%M"):
+        try:
+            parsed = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        if fmt.startswith("%H"):
+            today = datetime.now()
+            parsed = parsed.replace(year=today.year, month=today.month, day=today.day)
+        return parsed.timestamp()
+    raise ValueError(f"Unrecognised time '{text}'")
+
+
+if __name__ == "__main__":
+    # Forensic lookup: python3 -m traffic_monitor.capture_store <store dir> "2025-07-30 14:05"
+    if len(sys.argv) != 3:
+        print("Usage: python3 -m traffic_monitor.capture_store <store dir> <time>")
+        sys.exit(1)
+    store = CaptureStore(sys.argv[1], max_bytes=float("inf"), max_age=float("inf"))
+    found = store.find(parse_time(sys.argv[2]))
+    print(found if found else "No capture covers that time.")
@@ -0,0 +1,421 @@
+# Single command line for every entry point:
+#   python3 -m traffic_monitor pi|windows|detect   monitor loops (see --help of each)
+#   python3 -m traffic_monitor train|export-forest|build-csv   model training
+#   python3 -m traffic_monitor find STORE TIME   capture store lookup
+# Only argparse is imported up front; each command imports what it needs, so
+# the Pi monitor never loads numpy/sklearn and starts in a fraction of a second.
+import argparse
+import os
+import sys
+from datetime import datetime
+
+PI_CAPTURE_DIR = "/home/Mathi.b_417"
+# Choices are listed here rather than imported so --help stays instant;
+# the backend registries validate them again when the objects are built.
+CAPTURE_BACKENDS = ("tshark", "af-packet")
+ANALYZERS = ("summary", "flow")
+ALERTS = ("gpio", "console")
+DETECTORS = ("none", "isolation-forest")
+LOG_FORMATS = ("text", "jsonl")
+COMPRESSIONS = ("none", "gzip", "zstd")
+HEADER_SNAPLEN = 96
+
+
+def add_monitor_options(parser):
+    backends = parser.add_argument_group("backends")
+    backends.add_argument("--capture", choices=CAPTURE_BACKENDS, default="tshark",
+                          help="tshark writes each window to disk; af-packet captures in-process from a "
+                               "kernel ring (root, Linux) and falls back to tshark")
+    backends.add_argument("--analysis", choices=ANALYZERS,
+                          help="summary = protocol counts only, flow = full flow features")
+    backends.add_argument("--alerts", choices=ALERTS, help="gpio drives the Pi's LEDs, console prints")
+    backends.add_argument("--detector", choices=DETECTORS, help="anomaly detector for each window")
+    backends.add_argument("--fake-gpio", action="store_true",
+                          help="drive a simulated GPIO backend instead of RPi.GPIO")
+
+    capture = parser.add_argument_group("capture")
+    capture.add_argument("--interfaces", help="comma-separated interfaces to monitor without prompting; "
+                                              "more than one runs a worker process per interface")
+    capture.add_argument("--stream", action="store_true",
+                         help="capture continuously and analyze windows while the next one is captured")
+    capture.add_argument("--duration", type=int, default=10, help="capture window length in seconds")
+    capture.add_argument("--samples", type=int, default=0,
+                         help="stop after this many samples (default: run until Ctrl+C)")
+    capture.add_argument("--delay", type=float, default=2.0, help="pause between periodic captures")
+    capture.add_argument("--adaptive", action="store_true",
+                         help="periodic mode: short windows with flow analysis during bursts, long cheap "
+                              "windows when idle, and CPU held under --cpu-budget")
+    capture.add_argument("--min-duration", type=int, default=2, help="shortest adaptive window in seconds")
+    capture.add_argument("--max-duration", type=int, default=60, help="longest adaptive window in seconds")
+    capture.add_argument("--cpu-budget", type=float, default=0.25,
+                         help="adaptive mode: share of one core the monitor and tshark may use")
+    capture.add_argument("--queue-size", type=int, default=4,
+                         help="windows buffered between capture and analysis in --stream mode")
+    capture.add_argument("--filter", metavar="BPF",
+                         help="kernel-side capture filter, e.g. \"not port 22\" or \"tcp or udp\"")
+    capture.add_argument("--snaplen", type=int, default=0,
+                         help=f"bytes kept per packet (0 = whole packet; {HEADER_SNAPLEN} keeps just the headers)")
+    capture.add_argument("--sample-every", type=int, default=1, metavar="N",
+                         help="decode 1 in N packets and extrapolate the counts")
+    capture.add_argument("--output-dir", help="where capture files are written")
+
+    store = parser.add_argument_group("capture store")
+    store.add_argument("--store-dir", help="move finished captures into a size/age-bounded store here")
+    store.add_argument("--store-max-mb", type=float, default=1024,
+                       help="delete the oldest captures once the store exceeds this size")
+    store.add_argument("--store-max-age-hours", type=float, default=168, help="delete captures older than this")
+    store.add_argument("--compress", choices=COMPRESSIONS, default="none", help="compress finished capture segments")
+
+    stats = parser.add_argument_group("statistics")
+    stats.add_argument("--windows", default="1m,5m,1h", help="rolling statistics windows, e.g. 30s,5m,1h")
+    stats.add_argument("--led-window", default="5m", help="rolling window the alerts and average log lines use")
+
+    fast = parser.add_argument_group("fast alerts")
+    fast.add_argument("--fast-alerts", action="store_true",
+                      help="also stream packet headers and raise the red LED within about a second")
+    fast.add_argument("--fast-interval", type=float, default=0.25, help="micro-window length in seconds")
+    fast.add_argument("--fast-span", type=float, default=1.0, help="seconds of micro-windows each check looks at")
+    fast.add_argument("--fast-rate", type=float, default=0, metavar="PPS",
+                      help="also alert above this many packets/s (0 = TCP%% and detector only)")
+    fast.add_argument("--fast-raise", type=int, default=2, help="hot micro-windows in a row before an alert")
+    fast.add_argument("--fast-clear", type=int, default=8, help="calm micro-windows in a row before it clears")
+    fast.add_argument("--alert-webhook", metavar="URL", help="POST fast alert events as JSON to this URL")
+
+    log = parser.add_argument_group("logging and metrics")
+    log.add_argument("--log", metavar="PATH", help="result log file (default depends on the command)")
+    log.add_argument("--no-log", action="store_true", help="don't write a result log")
+    log.add_argument("--log-format", choices=LOG_FORMATS, default="text",
+                     help="text keeps the traffic_log.txt layout, jsonl writes JSON lines")
+    log.add_argument("--sqlite", metavar="PATH", help="also write results to this SQLite database")
+    log.add_argument("--log-flush-seconds", type=float, default=10.0,
+                     help="maximum time a result waits in memory before being written")
+    log.add_argument("--log-batch", type=int, default=50, help="flush early once this many results are buffered")
+    log.add_argument("--fsync", action="store_true", help="fsync log files after every batch")
+    log.add_argument("--history-dir", help="keep packets/TCP%% history with 1m/1h/1d rollups here")
+    log.add_argument("--history-retention", default="",
+                     help="per-resolution retention, e.g. raw=7d,1m=90d,1h=2y,1d=0 (0 = forever)")
+    log.add_argument("--csv-dir", help="append each window's flow features to <run>_traffic_data.csv here")
+    log.add_argument("--report-to", metavar="HOST:PORT", help="push every window's summary to a fleet collector")
+    log.add_argument("--node-name", help="name this monitor reports under (default: the hostname)")
+    log.add_argument("--metrics-port", type=int, default=0,
+                     help="serve Prometheus metrics on 127.0.0.1:PORT/metrics (0 = off)")
+    log.add_argument("--metrics-log-seconds", type=float, default=300,
+                     help="seconds between metrics summary lines in the log")
+
+
+def add_detector_options(parser):
+    model = parser.add_argument_group("anomaly model")
+    model.add_argument("--forest", help="exported forest (.npz); scored with NumPy only")
+    model.add_argument("--model", help="IsolationForest pickle, used when --forest is missing")
+    model.add_argument("--scaler", help="StandardScaler pickle that goes with --model")
+    model.add_argument("--threshold", type=float,
+                       help="score_samples cut-off (default: the model's contamination threshold)")
+    model.add_argument("--online-dir", help="retrain online from live windows and keep the models here")
+    model.add_argument("--retrain-interval", type=float, default=3600, help="seconds between online refits")
+    model.add_argument("--reservoir-size", type=int, default=5000, help="windows kept for online retraining")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="traffic_monitor", description="Network traffic monitor")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pi = commands.add_parser("pi", help="Raspberry Pi monitor: LEDs follow rolling traffic averages")
+    add_monitor_options(pi)
+    add_detector_options(pi)
+    pi.set_defaults(handler=run_monitor, analysis="summary", alerts="gpio", detector="none",
+                    output_dir=PI_CAPTURE_DIR, store_dir=os.path.join(PI_CAPTURE_DIR, "captures"),
+                    history_dir=os.path.join(PI_CAPTURE_DIR, "history"),
+                    default_log=os.path.join(PI_CAPTURE_DIR, "traffic_log"), run_subdir=False)
+
+    windows = commands.add_parser("windows", help="desktop collector: flow features to CSV for training")
+    add_monitor_options(windows)
+    add_detector_options(windows)
+    windows.set_defaults(handler=run_monitor, analysis="flow", alerts="console", detector="none",
+                         output_dir="captures", default_log="traffic_log", run_subdir=True)
+
+    detect = commands.add_parser("detect", help="real-time anomaly detection with the IsolationForest")
+    add_monitor_options(detect)
+    add_detector_options(detect)
+    detect.set_defaults(handler=run_monitor, analysis="flow", alerts="console", detector="isolation-forest",
+                        output_dir="realtime_captures", default_log=None, run_subdir=True,
+                        forest="anomaly_forest.npz", model="anomaly_model.pkl", scaler="anomaly_scaler.pkl")
+
+    train = commands.add_parser("train", help="fit the model on a traffic_data CSV and export it")
+    train.add_argument("csv", help="CSV written by the windows command or build-csv")
+    train.add_argument("--model-dir", help="where timestamped models go (default: next to the CSV)")
+    train.add_argument("--chunk-rows", type=int, default=20000, help="CSV rows read and labeled at a time")
+    train.add_argument("--sample-size", type=int, default=50000,
+                       help="the forest is trained on a uniform sample of at most this many rows")
+    train.set_defaults(handler=run_train)
+
+    export = commands.add_parser("export-forest", help="convert model/scaler pickles to a NumPy .npz")
+    export.add_argument("model")
+    export.add_argument("scaler")
+    export.add_argument("output")
+    export.set_defaults(handler=run_export)
+
+    build = commands.add_parser("build-csv", help="extract training features from saved captures")
+    build.add_argument("output", help="CSV to write")
+    build.add_argument("pcaps", nargs="+")
+    build.add_argument("--cache", help="analysis cache database (default: ~/.cache/traffic_monitor/analysis.sqlite)")
+    build.add_argument("--no-cache", action="store_true", help="parse every capture again")
+    build.add_argument("--cache-entries", type=int, default=100000,
+                       help="least recently used results are dropped beyond this many")
+    build.set_defaults(handler=run_build_csv)
+
+    collect = commands.add_parser("collect", help="fleet collector: merge the windows many monitors report")
+    collect.add_argument("--listen", default="0.0.0.0:9700", metavar="HOST:PORT",
+                         help="address to accept monitors on (unauthenticated: use a trusted network)")
+    collect.add_argument("--store", default="fleet_history", help="per-node and fleet-wide history directory")
+    collect.add_argument("--tick", type=float, default=10.0, help="seconds per fleet-wide sample and check")
+    collect.add_argument("--anomaly-nodes", type=int, default=2,
+                         help="alert when this many nodes flag anomalies in the same tick")
+    collect.set_defaults(handler=run_collect)
+
+    history = commands.add_parser("history", help="averages from the long-term history")
+    history.add_argument("store", help="history directory (--history-dir of the monitor)")
+    history.add_argument("--from", dest="start", help='start, e.g. "2025-07-29" (default: 24 hours ago)')
+    history.add_argument("--to", dest="end", help="end (default: now)")
+    history.add_argument("--resolution", choices=("raw", "1m", "1h", "1d"),
+                         help="also list every record of this resolution in the range")
+    history.set_defaults(handler=run_history)
+
+    find = commands.add_parser("find", help="which stored capture covers a point in time")
+    find.add_argument("store", help="capture store directory")
+    find.add_argument("time", help='e.g. "2025-07-30 14:05" or a Unix timestamp')
+    find.set_defaults(handler=run_find)
+    return parser
+
+
+def setup_logging(args):
+    from .traffic_logger import BufferedLogger, JsonLinesSink, SQLiteSink, TextSink
+
+    path = args.log or (args.default_log and args.default_log + (".jsonl" if args.log_format == "jsonl" else ".txt"))
+    sinks = []
+    if path and not args.no_log:
+        sinks.append(JsonLinesSink(path, args.fsync) if args.log_format == "jsonl" else TextSink(path, args.fsync))
+    if args.sqlite:
+        sinks.append(SQLiteSink(args.sqlite, args.fsync))
+    if not sinks:
+        return None, None
+    return BufferedLogger(sinks, flush_interval=args.log_flush_seconds, max_records=args.log_batch), path
+
+
+def build_detector(args):
+    from .detectors import make_detector
+
+    if args.detector == "none":
+        return make_detector("none")
+    return make_detector(args.detector, forest_path=args.forest, model_path=args.model, scaler_path=args.scaler,
+                         threshold=args.threshold, online_dir=args.online_dir,
+                         retrain_interval=args.retrain_interval, reservoir_size=args.reservoir_size)
+
+
+def run_monitor(args):
+    from . import metrics
+    from .alerts import make_alerts
+    from .analysis import make_analyzer
+    from .capture import choose_interface, make_capture
+    from .capture_store import CaptureStore
+    from .monitor import Monitor
+    from .rolling_stats import StatsEngine, parse_windows
+
+    if args.detector != "none" and args.analysis != "flow":
+        print("The anomaly detector needs --analysis flow.")
+        return 1
+    if args.csv_dir and args.analysis != "flow":
+        print("--csv-dir needs --analysis flow.")
+        return 1
+    if args.adaptive and (args.stream or (args.interfaces and "," in args.interfaces)):
+        print("--adaptive only applies to periodic captures on one interface.")
+        return 1
+    windows = parse_windows(args.windows)
+    if args.led_window not in windows:
+        print(f"--led-window {args.led_window} must be one of --windows ({args.windows}).")
+        return 1
+
+    run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_dir = os.path.join(args.output_dir, run_timestamp) if args.run_subdir else args.output_dir
+    if args.interfaces:
+        interfaces = [iface.strip() for iface in args.interfaces.split(",") if iface.strip()]
+    else:
+        try:
+            interfaces = [choose_interface()]
+        except ValueError:
+            print("Please enter a valid number.")
+            return 1
+        if interfaces == [None]:
+            return 1
+
+    try:
+        detector = build_detector(args)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        return 1
+    os.makedirs(output_dir, exist_ok=True)
+    print(f"Captures will be saved to: {output_dir}")
+
+    capture_options = {"bpf_filter": args.filter, "snaplen": args.snaplen}
+    logger, log_path = setup_logging(args)
+    store = None
+    if args.store_dir:
+        store = CaptureStore(args.store_dir, max_bytes=int(args.store_max_mb * 1024 * 1024),
+                             max_age=args.store_max_age_hours * 3600, compression=args.compress)
+    series = None
+    if args.history_dir:
+        from .timeseries import TimeSeriesStore, parse_retention
+
+        series = TimeSeriesStore(args.history_dir, parse_retention(args.history_retention))
+    reporter = None
+    if args.report_to:
+        from .fleet import FleetReporter, parse_address
+
+        reporter = FleetReporter(parse_address(args.report_to), args.node_name)
+        print(f"Reporting windows to {args.report_to} as {reporter.node}")
+    csv_path = os.path.join(args.csv_dir, f"{run_timestamp}_traffic_data.csv") if args.csv_dir else None
+    if csv_path:
+        os.makedirs(args.csv_dir, exist_ok=True)
+    alerts = make_alerts(args.alerts, args.fake_gpio)
+    fast_path = None
+    if args.fast_alerts:
+        from .fast_alerts import FastAlerter, FastAlertPath, WebhookNotifier
+
+        webhook = WebhookNotifier(args.alert_webhook) if args.alert_webhook else None
+        alerter = FastAlerter(alerts, detector, logger, webhook, args.fast_interval, args.fast_span,
+                              rate_on=args.fast_rate, raise_after=args.fast_raise, clear_after=args.fast_clear,
+                              window_seconds=args.duration)
+        fast_path = FastAlertPath(alerter, interfaces, args.filter)
+    # With several interfaces each worker process opens its own capture; one in the
+    # parent would hold a raw socket and ring nobody reads
+    capture = None
+    if len(interfaces) == 1:
+        capture = make_capture(args.capture, interfaces[0], output_dir, **capture_options)
+    monitor = Monitor(capture, make_analyzer(args.analysis, args.sample_every, stream=True), alerts,
+                      detector, StatsEngine(windows), logger, store, args.led_window, csv_path,
+                      args.metrics_log_seconds, series, reporter, fast_path)
+    metrics_server = None
+    try:
+        if fast_path:
+            fast_path.start()
+            print(f"Fast alerts on {', '.join(interfaces)}: {args.fast_interval:g}s micro-windows, "
+                  f"{args.fast_span:g}s span")
+        if args.metrics_port:
+            metrics_server = metrics.MetricsServer(args.metrics_port).start()
+            print(f"Metrics at http://127.0.0.1:{args.metrics_port}/metrics")
+        if len(interfaces) > 1:
+            monitor.run_multi(interfaces, os.path.join(output_dir, "stream"), args.duration,
+                              args.capture, capture_options)
+        elif args.stream:
+            monitor.run_stream(os.path.join(output_dir, "stream"), args.duration, args.queue_size)
+        elif args.adaptive:
+            from .scheduler import AdaptiveScheduler
+
+            scheduler = AdaptiveScheduler(args.duration, args.min_duration, args.max_duration, args.cpu_budget,
+                                          cheap_analysis=args.analysis)
+            monitor.run_periodic(args.samples, scheduler=scheduler)
+        else:
+            monitor.run_periodic(args.samples, args.duration, args.delay)
+    except KeyboardInterrupt:
+        print("Stopped by user.")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if metrics_server:
+            metrics_server.stop()
+        monitor.close()
+        if log_path:
+            print(f"Results logged to {log_path}")
+    return 0
+
+
+def run_train(args):
+    from .training import train_model
+
+    train_model(args.csv, args.model_dir, args.chunk_rows, args.sample_size)
+
+
+def run_export(args):
+    from .training import export_pickles
+
+    export_pickles(args.model, args.scaler, args.output)
+
+
+def run_build_csv(args):
+    from .analysis_cache import DEFAULT_CACHE_PATH, AnalysisCache
+    from .training import build_training_csv
+
+    cache = None if args.no_cache else AnalysisCache(args.cache or DEFAULT_CACHE_PATH, args.cache_entries)
+    try:
+        build_training_csv(args.pcaps, args.output, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def run_find(args):
+    from .capture_store import CaptureStore, parse_time
+
+    store = CaptureStore(args.store, max_bytes=float("inf"), max_age=float("inf"))
+    found = store.find(parse_time(args.time))
+    print(found if found else "No capture covers that time.")
+
+
+def run_collect(args):
+    import threading
+
+    from .fleet import CollectorServer, FleetCollector, parse_address
+
+    collector = FleetCollector(args.store, args.tick, args.anomaly_nodes)
+    server = CollectorServer(parse_address(args.listen, "0.0.0.0"), collector)
+    stop = threading.Event()
+    ticker = threading.Thread(target=collector.run_ticks, args=(stop,), name="fleet-ticks", daemon=True)
+    ticker.start()
+    print(f"Collecting on {args.listen}, history in {args.store} (Ctrl+C to stop)...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopped by user.")
+    finally:
+        stop.set()
+        server.server_close()
+        collector.close()
+        for node, totals in sorted(collector.totals.items()):
+            print(f"  {node:20} windows {totals['windows']:6} packets {totals['packets']:10} "
+                  f"anomalies {totals['anomalies']}")
+
+
+def run_history(args):
+    import time
+
+    from .capture_store import parse_time
+    from .timeseries import TimeSeriesStore
+
+    end = parse_time(args.end) if args.end else time.time()
+    start = parse_time(args.start) if args.start else end - 86400
+    store = TimeSeriesStore(args.store, readonly=True)
+    if args.resolution:
+        for record in store.query(start, end, args.resolution):
+            print(format_history(record))
+    print(format_history(store.aggregate(start, end), start, end))
+    store.close()
+
+
+def format_history(record, start=None, end=None):
+    if start is None:
+        label = datetime.fromtimestamp(record["ts"]).strftime("%Y-%m-%d %H:%M:%S")
+    else:
+        label = f"{datetime.fromtimestamp(start):%Y-%m-%d %H:%M} to {datetime.fromtimestamp(end):%Y-%m-%d %H:%M}"
+    if not record["count"]:
+        return f"{label} | no samples"
+    packets, tcp = record["packets"], record["tcp_ratio"]
+    return (f"{label} | Samples: {record['count']} | Avg Packets: {packets['mean']:.1f} "
+            f"(min {packets['min']:.0f}, max {packets['max']:.0f}) | Avg TCP%: {tcp['mean']*100:.1f}")
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
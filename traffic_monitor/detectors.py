@@ -0,0 +1,100 @@
+# Detector backends: score each analyzed window. "none" skips detection;
+# "isolation-forest" loads the exported forest (NumPy only) or the sklearn
+# pickles, optionally retraining online. numpy is imported only when a model loads.
+import os
+
+from . import metrics
+
+DETECT_SECONDS = metrics.timer("detector_score_seconds", "Time to score windows with the anomaly model")
+ANOMALIES = metrics.counter("detector_anomalies_total", "Windows flagged as anomalous")
+DETECT_ERRORS = metrics.counter("detector_errors_total", "Windows the model failed to score")
+
+
+class NullDetector:
+    name = "none"
+    feature_names = None
+
+    def score(self, features):
+        return 1, None
+
+    def close(self):
+        pass
+
+
+def resolve_model(forest_path=None, model_path=None, scaler_path=None, online_dir=None):
+    # Newest source first: online-trained forest, exported forest, sklearn pickles
+    from .online_trainer import ONLINE_FOREST_NAME
+
+    online_forest = os.path.join(online_dir, ONLINE_FOREST_NAME) if online_dir else None
+    if online_forest and os.path.exists(online_forest):
+        return online_forest, None, "online-trained forest"
+    if forest_path and os.path.exists(forest_path):
+        return forest_path, None, f"exported forest {os.path.basename(forest_path)}"
+    if model_path and scaler_path and os.path.exists(model_path) and os.path.exists(scaler_path):
+        return model_path, scaler_path, "trained model and scaler"
+    return None, None, None
+
+
+class ForestDetector:
+    name = "isolation-forest"
+
+    def __init__(self, forest_path=None, model_path=None, scaler_path=None, threshold=None,
+                 online_dir=None, retrain_interval=3600, reservoir_size=5000):
+        from .anomaly_scorer import get_scorer
+
+        path, scaler, description = resolve_model(forest_path, model_path, scaler_path, online_dir)
+        if path is None:
+            raise FileNotFoundError("Required .pkl/.npz files not found. Train the model first.")
+        self.scorer = get_scorer(path, scaler, threshold)
+        print(f"✅ Loaded {description} (threshold {self.scorer.threshold:.3f}).")
+        self.trainer = None
+        if online_dir:
+            from .online_trainer import OnlineTrainer
+
+            self.trainer = OnlineTrainer(self.scorer, online_dir, capacity=reservoir_size, interval=retrain_interval)
+            print(f"🔄 Online retraining every {retrain_interval}s on up to {reservoir_size} windows.")
+
+    @property
+    def feature_names(self):
+        return self.scorer.feature_names
+
+    def score_batch(self, feature_rows):
+        # Scores many windows in one call; returns (predictions, scores)
+        try:
+            with DETECT_SECONDS.time():
+                scores = self.scorer.score_batch(feature_rows)
+        except Exception as e:
+            DETECT_ERRORS.inc()
+            print(f"❌ Detection error: {e}")
+            return [1] * len(feature_rows), [None] * len(feature_rows)  # Assume normal if error
+        predictions = [-1 if score < self.scorer.threshold else 1 for score in scores]
+        ANOMALIES.inc(predictions.count(-1))
+        return predictions, list(scores)
+
+    def score(self, features):
+        # features: flow feature dict; returns (prediction, score), -1 = anomaly, 1 = normal
+        from .flow_features import feature_vector
+
+        row = feature_vector(features, self.feature_names)
+        predictions, scores = self.score_batch([row])
+        if self.trainer:
+            self.trainer.observe(row)
+        return predictions[0], scores[0]
+
+    def close(self):
+        if self.trainer:
+            self.trainer.close(wait=False)
+
+
+DETECTORS = {
+    "none": NullDetector,
+    "isolation-forest": ForestDetector,
+}
+
+
+def make_detector(name, **options):
+    try:
+        backend = DETECTORS[name]
+    except KeyError:
+        raise ValueError(f"Unknown detector backend {name!r} (choose from {', '.join(DETECTORS)})")
+    return backend(**options) if backend is not NullDetector else backend()
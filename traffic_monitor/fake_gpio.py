@@ -0,0 +1,62 @@
+# Stand-in for RPi.GPIO so the monitor and LED timing can run on any Linux box.
+# With record=True every output() call is kept with a monotonic timestamp, for
+# tests and benchmarks; off by default since the monitor falls back to this
+# backend on boxes without RPi.GPIO and may run for months.
+import threading
+import time
+
+BCM = 11
+BOARD = 10
+OUT = 0
+IN = 1
+HIGH = 1
+LOW = 0
+
+
+class FakeGPIO:
+    BCM = BCM
+    BOARD = BOARD
+    OUT = OUT
+    IN = IN
+    HIGH = HIGH
+    LOW = LOW
+
+    def __init__(self, verbose=False, record=False):
+        self.verbose = verbose
+        self.record = record
+        self.mode = None
+        self.pins = {}
+        self.transitions = []
+        self._lock = threading.Lock()
+
+    def setmode(self, mode):
+        self.mode = mode
+
+    def setwarnings(self, flag):
+        pass
+
+    def setup(self, pin, direction, initial=LOW):
+        self.pins[pin] = initial
+
+    def output(self, pin, value):
+        now = time.monotonic()
+        with self._lock:
+            if pin not in self.pins:
+                raise RuntimeError(f"GPIO {pin} has not been set up as an output")
+            value = HIGH if value else LOW
+            self.pins[pin] = value
+            if self.record:
+                self.transitions.append((now, pin, value))
+        if self.verbose:
+            print(f"[fake GPIO] pin {pin} -> {'HIGH' if value else 'LOW'}")
+
+    def input(self, pin):
+        return self.pins.get(pin, LOW)
+
+    def cleanup(self):
+        with self._lock:
+            self.pins.clear()
+
+    def transitions_for(self, pin):
+        with self._lock:
+            return [(ts, value) for ts, p, value in self.transitions if p == pin]
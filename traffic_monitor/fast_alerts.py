@@ -0,0 +1,237 @@
+# Fast alert path. Alongside the window loop, a header-only tshark streams
+# packets through a pipe; they are tallied into sub-second micro-windows and the
+# latest second of them is checked against the red-LED thresholds (and scored by
+# the detector), so a flood lights the red LED within about a second instead of
+# after the capture window and the rolling average catch up. Hysteresis keeps the
+# LED from flapping: an alert is raised after `raise_after` hot micro-windows in
+# a row and cleared only after `clear_after` calm ones below the lower thresholds.
+import json
+import queue
+import subprocess
+import threading
+import time
+from collections import deque
+
+from . import metrics
+from .alerts import TCP_ALERT_RATIO
+from .capture import HEADER_SNAPLEN, capture_options
+from .flow_features import COUNT_FEATURES
+from .pcap_reader import PROTO_TCP, decode, iter_packets
+
+FAST_ALERTS = metrics.counter("fast_alerts_total", "Alerts raised by the fast path")
+FAST_ACTIVE = metrics.gauge("fast_alert_active", "1 while the fast path holds an alert")
+FAST_PACKETS = metrics.counter("fast_path_packets_total", "Packets seen by the fast path")
+
+
+class WebhookNotifier:
+    # POSTs alert events as JSON from a background thread; a slow or dead
+    # endpoint never holds up the fast path, events beyond the queue are dropped
+    def __init__(self, url, timeout=2.0, max_queue=100):
+        self.url = url
+        self.timeout = timeout
+        self.queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="alert-webhook", daemon=True)
+        self._thread.start()
+
+    def send(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            pass
+
+    def _run(self):
+        import urllib.request
+
+        while True:
+            event = self.queue.get()
+            if event is None:
+                return
+            request = urllib.request.Request(self.url, json.dumps(event).encode(),
+                                             {"Content-Type": "application/json"})
+            try:
+                urllib.request.urlopen(request, timeout=self.timeout).close()
+            except OSError as e:
+                print(f"Alert webhook {self.url} failed: {e}")
+
+    def close(self):
+        self.queue.put(None)
+        self._thread.join(self.timeout + 1)
+
+
+class FastAlerter:
+    def __init__(self, alerts, detector=None, logger=None, webhook=None, interval=0.25, span=1.0,
+                 tcp_on=TCP_ALERT_RATIO, tcp_off=None, rate_on=0.0, rate_off=None, min_packets=20,
+                 raise_after=2, clear_after=8, window_seconds=10):
+        self.alerts = alerts
+        self.detector = detector if hasattr(detector, "score_batch") else None
+        self.logger = logger
+        self.webhook = webhook
+        self.interval = interval
+        self.tcp_on = tcp_on
+        self.tcp_off = tcp_on - 0.1 if tcp_off is None else tcp_off
+        self.rate_on = rate_on  # packets/s, 0 = off
+        self.rate_off = rate_on * 0.7 if rate_off is None else rate_off
+        self.min_packets = min_packets
+        self.raise_after = raise_after
+        self.clear_after = clear_after
+        self.slots = deque(maxlen=max(1, round(span / interval)))
+        self.window_end = None
+        self.packets = self.tcp = 0
+        self.hot = self.cool = 0
+        self.active = None  # reason while an alert is raised
+        self.last_raise = None  # (micro-window end, monotonic time) of the latest raise
+        self.anomaly = False
+        self.score = None
+        self.scale = window_seconds / (self.slots.maxlen * interval)
+        self.extractor = None
+        if self.detector:
+            from .flow_features import WindowFeatureExtractor
+
+            self.extractor = WindowFeatureExtractor()
+        self._unscored = 0
+        self._lock = threading.Lock()
+
+    def add(self, ts, length, info):
+        # One packet: `info` is pcap_reader.decode() output, or None for non-IP frames
+        with self._lock:
+            if self.window_end is None:
+                self.window_end = (ts // self.interval + 1) * self.interval
+            elif ts >= self.window_end:
+                self._close(ts)
+            self.packets += 1
+            if info is not None and info[0] == PROTO_TCP:
+                self.tcp += 1
+            if self.extractor:
+                self.extractor.add(ts, length, info)
+
+    def tick(self, now):
+        # Closes micro-windows while no packets arrive, so quiet traffic clears alerts
+        with self._lock:
+            if self.window_end is not None and now >= self.window_end:
+                self._close(now)
+
+    def _close(self, now):
+        missed = int((now - self.window_end) // self.interval)
+        limit = self.slots.maxlen + self.clear_after
+        if missed > limit:
+            # Long silence: only the last few empty micro-windows can change anything
+            self.window_end += (missed - limit) * self.interval
+        while self.window_end <= now:
+            self.slots.append((self.packets, self.tcp))
+            FAST_PACKETS.inc(self.packets)
+            self.packets = self.tcp = 0
+            self._unscored += 1
+            if self.extractor and self._unscored >= self.slots.maxlen:
+                self._score()
+            self._evaluate()
+            self.window_end += self.interval
+
+    def _score(self):
+        # The detector sees each span as a window of its own
+        self._unscored = 0
+        if not self.extractor.packets:
+            self.anomaly, self.score = False, None
+            self.extractor.finish()
+            return
+        from .flow_features import feature_vector
+
+        features = self.extractor.finish(self.slots.maxlen * self.interval)
+        # Only additive counts follow the span length; distinct and active-flow
+        # counts of a one-second span are scored as measured
+        for name in COUNT_FEATURES:
+            features[name] *= self.scale
+        predictions, scores = self.detector.score_batch([feature_vector(features, self.detector.feature_names)])
+        self.anomaly, self.score = predictions[0] == -1, scores[0]
+
+    def _evaluate(self):
+        packets = sum(slot[0] for slot in self.slots)
+        tcp = sum(slot[1] for slot in self.slots)
+        rate = packets / (len(self.slots) * self.interval)
+        ratio = tcp / packets if packets else 0.0
+        reasons = []
+        if packets >= self.min_packets and ratio > self.tcp_on:
+            reasons.append(f"TCP {ratio*100:.0f}% > {self.tcp_on*100:.0f}%")
+        if self.rate_on and rate > self.rate_on:
+            reasons.append(f"{rate:.0f} packets/s > {self.rate_on:g}")
+        if self.anomaly:
+            reasons.append(f"anomaly score {self.score:.3f}")
+        calm = (not self.anomaly and (packets < self.min_packets or ratio < self.tcp_off)
+                and (not self.rate_on or rate < self.rate_off))
+        if reasons:
+            self.hot, self.cool = self.hot + 1, 0
+        elif calm:
+            self.hot, self.cool = 0, self.cool + 1
+        else:
+            # Between the raise and clear thresholds: keep the current state
+            self.hot = self.cool = 0
+        if not self.active and self.hot >= self.raise_after:
+            self._notify("; ".join(reasons), rate, ratio)
+        elif self.active and self.cool >= self.clear_after:
+            self._notify(None, rate, ratio)
+
+    def _notify(self, reason, rate, ratio):
+        self.active = reason
+        if reason:
+            self.last_raise = (self.window_end, time.monotonic())
+            FAST_ALERTS.inc()
+        FAST_ACTIVE.set(1 if reason else 0)
+        self.alerts.fast_alert(reason)
+        event = {"kind": "alert", "state": "raised" if reason else "cleared", "reason": reason,
+                 "packets_per_sec": rate, "tcp_ratio": ratio, "ts": self.window_end}
+        if self.logger:
+            self.logger.log(dict(event))
+        if self.webhook:
+            self.webhook.send(event)
+
+
+class FastAlertPath:
+    # Second tshark capture (headers only) piped into a FastAlerter
+    def __init__(self, alerter, interfaces, bpf_filter=None):
+        self.alerter = alerter
+        self.interfaces = interfaces
+        self.capture_args = capture_options(bpf_filter, HEADER_SNAPLEN)
+        self.process = None
+        self._stop = threading.Event()
+        self._threads = []
+
+    def capture_command(self):
+        # -l flushes every packet into the pipe; pcapng carries several interfaces
+        interfaces = [arg for iface in self.interfaces for arg in ("-i", iface)]
+        return ["tshark", "-q", "-l", *interfaces, *self.capture_args, "-w", "-"]
+
+    def start(self):
+        self.process = subprocess.Popen(self.capture_command(), stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, bufsize=0)
+        self._threads = [
+            threading.Thread(target=self._read, name="fast-path-reader", daemon=True),
+            threading.Thread(target=self._tick, name="fast-path-ticker", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def _read(self):
+        add = self.alerter.add
+        try:
+            for ts, linktype, data, orig_len in iter_packets(self.process.stdout):
+                add(ts, orig_len, decode(data, linktype))
+        except (OSError, ValueError) as e:
+            if not self._stop.is_set():
+                print(f"Fast alert path stopped: {e}")
+
+    def _tick(self):
+        while not self._stop.wait(self.alerter.interval):
+            self.alerter.tick(time.time())
+
+    def stop(self):
+        self._stop.set()
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        for thread in self._threads:
+            thread.join(5)
+        if self.alerter.webhook:
+            self.alerter.webhook.close()
@@ -0,0 +1,359 @@
+# Fleet reporting: every monitor pushes its per-window summaries to one
+# collector over TCP, and the collector merges them into per-node and
+# fleet-wide history and flags fleet-level anomalies.
+#
+# Wire format (little-endian), one frame per batch:
+#   header  "TMFL" | version u8 | flags u8 (1 = zlib) | records u16 | payload bytes u32
+#   payload node name (u8 length + UTF-8), then per record:
+#           ts f64 | duration f32 | packets u32 | bytes u64 | tcp, udp, other f32 |
+#           prediction i8 (-1 anomaly, 1 normal, 0 no detector) | score f32 (NaN = none) |
+#           talkers u8, then per talker: address length u8 (4/16) | address | packets u32
+# A window with five IPv4 talkers is 84 bytes before compression.
+import math
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+
+from . import metrics
+
+MAGIC = b"TMFL"
+VERSION = 1
+FLAG_ZLIB = 1
+HEADER = struct.Struct("<4sBBHI")
+RECORD = struct.Struct("<dfIQfffbfB")
+TALKER = struct.Struct("<I")
+COMPRESS_ABOVE = 256  # payload bytes; smaller frames aren't worth the CPU
+MAX_PAYLOAD = 16 * 1024 * 1024
+DEFAULT_PORT = 9700
+
+SENT = metrics.counter("fleet_records_sent_total", "Window summaries delivered to the collector")
+DROPPED = metrics.counter("fleet_records_dropped_total", "Window summaries dropped while the collector was unreachable")
+SENT_BYTES = metrics.counter("fleet_bytes_sent_total", "Bytes sent to the collector, after compression")
+
+
+def parse_address(text, default_host="127.0.0.1"):
+    host, _, port = text.rpartition(":")
+    return host or default_host, int(port) if port else DEFAULT_PORT
+
+
+def window_summary(features, start, end, prediction=0, score=None):
+    # The fields a node reports for one analyzed window
+    duration = end - start
+    return {
+        "ts": end,
+        "duration": duration,
+        "packets": features["total_packets"],
+        "bytes": features.get("bytes", round(features.get("bytes_per_sec", 0) * duration)),
+        "tcp_ratio": features["tcp_ratio"],
+        "udp_ratio": features["udp_ratio"],
+        "other_ratio": features["other_ratio"],
+        "prediction": prediction,
+        "score": score,
+        "top_talkers": features.get("top_talkers", []),
+    }
+
+
+def encode_frame(node, records, compress=True):
+    name = node.encode()[:255]
+    parts = [bytes([len(name)]), name]
+    for r in records:
+        score = math.nan if r["score"] is None else r["score"]
+        talkers = []
+        for ip, packets in r["top_talkers"][:255]:
+            try:
+                address = socket.inet_pton(socket.AF_INET6 if ":" in ip else socket.AF_INET, ip)
+            except OSError:
+                continue
+            talkers.append(bytes([len(address)]) + address + TALKER.pack(min(packets, 0xFFFFFFFF)))
+        parts.append(RECORD.pack(r["ts"], r["duration"], min(r["packets"], 0xFFFFFFFF), r["bytes"],
+                                 r["tcp_ratio"], r["udp_ratio"], r["other_ratio"], r["prediction"],
+                                 score, len(talkers)))
+        parts.extend(talkers)
+    payload = b"".join(parts)
+    flags = 0
+    if compress and len(payload) > COMPRESS_ABOVE:
+        payload, flags = zlib.compress(payload, 1), FLAG_ZLIB
+    return HEADER.pack(MAGIC, VERSION, flags, len(records), len(payload)) + payload
+
+
+def decode_payload(payload, count):
+    # -> (node, records)
+    name_length = payload[0]
+    node = payload[1:1 + name_length].decode(errors="replace")
+    offset = 1 + name_length
+    records = []
+    for _ in range(count):
+        ts, duration, packets, nbytes, tcp, udp, other, prediction, score, talker_count = \
+            RECORD.unpack_from(payload, offset)
+        offset += RECORD.size
+        talkers = []
+        for _ in range(talker_count):
+            length = payload[offset]
+            address = payload[offset + 1:offset + 1 + length]
+            (talker_packets,) = TALKER.unpack_from(payload, offset + 1 + length)
+            offset += 1 + length + TALKER.size
+            family = socket.AF_INET6 if length == 16 else socket.AF_INET
+            talkers.append((socket.inet_ntop(family, address), talker_packets))
+        records.append({
+            "ts": ts, "duration": duration, "packets": packets, "bytes": nbytes,
+            "tcp_ratio": tcp, "udp_ratio": udp, "other_ratio": other, "prediction": prediction,
+            "score": None if math.isnan(score) else score, "top_talkers": talkers,
+        })
+    return node, records
+
+
+def read_frame(stream):
+    # Next (node, records) from a file-like socket stream, or None at EOF
+    header = stream.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    magic, version, flags, count, length = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or length > MAX_PAYLOAD:
+        raise ValueError(f"Not a fleet frame (magic {magic!r}, version {version})")
+    payload = stream.read(length)
+    if len(payload) < length:
+        return None
+    if flags & FLAG_ZLIB:
+        # Bounded: a small frame must not inflate into an unbounded buffer
+        inflater = zlib.decompressobj()
+        payload = inflater.decompress(payload, MAX_PAYLOAD)
+        if inflater.unconsumed_tail:
+            raise ValueError(f"Fleet frame inflates past {MAX_PAYLOAD} bytes")
+        if not inflater.eof:
+            raise ValueError("Truncated compressed fleet frame")
+    return decode_payload(payload, count)
+
+
+class FleetReporter:
+    # Node side: send() only queues; a background thread batches, compresses
+    # and delivers, reconnecting with backoff. While the collector is
+    # unreachable the newest max_queue summaries are kept.
+    def __init__(self, address, node=None, flush_interval=1.0, max_batch=200, max_queue=10000, compress=True):
+        self.address = address
+        self.node = node or socket.gethostname()
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.compress = compress
+        self._queue = deque()
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._sock = None
+        self._retry_at = 0.0
+        self._backoff = 1.0
+        self._thread = threading.Thread(target=self._run, name="fleet-reporter", daemon=True)
+        self._thread.start()
+
+    def send(self, summary):
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                self._queue.popleft()
+                DROPPED.inc()
+            self._queue.append(summary)
+            full = len(self._queue) >= self.max_batch
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        # Deliver everything queued; returns False if the collector is unreachable
+        while True:
+            with self._lock:
+                batch = [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+            if not batch:
+                return True
+            if not self._deliver(batch):
+                with self._lock:
+                    self._queue.extendleft(reversed(batch))
+                    while len(self._queue) > self.max_queue:
+                        self._queue.popleft()
+                        DROPPED.inc()
+                return False
+
+    def _deliver(self, batch):
+        if self._sock is None:
+            if time.monotonic() < self._retry_at:
+                return False
+            try:
+                self._sock = socket.create_connection(self.address, timeout=5)
+                self._backoff = 1.0
+            except OSError as e:
+                print(f"Fleet collector {self.address[0]}:{self.address[1]} unreachable: {e}")
+                self._retry_at = time.monotonic() + self._backoff
+                self._backoff = min(self._backoff * 2, 60.0)
+                return False
+        frame = encode_frame(self.node, batch, self.compress)
+        try:
+            self._sock.sendall(frame)
+        except OSError as e:
+            print(f"Lost connection to fleet collector: {e}")
+            self._sock.close()
+            self._sock = None
+            return False
+        SENT.inc(len(batch))
+        SENT_BYTES.inc(len(frame))
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._retry_at = 0.0
+        self.flush()
+        if self._sock:
+            self._sock.close()
+
+
+def robust_outliers(rates, threshold=3.5):
+    # Nodes whose packet rate is far from the fleet median (modified z-score on the MAD)
+    if len(rates) < 3:
+        return []
+    values = sorted(rates.values())
+    median = values[len(values) // 2]
+    deviations = sorted(abs(v - median) for v in values)
+    mad = deviations[len(deviations) // 2]
+    if mad == 0:
+        return []
+    return [node for node, rate in rates.items() if 0.6745 * abs(rate - median) / mad > threshold]
+
+
+class FleetCollector:
+    # Merges node streams: per-node history under <root>/nodes/<node>, a fleet
+    # history under <root>/fleet with one sample per tick, and fleet-level
+    # anomaly checks every tick
+    def __init__(self, root, tick=10.0, anomaly_nodes=2, surge_sigma=4.0, verbose=True):
+        from .rolling_stats import StatsEngine
+        from .timeseries import TimeSeriesStore
+
+        self.root = root
+        self.tick = tick
+        self.anomaly_nodes = anomaly_nodes
+        self.surge_sigma = surge_sigma
+        self.verbose = verbose
+        self.fleet = TimeSeriesStore(os.path.join(root, "fleet"))
+        self.nodes = {}
+        self.last_ts = {}
+        self.totals = {}
+        self.stats = StatsEngine({"1h": 3600})
+        self.records = 0
+        self.node_rates = {}  # node -> (packets/s, window seconds, tick it was last seen)
+        self._tick_windows = []
+        self._lock = threading.Lock()
+        self._store_class = TimeSeriesStore
+
+    def ingest(self, node, records):
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in node) or "node"
+        with self._lock:
+            store = self.nodes.get(safe)
+            if store is None:
+                store = self.nodes[safe] = self._store_class(os.path.join(self.root, "nodes", safe))
+            for record in records:
+                # History files need time order; a node's clock stepping back is clamped
+                ts = max(record["ts"], self.last_ts.get(safe, 0.0))
+                self.last_ts[safe] = ts
+                store.add(ts, {"packets": record["packets"], "tcp_ratio": record["tcp_ratio"]})
+                self._tick_windows.append((safe, record))
+                totals = self.totals.setdefault(safe, {"windows": 0, "packets": 0, "anomalies": 0})
+                totals["windows"] += 1
+                totals["packets"] += record["packets"]
+                totals["anomalies"] += record["prediction"] == -1
+            self.records += len(records)
+
+    def close_tick(self, now=None):
+        # Fold the windows received since the last tick into one fleet sample;
+        # returns (fleet summary, list of alert strings)
+        now = time.time() if now is None else now
+        with self._lock:
+            windows, self._tick_windows = self._tick_windows, []
+        if not windows:
+            return None, []
+        packets = sum(r["packets"] for _, r in windows)
+        tcp = sum(r["tcp_ratio"] * r["packets"] for _, r in windows) / packets if packets else 0.0
+        # A node's rate is its packets over its window time in this tick, so two
+        # windows landing in one tick don't double it; a node whose window just
+        # missed the tick keeps its last rate until it has been silent for two windows
+        spans = {}
+        for node, r in windows:
+            node_packets, node_seconds = spans.get(node, (0, 0.0))
+            spans[node] = (node_packets + r["packets"], node_seconds + r["duration"])
+        for node, (node_packets, node_seconds) in spans.items():
+            self.node_rates[node] = (node_packets / max(node_seconds, 1e-6), node_seconds, now)
+        for node, (rate, seconds, seen) in list(self.node_rates.items()):
+            if now - seen > 2 * max(seconds, self.tick):
+                del self.node_rates[node]
+        rates = {node: rate for node, (rate, _, _) in self.node_rates.items()}
+        talkers = {}
+        for _, r in windows:
+            for ip, n in r["top_talkers"]:
+                talkers[ip] = talkers.get(ip, 0) + n
+        anomalous = sorted({node for node, r in windows if r["prediction"] == -1})
+        fleet_rate = sum(rates.values())
+        summary = {"ts": now, "nodes": len(rates), "windows": len(windows), "packets": packets,
+                   "packets_per_sec": fleet_rate, "tcp_ratio": tcp,
+                   "top_ip": max(talkers.items(), key=lambda item: item[1])[0] if talkers else "Unknown",
+                   "anomalous_nodes": anomalous}
+
+        alerts = []
+        if len(anomalous) >= self.anomaly_nodes:
+            alerts.append(f"{len(anomalous)} nodes flagged anomalies in the same tick: {', '.join(anomalous)}")
+        outliers = robust_outliers(rates)
+        if outliers:
+            alerts.append(f"Traffic far from the fleet median on: {', '.join(sorted(outliers))}")
+        baseline = self.stats.snapshot("packets_per_sec", "1h", now)
+        if baseline and baseline["count"] >= 10:
+            sd = math.sqrt(baseline["variance"])
+            if sd > 0 and fleet_rate > baseline["mean"] + self.surge_sigma * sd:
+                alerts.append(f"Fleet-wide surge: {fleet_rate:.0f} packets/s vs {baseline['mean']:.0f} "
+                              f"± {sd:.0f} over the last hour")
+        self.stats.update({"packets_per_sec": fleet_rate}, now)
+        self.fleet.add(now, {"packets": fleet_rate * self.tick, "tcp_ratio": tcp})
+        return summary, alerts
+
+    def run_ticks(self, stop):
+        while not stop.wait(self.tick):
+            summary, alerts = self.close_tick()
+            if summary and self.verbose:
+                print(f"Fleet: {summary['nodes']} nodes, {summary['windows']} windows, "
+                      f"{summary['packets_per_sec']:.0f} packets/s, TCP {summary['tcp_ratio']*100:.1f}%, "
+                      f"top IP {summary['top_ip']}")
+            for alert in alerts:
+                print(f"⚠️  {alert}")
+
+    def close(self):
+        with self._lock:
+            for store in self.nodes.values():
+                store.close()
+            self.fleet.close()
+
+
+class _FrameHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        peer = f"{self.client_address[0]}:{self.client_address[1]}"
+        try:
+            while True:
+                frame = read_frame(self.rfile)
+                if frame is None:
+                    return
+                self.server.collector.ingest(*frame)
+        except (ValueError, IndexError, zlib.error, struct.error, OSError) as e:
+            print(f"Dropping connection from {peer}: {e}")
+
+
+class CollectorServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, collector):
+        super().__init__(address, _FrameHandler)
+        self.collector = collector
@@ -0,0 +1,259 @@
+# Per-window feature extraction built on a bounded flow table.
+# Memory is capped regardless of traffic shape: the flow table evicts idle and
+# least-recently-seen flows, talkers are tracked with Space-Saving, distinct
+# address counts use HyperLogLog and port counts live in one fixed array.
+import math
+from array import array
+from hashlib import blake2b
+from collections import OrderedDict
+
+from .pcap_reader import PROTO_TCP, PROTO_UDP, decode, format_ip, iter_packets
+
+BASE_FEATURES = ["total_packets", "tcp_ratio", "udp_ratio", "other_ratio"]
+FEATURE_NAMES = BASE_FEATURES + [
+    "packets_per_sec", "bytes_per_sec", "mean_packet_size", "distinct_src", "distinct_dst",
+    "active_flows", "new_flows", "syn_ratio", "dst_port_entropy", "top_talker_share",
+]
+# Additive counts, which grow linearly with the window length; scaled to a reference
+# window before scoring windows of another length. Cardinalities (distinct_src/dst,
+# active_flows of the carried table) do not grow linearly and are left as measured.
+COUNT_FEATURES = ("total_packets", "new_flows")
+FEATURE_VERSION = 2  # Bump when extraction changes; cached results of older versions are ignored
+
+TCP_SYN = 0x02
+TCP_ACK = 0x10
+
+
+class FlowRecord:
+    __slots__ = ("first_seen", "last_seen", "packets", "bytes")
+
+    def __init__(self, ts):
+        self.first_seen = ts
+        self.last_seen = ts
+        self.packets = 0
+        self.bytes = 0
+
+
+class FlowTable:
+    # 5-tuple -> FlowRecord, ordered by last activity so eviction pops from the front
+    def __init__(self, max_flows=50000, idle_timeout=60.0):
+        self.max_flows = max_flows
+        self.idle_timeout = idle_timeout
+        self.flows = OrderedDict()
+        self.evicted_idle = 0
+        self.evicted_overflow = 0
+
+    def update(self, key, ts, length):
+        # Returns True when the packet starts a new flow
+        flows = self.flows
+        record = flows.get(key)
+        created = record is None
+        if created:
+            record = flows[key] = FlowRecord(ts)
+            if len(flows) > self.max_flows:
+                flows.popitem(last=False)
+                self.evicted_overflow += 1
+        else:
+            flows.move_to_end(key)
+        record.last_seen = ts
+        record.packets += 1
+        record.bytes += length
+        return created
+
+    def expire(self, now):
+        flows = self.flows
+        cutoff = now - self.idle_timeout
+        while flows:
+            key, record = next(iter(flows.items()))
+            if record.last_seen >= cutoff:
+                break
+            flows.popitem(last=False)
+            self.evicted_idle += 1
+
+    def __len__(self):
+        return len(self.flows)
+
+
+class SpaceSaving:
+    # Top-k heavy hitters in k counters; counts overestimate by at most the evicted minimum
+    def __init__(self, k=16):
+        self.k = k
+        self.counts = {}
+
+    def add(self, key, weight=1):
+        counts = self.counts
+        if key in counts:
+            counts[key] += weight
+        elif len(counts) < self.k:
+            counts[key] = weight
+        else:
+            victim = min(counts, key=counts.get)
+            counts[key] = counts.pop(victim) + weight
+
+    def top(self, n=None):
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:n]
+
+    def clear(self):
+        self.counts = {}
+
+
+class HyperLogLog:
+    def __init__(self, precision=10):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+        self.alpha = 0.7213 / (1 + 1.079 / self.m)
+
+    def add(self, item):
+        # Fixed 64-bit hash: hash() is 32 bits on 32-bit builds (Raspberry Pi OS)
+        # and salted per process, which would make the estimates wrong and unreproducible
+        h = int.from_bytes(blake2b(item, digest_size=8).digest(), "little")
+        index = h & (self.m - 1)
+        rank = 64 - self.precision - (h >> self.precision).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self):
+        registers = self.registers
+        estimate = self.alpha * self.m * self.m / sum(2.0 ** -r for r in registers)
+        zeros = registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            return self.m * math.log(self.m / zeros)
+        return estimate
+
+    def clear(self):
+        self.registers = bytearray(self.m)
+
+
+class WindowFeatureExtractor:
+    def __init__(self, max_flows=50000, idle_timeout=60.0, top_k=16):
+        self.flow_table = FlowTable(max_flows, idle_timeout)
+        self.talkers = SpaceSaving(top_k)
+        self.src_hll = HyperLogLog()
+        self.dst_hll = HyperLogLog()
+        self.port_counts = array("I", bytes(4 * 65536))
+        self.touched_ports = []
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.packets = self.bytes = 0
+        self.skipped = self.skipped_bytes = 0
+        self.tcp = self.udp = 0
+        self.syn = 0
+        self.new_flows = 0
+        self.first_ts = self.last_ts = None
+
+    def add(self, ts, length, info):
+        # `info` is pcap_reader.decode() output, or None for non-IP frames
+        self.packets += 1
+        self.bytes += length
+        if self.first_ts is None:
+            self.first_ts = ts
+        self.last_ts = ts
+        if info is None:
+            return
+        proto, src, dst, sport, dport, flags = info
+        if proto == PROTO_TCP:
+            self.tcp += 1
+            if flags & TCP_SYN and not flags & TCP_ACK:
+                self.syn += 1
+        elif proto == PROTO_UDP:
+            self.udp += 1
+        if dport:
+            if not self.port_counts[dport]:
+                self.touched_ports.append(dport)
+            self.port_counts[dport] += 1
+        self.src_hll.add(src)
+        self.dst_hll.add(dst)
+        self.talkers.add(src, length)
+        if self.flow_table.update((proto, src, dst, sport, dport), ts, length):
+            self.new_flows += 1
+
+    def skip(self, ts, length):
+        # A packet left out by 1-in-N sampling: counted in the totals, not decoded
+        self.packets += 1
+        self.bytes += length
+        self.skipped += 1
+        self.skipped_bytes += length
+        if self.first_ts is None:
+            self.first_ts = ts
+        self.last_ts = ts
+
+    def _port_entropy(self):
+        counts = self.port_counts
+        total = sum(counts[port] for port in self.touched_ports)
+        entropy = 0.0
+        for port in self.touched_ports:
+            p = counts[port] / total
+            entropy -= p * math.log2(p)
+            counts[port] = 0
+        self.touched_ports = []
+        return entropy
+
+    def finish(self, duration=None):
+        # Closes the window: returns its feature dict and resets per-window state.
+        # The flow table carries over, so an extractor reused for consecutive
+        # windows does not count long-lived flows as new again.
+        # When packets were skipped, ratios come from the decoded sample and new
+        # flows / talker bytes are scaled up; distinct and active-flow counts are
+        # what the sample saw (they cannot be extrapolated linearly).
+        if duration is None:
+            duration = (self.last_ts - self.first_ts) if self.packets > 1 else 0.0
+        duration = max(duration, 1e-6)
+        if self.last_ts is not None:
+            self.flow_table.expire(self.last_ts)
+        total = self.packets
+        sampled = total - self.skipped
+        sampled_bytes = self.bytes - self.skipped_bytes
+        scale = total / sampled if sampled else 1.0
+        talkers = self.talkers.top()
+        features = {
+            "total_packets": total,
+            "tcp_ratio": self.tcp / sampled if sampled else 0.0,
+            "udp_ratio": self.udp / sampled if sampled else 0.0,
+            "other_ratio": (sampled - self.tcp - self.udp) / sampled if sampled else 0.0,
+            "packets_per_sec": total / duration,
+            "bytes_per_sec": self.bytes / duration,
+            "mean_packet_size": self.bytes / total if total else 0.0,
+            "distinct_src": round(self.src_hll.count()) if total else 0,
+            "distinct_dst": round(self.dst_hll.count()) if total else 0,
+            "active_flows": len(self.flow_table),
+            "new_flows": round(self.new_flows * scale),
+            "syn_ratio": self.syn / self.tcp if self.tcp else 0.0,
+            "dst_port_entropy": self._port_entropy(),
+            "top_talker_share": talkers[0][1] / sampled_bytes if talkers and sampled_bytes else 0.0,
+            "top_ip": format_ip(talkers[0][0]) if talkers else "Unknown",
+            "top_talkers": [(format_ip(ip), round(n * scale)) for ip, n in talkers[:5]],
+            "sampled_packets": sampled,
+        }
+        self.talkers.clear()
+        self.src_hll.clear()
+        self.dst_hll.clear()
+        self._reset_counters()
+        return features
+
+
+def extract_pcap_features(source, extractor=None, duration=None, sample_every=1):
+    return extract_features(iter_packets(source), extractor, duration, sample_every)
+
+
+def extract_features(packets, extractor=None, duration=None, sample_every=1):
+    # `packets` yields (ts, linktype, frame, length), from a file or a live capture.
+    # sample_every=N decodes 1 in N packets; the rest only count towards the totals
+    extractor = extractor or WindowFeatureExtractor()
+    n = 0
+    try:
+        for ts, linktype, data, orig_len in packets:
+            if sample_every > 1 and n % sample_every:
+                extractor.skip(ts, orig_len)
+            else:
+                extractor.add(ts, orig_len, decode(data, linktype))
+            n += 1
+    except (OSError, ValueError):
+        extractor.finish()  # Drop the partial window so a reused extractor starts clean
+        raise
+    return extractor.finish(duration)
+
+
+def feature_vector(features, names=None):
+    return [float(features[name]) for name in (names or FEATURE_NAMES)]
@@ -0,0 +1,75 @@
+# sklearn-free IsolationForest inference. train_model.export_forest flattens a
+# fitted forest + StandardScaler into padded NumPy arrays (.npz); this module
+# scores with a vectorized level-by-level walk of all trees at once.
+import numpy as np
+
+EULER_GAMMA = 0.5772156649015329
+
+
+def average_path_length(n):
+    # Expected path length of an unsuccessful BST search, as in sklearn's IsolationForest
+    n = np.asarray(n, dtype=np.float64)
+    result = np.zeros_like(n)
+    result[n == 2] = 1.0
+    large = n > 2
+    result[large] = 2.0 * (np.log(n[large] - 1.0) + EULER_GAMMA) - 2.0 * (n[large] - 1.0) / n[large]
+    return result
+
+
+class NumpyScaler:
+    def __init__(self, mean, scale, feature_names=None):
+        self.mean_ = mean
+        self.scale_ = scale
+        if feature_names is not None:
+            self.feature_names_in_ = feature_names
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class NumpyForest:
+    def __init__(self, feature, threshold, left, right, leaf_depth, max_depth, denominator, offset):
+        n_trees, max_nodes = feature.shape
+        # Flatten the padded (tree, node) tables and make child links global indices,
+        # so each traversal step is a handful of 1-D takes
+        base = (np.arange(n_trees) * max_nodes)[:, None]
+        self.feature = feature.ravel()
+        self.threshold = threshold.ravel()
+        self.left = (left + base).ravel()
+        self.right = (right + base).ravel()
+        self.leaf_depth = leaf_depth.ravel()
+        self.roots = base.astype(np.intp)
+        self.max_depth = int(max_depth)
+        self.denominator = float(denominator)
+        self.offset_ = float(offset)
+
+    def score_samples(self, X):
+        # sklearn's trees compare float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        n_samples, n_features = X.shape
+        flat_X = X.ravel()
+        row_base = np.arange(n_samples) * n_features
+        node = np.repeat(self.roots, n_samples, axis=1)
+        # Leaves point at themselves, so a fixed number of steps lands every sample on its leaf
+        for _ in range(self.max_depth):
+            values = flat_X.take(row_base + self.feature.take(node))
+            node = np.where(values <= self.threshold.take(node), self.left.take(node), self.right.take(node))
+        depths = self.leaf_depth.take(node).sum(axis=0)
+        return -(2.0 ** (-depths / self.denominator))
+
+    def decision_function(self, X):
+        return self.score_samples(X) - self.offset_
+
+    def predict(self, X):
+        return np.where(self.decision_function(X) < 0, -1, 1)
+
+
+def load_forest(path):
+    # Returns (forest, scaler) objects with the sklearn methods the detector uses
+    with np.load(path) as data:
+        arrays = {name: data[name] for name in data.files}
+    forest = NumpyForest(arrays["feature"], arrays["threshold"], arrays["left"], arrays["right"],
+                         arrays["leaf_depth"], arrays["max_depth"], arrays["denominator"], arrays["offset"])
+    names = arrays.get("feature_names")
+    return forest, NumpyScaler(arrays["scaler_mean"], arrays["scaler_scale"],
+                               None if names is None else [str(name) for name in names])
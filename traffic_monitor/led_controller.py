@@ -0,0 +1,107 @@
+# LED driver thread. Callers post a target state and return immediately; the
+# driver thread owns the GPIO pins and keeps blink timing on a fixed schedule.
+import threading
+import time
+
+# Green LED patterns as (on, off) step lists; durations are multiples of the blink interval
+PATTERNS = {
+    "blink": ((1, 1.0), (0, 1.0)),
+    "heartbeat": ((1, 0.25), (0, 0.25), (1, 0.25), (0, 1.25)),
+    "solid": ((1, None),),
+    "off": ((0, None),),
+}
+
+
+class LedState:
+    __slots__ = ("blink_interval", "red_on", "pattern")
+
+    def __init__(self, blink_interval=1.0, red_on=False, pattern="blink"):
+        if pattern not in PATTERNS:
+            raise ValueError(f"Unknown LED pattern '{pattern}', expected one of {sorted(PATTERNS)}")
+        self.blink_interval = blink_interval
+        self.red_on = red_on
+        self.pattern = pattern
+
+    def __eq__(self, other):
+        return (isinstance(other, LedState) and self.blink_interval == other.blink_interval
+                and self.red_on == other.red_on and self.pattern == other.pattern)
+
+
+def load_gpio(fake=False):
+    if not fake:
+        try:
+            import RPi.GPIO as GPIO
+            return GPIO
+        except (ImportError, RuntimeError) as e:
+            print(f"RPi.GPIO unavailable ({e}) - using fake GPIO backend.")
+    from .fake_gpio import FakeGPIO
+    return FakeGPIO()
+
+
+class LedController:
+    def __init__(self, gpio, green_pin, red_pin):
+        self.gpio = gpio
+        self.green_pin = green_pin
+        self.red_pin = red_pin
+        # Latest-value mailbox: a single reference swap, only the newest state matters
+        self._target = LedState(pattern="off")
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="led-driver", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+        self.gpio.output(self.green_pin, self.gpio.LOW)
+        self.gpio.output(self.red_pin, self.gpio.LOW)
+
+    def set_target(self, state):
+        self._target = state
+        self._wake.set()
+
+    @property
+    def target(self):
+        return self._target
+
+    def _run(self):
+        gpio = self.gpio
+        current = None
+        step = 0
+        deadline = None
+        red = None
+        while not self._stop.is_set():
+            target = self._target
+            if target != current:
+                current = target
+                step = 0
+                deadline = time.monotonic()
+                if red != current.red_on:
+                    red = current.red_on
+                    gpio.output(self.red_pin, gpio.HIGH if red else gpio.LOW)
+            level, length = PATTERNS[current.pattern][step]
+            gpio.output(self.green_pin, gpio.HIGH if level else gpio.LOW)
+            if length is None:
+                # Static pattern: sleep until a new state arrives
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            # Schedule from the previous deadline rather than "now" so blinking never drifts
+            deadline += length * current.blink_interval
+            step = (step + 1) % len(PATTERNS[current.pattern])
+            while not self._stop.is_set():
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                if self._wake.wait(timeout):
+                    self._wake.clear()
+                    if self._target != current:
+                        break
+            if time.monotonic() - deadline > current.blink_interval:
+                # Fell far behind (e.g. the process was suspended); resync instead of bursting
+                deadline = time.monotonic()
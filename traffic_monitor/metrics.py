@@ -0,0 +1,205 @@
+# In-process counters, gauges and timers for the hot path, rendered in the
+# Prometheus text format and served on localhost. An observation is a lock and a
+# few additions, so the instrumentation stays on in production.
+import bisect
+import os
+import threading
+import time
+
+# Histogram bucket upper bounds in seconds: sub-ms parses up to long tshark captures
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self):
+        return [(self.name, self.value)]
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name, help_text, func=None):
+        self.name = name
+        self.help = help_text
+        self.func = func  # called at render time when given
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+    def samples(self):
+        return [(self.name, self.func() if self.func else self.value)]
+
+
+class _Timing:
+    __slots__ = ("timer", "start")
+
+    def __init__(self, timer):
+        self.timer = timer
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Timer:
+    # A Prometheus histogram of durations plus the last and max value for the summary line
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            self.last = seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def time(self):
+        return _Timing(self)
+
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def samples(self):
+        with self._lock:
+            counts, count, total = list(self.counts), self.count, self.sum
+        samples = []
+        cumulative = 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            samples.append((f'{self.name}_bucket{{le="{bound}"}}', cumulative))
+        samples.append((f'{self.name}_bucket{{le="+Inf"}}', count))
+        samples.append((f"{self.name}_sum", total))
+        samples.append((f"{self.name}_count", count))
+        return samples
+
+
+def resident_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.gauge("process_uptime_seconds", "Seconds since the monitor started", lambda: time.time() - self.started)
+        self.gauge("process_resident_memory_bytes", "Resident memory of this process", resident_bytes)
+
+    def _register(self, cls, name, *args):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, *args)
+            return metric
+
+    def counter(self, name, help_text):
+        return self._register(Counter, name, help_text)
+
+    def gauge(self, name, help_text, func=None):
+        return self._register(Gauge, name, help_text, func)
+
+    def timer(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._register(Timer, name, help_text, buckets)
+
+    def render(self):
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name} {value}" for name, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def summary_line(self):
+        # One compact line for the log: mean/max per timer, value per counter
+        parts = []
+        for metric in list(self.metrics.values()):
+            if isinstance(metric, Timer) and metric.count:
+                parts.append(f"{metric.name.removesuffix('_seconds')} {metric.mean()*1000:.1f}ms avg "
+                             f"{metric.max*1000:.1f}ms max n={metric.count}")
+            elif isinstance(metric, Counter):
+                parts.append(f"{metric.name.removesuffix('_total')} {metric.value}")
+        return " | ".join(parts)
+
+
+REGISTRY = Registry()
+
+
+def counter(name, help_text):
+    return REGISTRY.counter(name, help_text)
+
+
+def gauge(name, help_text, func=None):
+    return REGISTRY.gauge(name, help_text, func)
+
+
+def timer(name, help_text, buckets=DEFAULT_BUCKETS):
+    return REGISTRY.timer(name, help_text, buckets)
+
+
+class MetricsServer:
+    # GET /metrics on 127.0.0.1 only; nothing is exposed to the network
+    def __init__(self, port, registry=REGISTRY, host="127.0.0.1"):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # only when serving
+
+        self.registry = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,301 @@
+# The monitor loop shared by every entry point: capture -> analyze -> store ->
+# log -> rolling stats -> detector -> alerts, run periodically, as a gap-free
+# stream, or across several interfaces in parallel. Backends are passed in, so
+# the same loop drives the Pi's LEDs, the Windows CSV collector and the detector.
+import csv
+import os
+import time
+from datetime import datetime
+
+from . import metrics
+from .analysis import format_analysis, make_analyzer
+from .fleet import window_summary
+from .flow_features import COUNT_FEATURES, FEATURE_NAMES
+from .rolling_stats import format_snapshot
+
+SUMMARY_EVERY = 10  # windows between rolling-average log lines
+
+LOG_SECONDS = metrics.timer("traffic_log_seconds", "Time to hand one result to the logger")
+
+
+def save_to_csv(csv_path, features):
+    # Training-data row: timestamp, every flow feature, top talker
+    file_exists = os.path.isfile(csv_path)
+    with open(csv_path, 'a', newline='') as f:
+        writer = csv.writer(f)
+        if not file_exists:
+            writer.writerow(["timestamp"] + FEATURE_NAMES + ["top_ip"])
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        writer.writerow([timestamp] + [features[name] for name in FEATURE_NAMES] + [features["top_ip"]])
+
+
+class Monitor:
+    def __init__(self, capture, analyzer, alerts, detector, stats, logger=None, store=None,
+                 led_window="5m", csv_path=None, metrics_log_every=300, series=None, reporter=None,
+                 fast_path=None):
+        self.capture = capture
+        self.analyzer = analyzer
+        self.alerts = alerts
+        self.detector = detector
+        self.stats = stats
+        self.logger = logger
+        self.store = store
+        self.led_window = led_window
+        self.csv_path = csv_path
+        self.metrics_log_every = metrics_log_every
+        self.series = series
+        self.reporter = reporter
+        self.fast_path = fast_path
+        self.next_metrics_log = time.monotonic() + metrics_log_every
+        self.windows = 0
+        self.last_sample = None
+        self.last_end = None  # End of the latest window: the clock the rolling view is read at
+        self.last_anomaly = False
+
+    def analyze(self, pcap_file, duration=None):
+        features = self.analyzer.run(pcap_file, duration)
+        if features is not None:
+            print(format_analysis(pcap_file, features, self.analyzer.sample_every))
+        return features
+
+    def capture_window(self, duration):
+        # Returns (capture file, features). In-process backends hand their packets
+        # straight to the analyzer; for the others features is None and the file
+        # is analyzed in process()
+        if not hasattr(self.capture, "packets"):
+            return self.capture.capture(duration), None
+        # Run the capture first: last_file names the new window only once packets() has finished
+        features = self.analyzer.run_packets(self.capture.packets(duration), duration)
+        return self.capture.last_file, features
+
+    def process(self, pcap_file, start, end, features=None, stats_scale=1.0, record_stats=True):
+        # One finished window. `features` is given when a worker already analyzed
+        # it; `stats_scale` turns the additive counts (COUNT_FEATURES) of adaptive
+        # windows into per-base-window counts for the stats, the CSV and the
+        # detector; the log keeps what was captured. Multi-interface mode passes
+        # record_stats=False and records the combined view once per round instead.
+        if features is None:
+            features = self.analyze(pcap_file, end - start)
+        if self.store:
+            pcap_file = self.store.add(pcap_file, start, end)
+        if not features or features["total_packets"] == 0:
+            print("No packets captured in this window.")
+            return None
+        self.windows += 1
+        self.log_result(pcap_file, features["total_packets"], features["tcp_ratio"], features["top_ip"])
+        scaled = features
+        if stats_scale != 1.0:
+            scaled = dict(features)
+            for name in COUNT_FEATURES:
+                if name in scaled:
+                    scaled[name] *= stats_scale
+        if self.csv_path:
+            save_to_csv(self.csv_path, scaled)
+        prediction, score = self.detector.score(scaled)
+        self.last_anomaly = prediction == -1
+        if self.reporter:
+            self.reporter.send(window_summary(features, start, end, prediction if score is not None else 0, score))
+        if score is not None:
+            if prediction == -1:
+                print(f"⚠️  Anomaly Detected! This sample is suspicious. (score {score:.3f})")
+            else:
+                print(f"✅ Normal traffic. (score {score:.3f})")
+        if record_stats:
+            self.record_stats(pcap_file, end, features, stats_scale, prediction == -1)
+        if self.windows % SUMMARY_EVERY == 0:
+            self.report_stats()
+        self.log_metrics()
+        return features
+
+    def record_stats(self, pcap_file, end, features, stats_scale=1.0, anomaly=False):
+        # Rolling stats, history and LEDs: once per window, or per combined window
+        values = {"packets": features["total_packets"] * stats_scale, "tcp_ratio": features["tcp_ratio"]}
+        self.stats.update(values, end)
+        self.last_end = end
+        if self.series:
+            self.series.add(end, values)
+        self.last_sample = [pcap_file, features["total_packets"], features["tcp_ratio"], features["top_ip"]]
+        self.update_alerts(anomaly=anomaly)
+
+    def log_result(self, pcap_file, total_packets, tcp_ratio, top_ip, avg_packets=None, avg_tcp_ratio=None):
+        if self.logger is None:
+            return
+        with LOG_SECONDS.time():
+            self.logger.log({
+                "kind": "sample" if avg_packets is None else "average",
+                "file": pcap_file,
+                "packets": total_packets,
+                "tcp_ratio": tcp_ratio,
+                "top_ip": top_ip,
+                "avg_packets": avg_packets,
+                "avg_tcp_ratio": avg_tcp_ratio,
+            })
+
+    def rolling_averages(self):
+        packets = self.stats.snapshot("packets", self.led_window, self.last_end)
+        tcp = self.stats.snapshot("tcp_ratio", self.led_window, self.last_end)
+        if not packets or not packets["count"]:
+            return None
+        return packets["mean"], tcp["mean"]
+
+    def update_alerts(self, anomaly=False):
+        averages = self.rolling_averages()
+        if averages:
+            self.alerts.update(*averages, anomaly)
+
+    def report_stats(self):
+        for name in self.stats.windows:
+            print(format_snapshot("packets", name, self.stats.snapshot("packets", name, self.last_end)))
+            print(format_snapshot("tcp_ratio", name, self.stats.snapshot("tcp_ratio", name, self.last_end), 100, "%"))
+        averages = self.rolling_averages()
+        if averages and self.last_sample:
+            self.log_result(*self.last_sample, *averages)
+
+    def log_metrics(self, force=False):
+        # Periodic one-line metrics summary, printed and written to the log
+        if not force and time.monotonic() < self.next_metrics_log:
+            return
+        self.next_metrics_log = time.monotonic() + self.metrics_log_every
+        summary = metrics.REGISTRY.summary_line()
+        print(f"Metrics: {summary}")
+        if self.logger:
+            self.logger.log({"kind": "metrics", "summary": summary})
+
+    def run_periodic(self, samples=0, duration=10, delay=2, scheduler=None):
+        # With an AdaptiveScheduler, window length, pause and analysis depth
+        # follow its plan instead of the fixed duration/delay
+        if samples:
+            print(f"Starting {samples} periodic captures...")
+        else:
+            print("Starting continuous periodic captures (Ctrl+C to stop)...")
+        sample = 0
+        plan = None
+        while not samples or sample < samples:
+            sample += 1
+            print(f"\nSample {sample}/{samples}" if samples else f"\nSample {sample}")
+            if scheduler:
+                previous, plan = plan, scheduler.plan()
+                if plan != previous:
+                    print(f"Scheduler: {plan} (CPU {scheduler.cpu_share*100:.0f}% of a core)")
+                duration, delay = plan.duration, plan.delay
+                if (plan.analysis, plan.sample_every) != (self.analyzer.name, self.analyzer.sample_every):
+                    previous_analyzer = self.analyzer
+                    self.analyzer = make_analyzer(plan.analysis, plan.sample_every, previous_analyzer.cache,
+                                                  previous_analyzer.stream)
+                    if getattr(previous_analyzer, "extractor", None) and hasattr(self.analyzer, "extractor"):
+                        self.analyzer.extractor = previous_analyzer.extractor  # Keep the flow table
+            start = time.time()
+            captured_file, features = self.capture_window(duration)
+            if captured_file:
+                print(f"Packets captured and saved to {captured_file}")
+                if features is not None:
+                    print(format_analysis(captured_file, features, self.analyzer.sample_every))
+                scale = scheduler.base_duration / duration if scheduler else 1.0
+                features = self.process(captured_file, start, time.time(), features, stats_scale=scale)
+            if scheduler:
+                scheduler.observe(features["total_packets"] if features else 0, duration,
+                                  bool(features) and self.last_anomaly)
+            self.log_metrics()
+            if delay:
+                time.sleep(delay)  # Delay between captures
+
+    def run_stream(self, output_dir, duration=10, queue_size=4):
+        # Capture never pauses: analysis of window N runs while window N+1 is captured
+        from .capture_pipeline import CapturePipeline, format_stats
+
+        capture_args = getattr(self.capture, "capture_args", None)
+        if capture_args is None:
+            raise ValueError(f"--stream needs the tshark capture backend, not {self.capture.name}")
+
+        def on_result(window, features):
+            self.process(window.path, window.start, window.end, features)
+
+        pipeline = CapturePipeline(self.capture.interface, output_dir, self.analyze, on_result,
+                                   duration=duration, queue_size=queue_size, capture_args=capture_args)
+        pipeline.start()
+        print(f"Streaming capture on {self.capture.interface} in {duration}s windows (Ctrl+C to stop)...")
+        try:
+            while pipeline.running():
+                time.sleep(duration)
+                print(format_stats(pipeline.stats()))
+                self.log_metrics()
+            print("Capture process exited.")
+        finally:
+            pipeline.stop()
+            print(format_stats(pipeline.stats()))
+
+    def run_multi(self, interfaces, output_dir, duration=10, backend="tshark", capture_options=None):
+        # One capture+analysis process per interface; stats and alerts follow the combined
+        # view, recorded once per round: when every interface has reported a window (or
+        # failed), or two windows after the first report if a worker falls silent
+        from .analysis import ANALYSIS_ERRORS, ANALYZE_SECONDS, PACKETS, WINDOWS
+        from .capture import CAPTURE_ERRORS, CAPTURE_SECONDS, DROPS
+        from .multi_monitor import MultiInterfaceMonitor
+
+        monitor = MultiInterfaceMonitor(interfaces, output_dir, duration, backend, capture_options,
+                                        self.analyzer.sample_every)
+        monitor.start()
+        print(f"Monitoring {', '.join(interfaces)} in parallel, {duration}s windows (Ctrl+C to stop)...")
+        last_report = time.monotonic()
+        pending = set(interfaces)
+        round_started = round_file = round_end = None
+        round_anomaly = False
+        try:
+            while True:
+                result = monitor.poll(timeout=1.0)
+                if result and "error" in result:
+                    (CAPTURE_ERRORS if result["error"].startswith("capture") else ANALYSIS_ERRORS).inc()
+                    print(f"{result['interface']}: {result['error']}")
+                elif result:
+                    features = result["features"]
+                    CAPTURE_SECONDS.observe(result["end"] - result["start"])
+                    ANALYZE_SECONDS.observe(result["analysis_seconds"])
+                    WINDOWS.inc()
+                    PACKETS.inc(features["total_packets"])
+                    DROPS.inc(result["dropped"])
+                    combined = monitor.combined()
+                    print(f"{result['interface']}: {features['total_packets']} packets, "
+                          f"TCP {features['tcp_ratio']*100:.1f}% | combined ({combined['interfaces']} interfaces): "
+                          f"{combined['total_packets']} packets, TCP {combined['tcp_ratio']*100:.1f}%, "
+                          f"top IP {combined['top_ip']}")
+                    if self.process(result["file"], result["start"], result["end"], features, record_stats=False):
+                        round_anomaly = round_anomaly or self.last_anomaly
+                    round_file, round_end = result["file"], result["end"]
+                if result:
+                    pending.discard(result["interface"])
+                    if round_started is None:
+                        round_started = time.monotonic()
+                if round_started is not None and (not pending or time.monotonic() - round_started > 2 * duration):
+                    combined = monitor.combined()
+                    if combined["total_packets"] and round_end is not None:
+                        self.record_stats(round_file, round_end, combined, anomaly=round_anomaly)
+                    pending = set(interfaces)
+                    round_started = round_file = round_end = None
+                    round_anomaly = False
+                if time.monotonic() - last_report >= duration:
+                    print(monitor.report())
+                    last_report = time.monotonic()
+                self.log_metrics()
+        finally:
+            monitor.stop()
+            print(monitor.report())
+
+    def close(self):
+        if self.fast_path:
+            self.fast_path.stop()
+        if self.reporter:
+            self.reporter.close()
+        if self.last_sample:
+            print(f"\nRolling statistics after {self.windows} windows:")
+            self.report_stats()
+        else:
+            print("No valid samples collected for averaging.")
+        self.log_metrics(force=True)
+        if self.logger:
+            self.logger.close()
+        if self.series:
+            self.series.close()
+        self.detector.close()
+        if self.capture:
+            self.capture.close()
+        self.alerts.close()
@@ -0,0 +1,190 @@
+# Monitor several interfaces at once: one capture+analysis worker process per
+# interface (so each can use its own core), results merged in the parent into
+# per-interface and combined views, with per-core CPU and drop counters.
+import multiprocessing
+import os
+import queue
+import re
+import signal
+import time
+
+from .capture import make_capture
+from .flow_features import WindowFeatureExtractor, extract_features, extract_pcap_features
+
+
+def read_cpu_times():
+    # Per-core (busy, total) jiffies from /proc/stat; empty off Linux
+    times = {}
+    try:
+        with open("/proc/stat") as f:
+            for line in f:
+                if not line.startswith("cpu") or line.startswith("cpu "):
+                    continue
+                name, *fields = line.split()
+                values = [int(v) for v in fields]
+                idle = values[3] + (values[4] if len(values) > 4 else 0)
+                times[name] = (sum(values) - idle, sum(values))
+    except OSError:
+        pass
+    return times
+
+
+class CpuSampler:
+    def __init__(self):
+        self.last = read_cpu_times()
+
+    def sample(self):
+        # Busy percentage per core since the previous call
+        now = read_cpu_times()
+        usage = {}
+        for name, (busy, total) in now.items():
+            prev_busy, prev_total = self.last.get(name, (busy, total))
+            usage[name] = 100.0 * (busy - prev_busy) / (total - prev_total) if total > prev_total else 0.0
+        self.last = now
+        return usage
+
+
+def kernel_drops(interface):
+    try:
+        with open(f"/sys/class/net/{interface}/statistics/rx_dropped") as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def interface_worker(interface, output_dir, duration, results, stop, backend="tshark", capture_options=None,
+                     sample_every=1):
+    # Runs in its own process: capture one window, analyze it, report, repeat.
+    # Ctrl+C reaches the whole process group; the parent decides when to stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    safe_name = re.sub(r"[^\w.-]", "_", interface)
+    capture = make_capture(backend, interface, output_dir, prefix=f"capture_{safe_name}", **(capture_options or {}))
+    kernel_before = kernel_drops(interface)
+    extractor = WindowFeatureExtractor()  # One flow table across this interface's windows
+    while not stop.is_set():
+        start = time.time()
+        cpu_start = time.process_time()
+        children_start = os.times()
+        features = None
+        if hasattr(capture, "packets"):
+            # In-process backend: analyzed while capturing
+            features = extract_features(capture.packets(duration), extractor, duration, sample_every)
+            output_file = capture.last_file
+        else:
+            output_file = capture.capture(duration)
+        if output_file is None:
+            results.put({"interface": interface, "error": "capture failed", "ts": time.time()})
+            stop.wait(duration)
+            continue
+        end = time.time()
+        dropped = capture.last_dropped
+        analysis_start = time.perf_counter()
+        try:
+            if features is None:
+                features = extract_pcap_features(output_file, extractor, end - start, sample_every)
+        except (OSError, ValueError) as e:
+            results.put({"interface": interface, "error": f"analysis failed: {e}", "ts": end})
+            continue
+        kernel_now = kernel_drops(interface)
+        children_end = os.times()
+        results.put({
+            "interface": interface,
+            "pid": os.getpid(),
+            "file": output_file,
+            "start": start,
+            "end": end,
+            "features": features,
+            "dropped": dropped,
+            "kernel_dropped": None if kernel_now is None or kernel_before is None else kernel_now - kernel_before,
+            "analysis_seconds": time.perf_counter() - analysis_start,
+            "analysis_cpu": time.process_time() - cpu_start,
+            "capture_cpu": (children_end.children_user + children_end.children_system
+                            - children_start.children_user - children_start.children_system),
+        })
+        kernel_before = kernel_now
+    capture.close()
+
+
+class MultiInterfaceMonitor:
+    def __init__(self, interfaces, output_dir, duration=10, backend="tshark", capture_options=None, sample_every=1):
+        self.interfaces = list(interfaces)
+        self.output_dir = output_dir
+        self.duration = duration
+        self.sample_every = sample_every
+        # spawn, not fork: the parent already runs LED and logger threads
+        context = multiprocessing.get_context("spawn")
+        self.results = context.Queue()
+        self.stop_event = context.Event()
+        self.workers = [
+            context.Process(target=interface_worker, name=f"monitor-{iface}", daemon=True,
+                            args=(iface, output_dir, duration, self.results, self.stop_event,
+                                  backend, capture_options, sample_every))
+            for iface in self.interfaces
+        ]
+        self.latest = {}
+        self.totals = {iface: {"windows": 0, "packets": 0, "dropped": 0, "kernel_dropped": 0, "errors": 0,
+                               "analysis_cpu": 0.0, "capture_cpu": 0.0} for iface in self.interfaces}
+        self.cpu = CpuSampler()
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+
+    def stop(self):
+        self.stop_event.set()
+        for worker in self.workers:
+            worker.join(self.duration + 5)
+            if worker.is_alive():
+                worker.terminate()
+
+    def poll(self, timeout=1.0):
+        # Returns the next worker result (or None), folding it into the running totals
+        try:
+            result = self.results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        totals = self.totals[result["interface"]]
+        if "error" in result:
+            totals["errors"] += 1
+            return result
+        totals["windows"] += 1
+        totals["packets"] += result["features"]["total_packets"]
+        totals["dropped"] += result["dropped"]
+        totals["kernel_dropped"] += result["kernel_dropped"] or 0
+        totals["analysis_cpu"] += result["analysis_cpu"]
+        totals["capture_cpu"] += result["capture_cpu"]
+        self.latest[result["interface"]] = result
+        return result
+
+    def combined(self):
+        # Merge each interface's most recent window into one view
+        windows = [result["features"] for result in self.latest.values()]
+        total = sum(w["total_packets"] for w in windows)
+        if not total:
+            return {"total_packets": 0, "tcp_ratio": 0.0, "udp_ratio": 0.0, "other_ratio": 0.0,
+                    "bytes_per_sec": 0.0, "top_ip": "Unknown", "interfaces": len(windows)}
+        talkers = {}
+        for w in windows:
+            for ip, n in w["top_talkers"]:
+                talkers[ip] = talkers.get(ip, 0) + n
+        return {
+            "total_packets": total,
+            "tcp_ratio": sum(w["tcp_ratio"] * w["total_packets"] for w in windows) / total,
+            "udp_ratio": sum(w["udp_ratio"] * w["total_packets"] for w in windows) / total,
+            "other_ratio": sum(w["other_ratio"] * w["total_packets"] for w in windows) / total,
+            "bytes_per_sec": sum(w["bytes_per_sec"] for w in windows),
+            "top_ip": max(talkers.items(), key=lambda item: item[1])[0] if talkers else "Unknown",
+            "interfaces": len(windows),
+        }
+
+    def report(self):
+        lines = []
+        for iface in self.interfaces:
+            t = self.totals[iface]
+            lines.append(f"  {iface:10} windows {t['windows']:5} packets {t['packets']:9} "
+                         f"dropped {t['dropped']} (kernel {t['kernel_dropped']}) errors {t['errors']} "
+                         f"cpu capture {t['capture_cpu']:.1f}s analysis {t['analysis_cpu']:.1f}s")
+        usage = self.cpu.sample()
+        if usage:
+            lines.append("  cpu " + " ".join(f"{name}:{pct:.0f}%" for name, pct in sorted(usage.items())))
+        return "\n".join(lines)
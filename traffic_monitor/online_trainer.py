@@ -0,0 +1,115 @@
+# Online retraining from the live feature stream. Feature vectors go into a
+# bounded reservoir sample; on a schedule a background process refits the
+# forest on it, writes the model files atomically, and the running scorer is
+# hot-swapped without interrupting capture.
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ONLINE_FOREST_NAME = "anomaly_forest_online.npz"
+ONLINE_MODEL_NAME = "anomaly_model_online.pkl"
+ONLINE_SCALER_NAME = "anomaly_scaler_online.pkl"
+
+
+class ReservoirSampler:
+    # Algorithm R: a uniform sample of everything seen, in fixed memory
+    def __init__(self, capacity, seed=None):
+        self.capacity = capacity
+        self.items = []
+        self.seen = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def add(self, item):
+        with self._lock:
+            self.seen += 1
+            if len(self.items) < self.capacity:
+                self.items.append(item)
+            else:
+                slot = self._random.randrange(self.seen)
+                if slot < self.capacity:
+                    self.items[slot] = item
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _replace_atomically(path, write):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def retrain(rows, feature_names, output_dir, contamination=0.1):
+    # Runs in the worker process: only this process pays for importing sklearn
+    import joblib
+    import pandas as pd
+    from .training import export_forest, fit_model
+
+    model, scaler = fit_model(pd.DataFrame(rows, columns=feature_names), contamination=contamination)
+    os.makedirs(output_dir, exist_ok=True)
+    forest_path = os.path.join(output_dir, ONLINE_FOREST_NAME)
+    # np.savez appends .npz to names without it, so keep the suffix on the temp file
+    tmp_forest = f"{forest_path[:-4]}.tmp{os.getpid()}.npz"
+    export_forest(model, scaler, tmp_forest)
+    os.replace(tmp_forest, forest_path)
+    _replace_atomically(os.path.join(output_dir, ONLINE_MODEL_NAME), lambda p: joblib.dump(model, p))
+    _replace_atomically(os.path.join(output_dir, ONLINE_SCALER_NAME), lambda p: joblib.dump(scaler, p))
+    return forest_path
+
+
+class OnlineTrainer:
+    def __init__(self, scorer, output_dir, capacity=5000, interval=3600, min_samples=50,
+                 contamination=0.1, seed=None):
+        self.scorer = scorer
+        self.output_dir = output_dir
+        self.interval = interval
+        self.min_samples = min_samples
+        self.contamination = contamination
+        self.reservoir = ReservoirSampler(capacity, seed)
+        self.last_fit = time.monotonic()
+        self.fits = 0
+        self.last_error = None
+        self._pending = None
+        # spawn, not fork: the monitor has capture and fast-path threads running,
+        # and a forked child could inherit one of their locks held
+        self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    def observe(self, features):
+        self.reservoir.add(list(features))
+        if time.monotonic() - self.last_fit >= self.interval:
+            self.retrain_now()
+
+    def retrain_now(self):
+        if self._pending is not None or len(self.reservoir) < self.min_samples:
+            return False
+        self.last_fit = time.monotonic()
+        self._pending = self._executor.submit(retrain, self.reservoir.snapshot(), self.scorer.feature_names,
+                                              self.output_dir, self.contamination)
+        self._pending.add_done_callback(self._on_retrained)
+        return True
+
+    def _on_retrained(self, future):
+        try:
+            from .forest_inference import load_forest
+            model, scaler = load_forest(future.result())
+            self.scorer.swap(model, scaler)
+            self.fits += 1
+            self.last_error = None
+            print(f"🔄 Model retrained on {len(self.reservoir)} samples and hot-swapped "
+                  f"(threshold {self.scorer.threshold:.3f}).")
+        except Exception as e:
+            self.last_error = e
+            print(f"❌ Online retraining failed: {e}")
+        finally:
+            self._pending = None
+
+    def close(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
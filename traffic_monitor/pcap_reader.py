@@ -0,0 +1,292 @@
+# Single-pass pcap/pcapng reader used instead of repeated tshark runs
+import gzip
+import socket
+import struct
+
+PCAP_MAGIC_US = 0xA1B2C3D4
+PCAP_MAGIC_NS = 0xA1B23C4D
+PCAPNG_SHB = 0x0A0D0D0A
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+SUMMARY_VERSION = 2  # Bump when the summary analysis output changes (invalidates cached results)
+
+# Link types we know how to decode (see tcpdump.org/linktypes.html)
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LOOP = 108
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+LINKTYPE_LINUX_SLL2 = 276
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_IPV6 = 0x86DD
+ETHERTYPE_VLAN = (0x8100, 0x88A8, 0x9100)
+
+PROTO_TCP = 6
+PROTO_UDP = 17
+IPV6_EXT_HEADERS = (0, 43, 60)
+IPV6_FRAGMENT = 44
+
+_unpack_from = struct.unpack_from
+_u16 = struct.Struct("!H").unpack_from
+
+
+def open_capture(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return open(path, "rb", buffering=1 << 16)
+
+
+def _read_exact(f, n):
+    data = f.read(n)
+    while len(data) < n:
+        more = f.read(n - len(data))
+        if not more:
+            break
+        data += more
+    return data
+
+
+def _iter_pcap(f, header):
+    magic = struct.unpack("<I", header[:4])[0]
+    if magic in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+        endian = "<"
+    else:
+        endian = ">"
+        magic = struct.unpack(">I", header[:4])[0]
+    ts_div = 1e9 if magic == PCAP_MAGIC_NS else 1e6
+    rest = _read_exact(f, 20)
+    if len(rest) < 20:
+        return
+    linktype = struct.unpack(endian + "I", rest[16:20])[0] & 0x0FFFFFFF
+    record = struct.Struct(endian + "IIII")
+    unpack = record.unpack
+    while True:
+        hdr = _read_exact(f, 16)
+        if len(hdr) < 16:
+            return
+        sec, frac, caplen, orig_len = unpack(hdr)
+        data = _read_exact(f, caplen)
+        if len(data) < caplen:
+            return
+        yield sec + frac / ts_div, linktype, data, orig_len
+
+
+def _iter_pcapng(f, first):
+    interfaces = []
+    endian = "<"
+    block_type = PCAPNG_SHB
+    head = first
+    while True:
+        if block_type == PCAPNG_SHB:
+            rest = _read_exact(f, 8)
+            if len(rest) < 8:
+                return
+            endian = "<" if struct.unpack("<I", rest[4:8])[0] == PCAPNG_BYTE_ORDER_MAGIC else ">"
+            block_len = struct.unpack(endian + "I", rest[:4])[0]
+            body = _read_exact(f, block_len - 12)
+            if len(body) < block_len - 12:
+                return
+            # A new section resets the interface list
+            interfaces = []
+        else:
+            block_len = struct.unpack(endian + "I", head[4:8])[0]
+            if block_len < 12:
+                raise ValueError(f"Corrupt pcapng block length {block_len}")
+            body = _read_exact(f, block_len - 8)
+            if len(body) < block_len - 8:
+                return
+            if block_type == 1:
+                linktype, _, snaplen = _unpack_from(endian + "HHI", body, 0)
+                interfaces.append((linktype, _pcapng_tsresol(body, endian, block_len), snaplen))
+            elif block_type == 6:
+                if_id, ts_hi, ts_lo, caplen, orig_len = _unpack_from(endian + "IIIII", body, 0)
+                if if_id >= len(interfaces):
+                    raise ValueError(f"pcapng packet references unknown interface {if_id}")
+                linktype, ts_div, _ = interfaces[if_id]
+                yield ((ts_hi << 32) | ts_lo) / ts_div, linktype, body[20:20 + caplen], orig_len
+            elif block_type == 3:
+                orig_len = _unpack_from(endian + "I", body, 0)[0]
+                if not interfaces:
+                    raise ValueError("pcapng simple packet block before any interface")
+                linktype, _, snaplen = interfaces[0]
+                caplen = min(orig_len, snaplen) if snaplen else orig_len
+                yield 0.0, linktype, body[4:4 + caplen], orig_len
+        head = _read_exact(f, 8)
+        if len(head) < 8:
+            return
+        block_type = struct.unpack(endian + "I", head[:4])[0]
+
+
+def _pcapng_tsresol(body, endian, block_len):
+    # Interface Description Block options start after the fixed 8-byte part
+    offset = 8
+    end = block_len - 12
+    while offset + 4 <= end:
+        code, length = _unpack_from(endian + "HH", body, offset)
+        if code == 0:
+            break
+        if code == 9 and length >= 1:
+            resol = body[offset + 4]
+            if resol & 0x80:
+                return float(2 ** (resol & 0x7F))
+            return float(10 ** resol)
+        offset += 4 + ((length + 3) & ~3)
+    return 1e6
+
+
+def iter_packets(source):
+    # Yields (timestamp, linktype, frame bytes, original length) for every
+    # record in a pcap or pcapng file. `source` is a path or a binary file object.
+    f = open_capture(source) if isinstance(source, str) else source
+    try:
+        header = _read_exact(f, 4)
+        if len(header) < 4:
+            return
+        magic = struct.unpack("<I", header)[0]
+        if magic == PCAPNG_SHB:
+            yield from _iter_pcapng(f, header)
+        elif magic in (PCAP_MAGIC_US, PCAP_MAGIC_NS) or struct.unpack(">I", header)[0] in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+            yield from _iter_pcap(f, header)
+        else:
+            raise ValueError(f"Not a pcap/pcapng file (magic 0x{magic:08x})")
+    finally:
+        if isinstance(source, str):
+            f.close()
+
+
+def decode(data, linktype, offset=0):
+    # Returns (ip_proto, src, dst, sport, dport, tcp_flags) or None for non-IP
+    # frames. Addresses are raw 4/16 byte strings; ports/flags are 0 when absent.
+    # Works on bytes or memoryview without copying the frame.
+    end = len(data)
+    if linktype == LINKTYPE_ETHERNET:
+        if end - offset < 14:
+            return None
+        ethertype = _u16(data, offset + 12)[0]
+        offset += 14
+        while ethertype in ETHERTYPE_VLAN and end - offset >= 4:
+            ethertype = _u16(data, offset + 2)[0]
+            offset += 4
+    elif linktype == LINKTYPE_LINUX_SLL:
+        if end - offset < 16:
+            return None
+        ethertype = _u16(data, offset + 14)[0]
+        offset += 16
+    elif linktype == LINKTYPE_LINUX_SLL2:
+        if end - offset < 20:
+            return None
+        ethertype = _u16(data, offset)[0]
+        offset += 20
+    elif linktype in (LINKTYPE_NULL, LINKTYPE_LOOP):
+        if end - offset < 4:
+            return None
+        family = data[offset] or data[offset + 3]
+        ethertype = ETHERTYPE_IPV4 if family == 2 else ETHERTYPE_IPV6
+        offset += 4
+    elif linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6):
+        if end - offset < 1:
+            return None
+        ethertype = ETHERTYPE_IPV6 if data[offset] >> 4 == 6 else ETHERTYPE_IPV4
+    else:
+        return None
+
+    if ethertype == ETHERTYPE_IPV4:
+        if end - offset < 20:
+            return None
+        ihl = (data[offset] & 0x0F) * 4
+        proto = data[offset + 9]
+        src = bytes(data[offset + 12:offset + 16])
+        dst = bytes(data[offset + 16:offset + 20])
+        # Only the first fragment carries the transport header
+        if _u16(data, offset + 6)[0] & 0x1FFF:
+            return proto, src, dst, 0, 0, 0
+        offset += ihl
+    elif ethertype == ETHERTYPE_IPV6:
+        if end - offset < 40:
+            return None
+        proto = data[offset + 6]
+        src = bytes(data[offset + 8:offset + 24])
+        dst = bytes(data[offset + 24:offset + 40])
+        offset += 40
+        while proto in IPV6_EXT_HEADERS or proto == IPV6_FRAGMENT:
+            if end - offset < 8:
+                return proto, src, dst, 0, 0, 0
+            next_proto = data[offset]
+            if proto == IPV6_FRAGMENT:
+                if _u16(data, offset + 2)[0] & 0xFFF8:
+                    return next_proto, src, dst, 0, 0, 0
+                offset += 8
+            else:
+                offset += (data[offset + 1] + 1) * 8
+            proto = next_proto
+    else:
+        return None
+
+    if proto == PROTO_TCP and end - offset >= 14:
+        sport, dport = _unpack_from("!HH", data, offset)
+        return proto, src, dst, sport, dport, data[offset + 13]
+    if proto == PROTO_UDP and end - offset >= 4:
+        sport, dport = _unpack_from("!HH", data, offset)
+        return proto, src, dst, sport, dport, 0
+    return proto, src, dst, 0, 0, 0
+
+
+def format_ip(addr):
+    return socket.inet_ntop(socket.AF_INET if len(addr) == 4 else socket.AF_INET6, addr)
+
+
+def summarize_pcap(source, sample_every=1):
+    return summarize_packets(iter_packets(source), sample_every)
+
+
+def summarize_packets(packets, sample_every=1):
+    # One pass over (ts, linktype, frame, length) packets from a file or a live
+    # capture: protocol counts plus per-source byte/packet tallies.
+    # With sample_every=N only every Nth packet is decoded; total and bytes stay
+    # exact and the decoded tallies are scaled up by total/decoded.
+    total = tcp = udp = 0
+    sampled = 0
+    total_bytes = 0
+    src_bytes = {}
+    src_packets = {}
+    for _, linktype, data, orig_len in packets:
+        total += 1
+        total_bytes += orig_len
+        if sample_every > 1 and (total - 1) % sample_every:
+            continue
+        sampled += 1
+        info = decode(data, linktype)
+        if info is None:
+            continue
+        proto, src = info[0], info[1]
+        if proto == PROTO_TCP:
+            tcp += 1
+        elif proto == PROTO_UDP:
+            udp += 1
+        src_bytes[src] = src_bytes.get(src, 0) + orig_len
+        src_packets[src] = src_packets.get(src, 0) + 1
+    scale = total / sampled if sampled else 1.0
+    tcp = round(tcp * scale)
+    udp = round(udp * scale)
+    return {
+        "total": total,
+        "sampled": sampled,
+        "tcp": tcp,
+        "udp": udp,
+        "other": max(total - tcp - udp, 0),
+        "bytes": total_bytes,
+        "src_bytes": {format_ip(ip): round(n * scale) for ip, n in src_bytes.items()},
+        "src_packets": {format_ip(ip): round(n * scale) for ip, n in src_packets.items()},
+    }
+
+
+def top_source_ip(summary):
+    # Same ordering as tshark's conv,ip table: the source with the most bytes
+    if not summary["src_bytes"]:
+        return "Unknown"
+    return max(summary["src_bytes"].items(), key=lambda item: item[1])[0]
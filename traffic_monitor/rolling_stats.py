@@ -0,0 +1,205 @@
+# Constant-memory rolling statistics for long-running monitoring.
+# Each window is a ring of time buckets; a bucket keeps count/mean/M2 (Welford)
+# and a small log-bucket quantile sketch, so memory does not grow with uptime.
+import math
+import threading
+import time
+
+DEFAULT_WINDOWS = {"1m": 60, "5m": 300, "1h": 3600}
+WINDOW_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_window(text):
+    text = text.strip()
+    if text[-1:] in WINDOW_UNITS:
+        return float(text[:-1]) * WINDOW_UNITS[text[-1]]
+    return float(text)
+
+
+def parse_windows(text):
+    return {name.strip(): parse_window(name) for name in text.split(",") if name.strip()}
+
+
+class Ewma:
+    # Time-aware EWMA: the weight of old data halves every `half_life` seconds
+    __slots__ = ("half_life", "value", "last_ts")
+
+    def __init__(self, half_life):
+        self.half_life = half_life
+        self.value = None
+        self.last_ts = None
+
+    def add(self, value, ts):
+        if self.value is None:
+            self.value = value
+        else:
+            dt = max(ts - self.last_ts, 0.0)
+            alpha = 1.0 - math.exp(-dt * math.log(2) / self.half_life)
+            self.value += alpha * (value - self.value)
+        self.last_ts = ts
+
+
+class QuantileSketch:
+    # Log-bucketed sketch (DDSketch style): quantiles within `relative_accuracy`
+    # of the true value, mergeable, and capped at `max_bins` by folding the lowest bins.
+    __slots__ = ("gamma", "log_gamma", "max_bins", "bins", "zero_count", "count", "min", "max")
+
+    def __init__(self, relative_accuracy=0.01, max_bins=256):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_bins = max_bins
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= 1e-9:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self.log_gamma)
+        self.bins[key] = self.bins.get(key, 0) + 1
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self):
+        keys = sorted(self.bins)
+        excess = len(keys) - self.max_bins
+        folded = sum(self.bins.pop(key) for key in keys[:excess + 1])
+        self.bins[keys[excess]] = self.bins.get(keys[excess], 0) + folded
+
+    def merge(self, other):
+        self.count += other.count
+        self.zero_count += other.zero_count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        for key, n in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + n
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return max(self.min, 0.0)
+        key = max(self.bins)
+        for candidate in sorted(self.bins):
+            seen += self.bins[candidate]
+            if rank < seen:
+                key = candidate
+                break
+        estimate = 2 * self.gamma ** key / (self.gamma + 1)
+        return min(max(estimate, self.min), self.max)
+
+
+class _Bucket:
+    __slots__ = ("slot", "count", "mean", "m2", "sketch")
+
+    def __init__(self, slot, relative_accuracy):
+        self.slot = slot
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sketch = QuantileSketch(relative_accuracy)
+
+
+class RollingWindow:
+    def __init__(self, span, buckets=12, relative_accuracy=0.01):
+        self.span = span
+        self.width = span / buckets
+        self.relative_accuracy = relative_accuracy
+        self.buckets = [None] * buckets
+
+    def add(self, value, ts):
+        slot = int(ts // self.width)
+        position = slot % len(self.buckets)
+        bucket = self.buckets[position]
+        if bucket is None or bucket.slot != slot:
+            bucket = self.buckets[position] = _Bucket(slot, self.relative_accuracy)
+        bucket.count += 1
+        delta = value - bucket.mean
+        bucket.mean += delta / bucket.count
+        bucket.m2 += delta * (value - bucket.mean)
+        bucket.sketch.add(value)
+
+    def snapshot(self, now):
+        newest = int(now // self.width)
+        oldest = newest - len(self.buckets) + 1
+        count = 0
+        mean = m2 = 0.0
+        sketch = QuantileSketch(self.relative_accuracy)
+        for bucket in self.buckets:
+            if bucket is None or not oldest <= bucket.slot <= newest:
+                continue
+            # Chan et al. parallel merge of count/mean/M2
+            total = count + bucket.count
+            delta = bucket.mean - mean
+            mean += delta * bucket.count / total
+            m2 += bucket.m2 + delta * delta * count * bucket.count / total
+            count = total
+            sketch.merge(bucket.sketch)
+        if count == 0:
+            return {"count": 0, "mean": None, "variance": None, "p50": None, "p95": None, "p99": None}
+        return {
+            "count": count,
+            "mean": mean,
+            "variance": m2 / (count - 1) if count > 1 else 0.0,
+            "p50": sketch.quantile(0.50),
+            "p95": sketch.quantile(0.95),
+            "p99": sketch.quantile(0.99),
+        }
+
+
+class StatsEngine:
+    # Thread-safe: the capture/analysis side calls update(), LEDs and logging read snapshot()
+    def __init__(self, windows=None, half_life=60.0, buckets=12):
+        self.windows = dict(windows or DEFAULT_WINDOWS)
+        self.half_life = half_life
+        self.buckets = buckets
+        self._metrics = {}
+        self._ewma = {}
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def update(self, values, ts=None):
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            for name, value in values.items():
+                if name not in self._metrics:
+                    self._metrics[name] = {window: RollingWindow(span, self.buckets)
+                                           for window, span in self.windows.items()}
+                    self._ewma[name] = Ewma(self.half_life)
+                for rolling in self._metrics[name].values():
+                    rolling.add(value, ts)
+                self._ewma[name].add(value, ts)
+                self._last[name] = value
+
+    def snapshot(self, metric, window, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            if metric not in self._metrics:
+                return None
+            result = self._metrics[metric][window].snapshot(now)
+            result["ewma"] = self._ewma[metric].value
+            result["last"] = self._last[metric]
+            return result
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics)
+
+
+def format_snapshot(metric, window, snap, scale=1.0, unit=""):
+    if not snap or not snap["count"]:
+        return f"{metric} [{window}]: no data"
+    std = math.sqrt(snap["variance"]) * scale
+    return (f"{metric} [{window}]: mean {snap['mean']*scale:.1f}{unit} sd {std:.1f}{unit} "
+            f"ewma {snap['ewma']*scale:.1f}{unit} p50 {snap['p50']*scale:.1f}{unit} "
+            f"p95 {snap['p95']*scale:.1f}{unit} p99 {snap['p99']*scale:.1f}{unit} (n={snap['count']})")
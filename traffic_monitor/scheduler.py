@@ -0,0 +1,110 @@
+# Adaptive capture scheduling for the periodic monitor. After every window the
+# scheduler looks at the packet rate against its own slow baseline and at the
+# CPU the monitor used, and plans the next window:
+#   burst: rate jumped or the detector flagged the window -> short windows, full
+#          flow analysis, no pause, held for a few windows
+#   idle:  almost no traffic -> windows stretch towards max_duration, cheap analysis
+#   normal: back towards the base window length
+# Independently, CPU use (this process plus finished tshark children) is held
+# under cpu_budget, first by decoding 1 in N packets, then by pausing.
+import os
+import time
+
+from . import metrics
+from .rolling_stats import Ewma
+
+WINDOW_SECONDS = metrics.gauge("scheduler_window_seconds", "Length of the next planned capture window")
+CPU_SHARE = metrics.gauge("scheduler_cpu_share", "CPU used by the monitor over the last window, in cores")
+
+
+class Plan:
+    __slots__ = ("mode", "duration", "delay", "analysis", "sample_every")
+
+    def __init__(self, mode, duration, delay, analysis, sample_every):
+        self.mode = mode
+        self.duration = duration
+        self.delay = delay
+        self.analysis = analysis
+        self.sample_every = sample_every
+
+    def __eq__(self, other):
+        return isinstance(other, Plan) and all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __str__(self):
+        return (f"{self.mode}: {self.duration:g}s windows, {self.analysis} analysis"
+                f"{f', 1 in {self.sample_every} packets' if self.sample_every > 1 else ''}"
+                f"{f', {self.delay:.1f}s pause' if self.delay else ''}")
+
+
+def cpu_seconds():
+    # User + system time of this process and its waited-for children (tshark)
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class AdaptiveScheduler:
+    def __init__(self, base_duration=10, min_duration=2, max_duration=30, cpu_budget=0.25,
+                 cheap_analysis="summary", full_analysis="flow", burst_factor=3.0, idle_packets=25,
+                 hold_windows=3, max_sample_every=16, baseline_half_life=600):
+        self.base_duration = base_duration
+        self.min_duration = min(min_duration, base_duration)
+        self.max_duration = max(max_duration, base_duration)
+        self.cpu_budget = cpu_budget
+        self.cheap_analysis = cheap_analysis
+        self.full_analysis = full_analysis
+        self.burst_factor = burst_factor
+        self.idle_packets = idle_packets  # per base window
+        self.hold_windows = hold_windows
+        self.max_sample_every = max_sample_every
+        self.baseline = Ewma(baseline_half_life)
+        self.hold = 0
+        self.cpu_share = 0.0
+        self.next_plan = Plan("normal", base_duration, 0.0, cheap_analysis, 1)
+        self._mark = (time.monotonic(), cpu_seconds())
+
+    def plan(self):
+        self._mark = (time.monotonic(), cpu_seconds())
+        return self.next_plan
+
+    def observe(self, packets, duration, anomaly=False):
+        # Called once the window has been analyzed; returns the plan for the next one
+        now = time.monotonic()
+        started, cpu_start = self._mark
+        wall = max(now - started, 1e-6)
+        cpu = cpu_seconds() - cpu_start
+        self.cpu_share = cpu / wall
+        CPU_SHARE.set(self.cpu_share)
+
+        rate = packets / max(duration, 1e-6)
+        baseline = self.baseline.value
+        burst = anomaly or (baseline is not None and baseline > 0 and rate > self.burst_factor * baseline)
+        if burst:
+            self.hold = self.hold_windows
+        elif self.hold:
+            self.hold -= 1
+        # The slow half-life keeps a short burst from moving the baseline much,
+        # while a lasting change in traffic becomes the new normal
+        self.baseline.add(rate, time.time())
+
+        last = self.next_plan
+        if self.hold:
+            mode, next_duration, analysis = "burst", self.min_duration, self.full_analysis
+        elif rate * self.base_duration < self.idle_packets:
+            mode, next_duration, analysis = "idle", min(self.max_duration, last.duration * 1.5), self.cheap_analysis
+        elif last.duration < self.base_duration:
+            mode, next_duration, analysis = "normal", min(self.base_duration, last.duration * 2), self.cheap_analysis
+        else:
+            mode, next_duration, analysis = "normal", max(self.base_duration, last.duration / 1.5), self.cheap_analysis
+
+        # CPU budget: sample harder when over it, relax when well under it,
+        # and pause long enough that the next cycle averages out to the budget
+        sample_every = last.sample_every
+        if self.cpu_share > self.cpu_budget and sample_every < self.max_sample_every:
+            sample_every *= 2
+        elif self.cpu_share < self.cpu_budget / 2 and sample_every > 1:
+            sample_every //= 2
+        delay = max(0.0, cpu / self.cpu_budget - wall) if self.cpu_budget > 0 else 0.0
+        # Whole seconds: tshark's duration autostop takes an integer
+        self.next_plan = Plan(mode, int(round(next_duration)), round(delay, 1), analysis, sample_every)
+        WINDOW_SECONDS.set(self.next_plan.duration)
+        return self.next_plan
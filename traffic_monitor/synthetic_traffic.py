@@ -0,0 +1,85 @@
+# Synthetic pcap generator for benchmarks and replay: Ethernet/IPv4 traffic at a
+# given packet rate (Poisson arrivals) with a configurable TCP/UDP/other mix.
+# Source hosts are skewed so a few talkers dominate, like real networks.
+# Usage: python3 -m traffic_monitor.synthetic_traffic out.pcap 100000 [rate] [tcp=0.6,udp=0.3,other=0.1]
+import random
+import struct
+import sys
+import time
+
+from .pcap_reader import LINKTYPE_ETHERNET, PROTO_TCP, PROTO_UDP
+
+PROTO_ICMP = 1
+DEFAULT_MIX = "tcp=0.6,udp=0.3,other=0.1"
+PAYLOAD_SIZES = (0, 40, 200, 576, 1400)
+TCP_PORTS = (80, 443, 443, 443, 22, 8080, 3389)
+UDP_PORTS = (53, 53, 123, 443, 5353, 1900)
+SYN_SHARE = 0.05
+
+
+def parse_mix(text):
+    # "tcp=0.6,udp=0.3,other=0.1" -> weights normalised to sum to 1
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip().lower()
+        if name not in ("tcp", "udp", "other"):
+            raise ValueError(f"Unknown protocol {name!r} in mix (use tcp, udp, other)")
+        mix[name] = float(weight)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("Protocol mix weights must add up to more than 0")
+    return {name: weight / total for name, weight in mix.items()}
+
+
+def host_address(index):
+    return bytes((10, 0, (index >> 8) & 0xFF, index & 0xFF))
+
+
+def build_frame(proto, src, dst, sport, dport, flags, payload):
+    if proto == PROTO_TCP:
+        l4 = struct.pack("!HHIIBBHHH", sport, dport, 0, 0, 0x50, flags, 65535, 0, 0)
+    elif proto == PROTO_UDP:
+        l4 = struct.pack("!HHHH", sport, dport, 8 + len(payload), 0)
+    else:
+        l4 = struct.pack("!BBHHH", 8, 0, 0, sport, dport)  # ICMP echo request
+    ip = struct.pack("!BBHHHBBH4s4s", 0x45, 0, 20 + len(l4) + len(payload), 0, 0x4000, 64, proto, 0, src, dst)
+    return b"\x02\x00\x00\x00\x00\x01\x02\x00\x00\x00\x00\x02\x08\x00" + ip + l4 + payload
+
+
+def generate_pcap(path, packets, rate=1000.0, mix=DEFAULT_MIX, hosts=50, start=None, seed=None):
+    # Returns (first_ts, last_ts) of the written capture
+    rng = random.Random(seed)
+    weights = parse_mix(mix) if isinstance(mix, str) else mix
+    protos = [{"tcp": PROTO_TCP, "udp": PROTO_UDP, "other": PROTO_ICMP}[name] for name in weights]
+    proto_weights = list(weights.values())
+    payloads = [b"\x00" * size for size in PAYLOAD_SIZES]
+    servers = [bytes((192, 168, 1, i)) for i in range(1, 9)]
+    ts = first = time.time() if start is None else start
+    with open(path, "wb") as f:
+        f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 262144, LINKTYPE_ETHERNET))
+        for proto in rng.choices(protos, proto_weights, k=packets):
+            # Log-uniform host index: 10.0.0.1 is busiest, the tail is long
+            src = host_address(int((hosts + 1) ** rng.random()))
+            dst = rng.choice(servers)
+            payload = rng.choice(payloads)
+            if proto == PROTO_TCP:
+                flags = 0x02 if rng.random() < SYN_SHARE else 0x18
+                frame = build_frame(proto, src, dst, rng.randint(1024, 65535), rng.choice(TCP_PORTS), flags, payload)
+            elif proto == PROTO_UDP:
+                frame = build_frame(proto, src, dst, rng.randint(1024, 65535), rng.choice(UDP_PORTS), 0, payload)
+            else:
+                frame = build_frame(proto, src, dst, rng.randint(0, 65535), 1, 0, payload[:56])
+            f.write(struct.pack("<IIII", int(ts), int(ts % 1 * 1e6), len(frame), len(frame)))
+            f.write(frame)
+            ts += rng.expovariate(rate)
+    return first, ts
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(f"Usage: python3 -m traffic_monitor.synthetic_traffic <out.pcap> <packets> [rate] [{DEFAULT_MIX}]")
+        sys.exit(1)
+    rate = float(sys.argv[3]) if len(sys.argv) > 3 else 1000.0
+    first, last = generate_pcap(sys.argv[1], int(sys.argv[2]), rate, sys.argv[4] if len(sys.argv) > 4 else DEFAULT_MIX)
+    print(f"Wrote {sys.argv[2]} packets spanning {last - first:.1f}s to {sys.argv[1]}")
@@ -0,0 +1,215 @@
+# Long-term history of the monitored metrics in fixed-width binary records.
+# Every sample is appended to raw.bin and rolled up into 1m.bin, 1h.bin and
+# 1d.bin as each minute/hour/day closes. Each record is a bucket start time,
+# a sample count and sum/min/max per metric, so every resolution can be merged
+# exactly. Files are append-only and time-ordered: lookups are binary searches
+# over the memory-mapped file, and an aggregate over any range reads whole
+# days from 1d.bin and only the ragged edges from the finer files, so a year
+# costs a few hundred records. Old records are dropped per resolution.
+import math
+import mmap
+import os
+import struct
+
+METRICS = ("packets", "tcp_ratio")
+RECORD = struct.Struct("<dQ" + "ddd" * len(METRICS))  # start, count, (sum, min, max) per metric
+LEVELS = (("raw", 0), ("1m", 60), ("1h", 3600), ("1d", 86400))
+DEFAULT_RETENTION = {"raw": 7 * 86400, "1m": 90 * 86400, "1h": 730 * 86400, "1d": 0}  # seconds, 0 = forever
+
+
+def parse_retention(text):
+    # "raw=7d,1m=90d,1h=2y"-style overrides on top of DEFAULT_RETENTION
+    from .rolling_stats import parse_window
+
+    retention = dict(DEFAULT_RETENTION)
+    for part in text.split(","):
+        if part.strip():
+            name, _, value = part.partition("=")
+            if name.strip() not in retention:
+                raise ValueError(f"Unknown resolution '{name.strip()}', expected one of {', '.join(retention)}")
+            value = value.strip()
+            retention[name.strip()] = parse_window(value[:-1]) * 365 * 86400 if value.endswith("y") \
+                else parse_window(value)
+    return retention
+
+
+def empty_bucket(start):
+    return [start, 0] + [0.0, math.inf, -math.inf] * len(METRICS)
+
+
+def merge(bucket, record):
+    bucket[1] += record[1]
+    for i in range(2, len(bucket), 3):
+        bucket[i] += record[i]
+        bucket[i + 1] = min(bucket[i + 1], record[i + 1])
+        bucket[i + 2] = max(bucket[i + 2], record[i + 2])
+
+
+def summarize(record):
+    # Record tuple -> {"ts", "count", "<metric>": {"mean", "min", "max"}}
+    count = record[1]
+    result = {"ts": record[0], "count": count}
+    for index, name in enumerate(METRICS):
+        total, low, high = record[2 + 3 * index:5 + 3 * index]
+        result[name] = {"mean": total / count, "min": low, "max": high} if count else None
+    return result
+
+
+class SeriesFile:
+    # One resolution: append-only fixed-width records, searched through mmap
+    def __init__(self, path):
+        self.path = path
+        self.file = None  # opened on first append, so readers never create or lock files
+
+    def __len__(self):
+        try:
+            return os.path.getsize(self.path) // RECORD.size
+        except OSError:
+            return 0
+
+    def append(self, records):
+        if self.file is None:
+            self.file = open(self.path, "ab")
+        self.file.write(b"".join(RECORD.pack(*record) for record in records))
+        self.file.flush()
+
+    def last(self):
+        count = len(self)
+        if not count:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek((count - 1) * RECORD.size)
+            return RECORD.unpack(f.read(RECORD.size))
+
+    def first_ts(self):
+        if not len(self):
+            return None
+        with open(self.path, "rb") as f:
+            return RECORD.unpack(f.read(RECORD.size))[0]
+
+    def read(self, start, end):
+        # Records with start <= ts < end
+        count = len(self)
+        if not count:
+            return []
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), count * RECORD.size, access=mmap.ACCESS_READ) as view:
+            ts_at = lambda i: struct.unpack_from("<d", view, i * RECORD.size)[0]
+            lo = self._search(ts_at, count, start)
+            hi = self._search(ts_at, count, end)
+            return list(RECORD.iter_unpack(view[lo * RECORD.size:hi * RECORD.size]))
+
+    @staticmethod
+    def _search(ts_at, count, value):
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if ts_at(mid) < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def drop_before(self, cutoff):
+        # Retention: rewrite the file without records older than cutoff
+        count = len(self)
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), count * RECORD.size, access=mmap.ACCESS_READ) as view:
+            ts_at = lambda i: struct.unpack_from("<d", view, i * RECORD.size)[0]
+            keep = view[self._search(ts_at, count, cutoff) * RECORD.size:]
+        self.close()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(keep)
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class TimeSeriesStore:
+    def __init__(self, root, retention=None, readonly=False):
+        # readonly: query a history another process is writing
+        self.root = root
+        self.retention = retention or DEFAULT_RETENTION
+        self.files = {name: SeriesFile(os.path.join(root, f"{name}.bin")) for name, _ in LEVELS}
+        self.next_trim = {name: 0.0 for name, _ in LEVELS}
+        self.pending = {}
+        if readonly:
+            return
+        os.makedirs(root, exist_ok=True)
+        # Open (not yet written) bucket per rollup level, rebuilt from the finer
+        # level so a restart doesn't lose the current minute/hour/day
+        for (finer, _), (name, width) in zip(LEVELS, LEVELS[1:]):
+            last = self.files[name].last()
+            since = last[0] + width if last else 0.0
+            self.pending[name] = None
+            for record in self.files[finer].read(since, math.inf):
+                self._roll(name, width, record)
+            if finer != "raw" and self.pending[finer]:
+                self._roll(name, width, self.pending[finer])
+
+    def add(self, ts, values):
+        # values: {metric: number} for every name in METRICS
+        record = [ts, 1]
+        for name in METRICS:
+            record += [values[name]] * 3
+        self._write("raw", [record], ts)
+        for name, width in LEVELS[1:]:
+            self._roll(name, width, record)
+
+    def _roll(self, name, width, record):
+        start = record[0] // width * width
+        bucket = self.pending[name]
+        if bucket is not None and bucket[0] != start:
+            self._write(name, [bucket], record[0])
+            bucket = None
+        if bucket is None:
+            bucket = self.pending[name] = empty_bucket(start)
+        merge(bucket, record)
+
+    def _write(self, name, records, now):
+        self.files[name].append(records)
+        keep = self.retention.get(name, 0)
+        if keep and now >= self.next_trim[name]:
+            # Trim once the oldest record is a tenth of the retention past due
+            first = self.files[name].first_ts()
+            if first is not None and first < now - keep * 1.1:
+                self.files[name].drop_before(now - keep)
+            self.next_trim[name] = now + keep * 0.05
+
+    def query(self, start, end, resolution="1h"):
+        # Records of one resolution in [start, end), as summarize() dicts
+        return [summarize(record) for record in self.files[resolution].read(start, end)]
+
+    def aggregate(self, start, end):
+        # One summarize() dict over [start, end): whole days from 1d.bin, the
+        # edges from progressively finer files down to the raw samples
+        bucket = empty_bucket(start)
+        self._aggregate(len(LEVELS) - 1, start, end, bucket)
+        return summarize(bucket)
+
+    def _aggregate(self, level, start, end, bucket):
+        if start >= end:
+            return
+        name, width = LEVELS[level]
+        if not width:
+            for record in self.files[name].read(start, end):
+                merge(bucket, record)
+            return
+        first = math.ceil(start / width) * width
+        last = end // width * width
+        if first >= last:
+            self._aggregate(level - 1, start, end, bucket)
+            return
+        records = self.files[name].read(first, last)
+        for record in records:
+            merge(bucket, record)
+        # Past the last rolled-up bucket, the data is only in finer files
+        covered = records[-1][0] + width if records else first
+        self._aggregate(level - 1, start, first, bucket)
+        self._aggregate(level - 1, covered, end, bucket)
+
+    def close(self):
+        for series in self.files.values():
+            series.close()
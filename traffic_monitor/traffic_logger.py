@@ -0,0 +1,140 @@
+# Buffered result logging. Records are kept in memory and written in batches
+# (on a timer or when the buffer fills) to one or more sinks, so the SD card
+# sees one append per batch instead of one open/write/close per sample.
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+LOG_FORMATS = ("text", "jsonl")
+
+
+def format_text(record):
+    # The original pipe-delimited traffic_log.txt layout
+    timestamp = datetime.fromtimestamp(record["ts"]).strftime("%Y-%m-%d %H:%M:%S")
+    if record.get("kind") == "metrics":
+        return f"{timestamp} | Metrics | {record['summary']}\n"
+    if record.get("kind") == "alert":
+        return (f"{timestamp} | Alert {record['state']} | {record['reason'] or 'below thresholds'} | "
+                f"Packets/s: {record['packets_per_sec']:.0f} | TCP%: {record['tcp_ratio']*100:.1f}\n")
+    if record.get("avg_packets") is None:
+        return (f"{timestamp} | File: {record['file']} | Packets: {record['packets']} | "
+                f"TCP%: {record['tcp_ratio']*100:.1f} | Top IP: {record['top_ip']}\n")
+    return (f"{timestamp} | Avg Packets: {record['avg_packets']:.1f} | Avg TCP%: {record['avg_tcp_ratio']*100:.1f} | "
+            f"Last File: {record['file']} | Last Packets: {record['packets']} | "
+            f"Last TCP%: {record['tcp_ratio']*100:.1f} | Top IP: {record['top_ip']}\n")
+
+
+def format_json(record):
+    return json.dumps(record, separators=(",", ":")) + "\n"
+
+
+class FileSink:
+    def __init__(self, path, formatter, fsync=False):
+        self.path = path
+        self.formatter = formatter
+        self.fsync = fsync
+
+    def write(self, records):
+        with open(self.path, "a") as f:
+            f.write("".join(self.formatter(record) for record in records))
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def close(self):
+        pass
+
+
+class TextSink(FileSink):
+    def __init__(self, path, fsync=False):
+        super().__init__(path, format_text, fsync)
+
+
+class JsonLinesSink(FileSink):
+    def __init__(self, path, fsync=False):
+        super().__init__(path, format_json, fsync)
+
+
+class SQLiteSink:
+    COLUMNS = ("ts", "kind", "file", "packets", "tcp_ratio", "top_ip", "avg_packets", "avg_tcp_ratio")
+
+    def __init__(self, path, fsync=False):
+        self.path = path
+        # Only the flush thread touches the connection once the logger runs
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA synchronous={'FULL' if fsync else 'NORMAL'}")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS samples (ts REAL, kind TEXT, file TEXT, packets INTEGER, "
+            "tcp_ratio REAL, top_ip TEXT, avg_packets REAL, avg_tcp_ratio REAL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS samples_ts ON samples (ts)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS metrics (ts REAL, summary TEXT)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS alerts (ts REAL, state TEXT, reason TEXT, "
+                          "packets_per_sec REAL, tcp_ratio REAL)")
+        self.conn.commit()
+
+    def write(self, records):
+        rows = [tuple(record.get(column) for column in self.COLUMNS) for record in records
+                if record.get("kind") not in ("metrics", "alert")]
+        metrics = [(record["ts"], record["summary"]) for record in records if record.get("kind") == "metrics"]
+        alerts = [(record["ts"], record["state"], record["reason"], record["packets_per_sec"], record["tcp_ratio"])
+                  for record in records if record.get("kind") == "alert"]
+        with self.conn:
+            self.conn.executemany(f"INSERT INTO samples VALUES ({','.join('?' * len(self.COLUMNS))})", rows)
+            self.conn.executemany("INSERT INTO metrics VALUES (?, ?)", metrics)
+            self.conn.executemany("INSERT INTO alerts VALUES (?, ?, ?, ?, ?)", alerts)
+
+    def close(self):
+        self.conn.close()
+
+
+class BufferedLogger:
+    def __init__(self, sinks, flush_interval=10.0, max_records=50):
+        self.sinks = sinks
+        self.flush_interval = flush_interval
+        self.max_records = max_records
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._full = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="log-flusher", daemon=True)
+        self._thread.start()
+
+    def log(self, record):
+        record.setdefault("ts", time.time())
+        with self._lock:
+            self._buffer.append(record)
+            full = len(self._buffer) >= self.max_records
+        if full:
+            self._full.set()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+            for sink in self.sinks:
+                try:
+                    sink.write(batch)
+                except (OSError, sqlite3.Error) as e:
+                    print(f"Error writing {len(batch)} log records to {getattr(sink, 'path', sink)}: {e}")
+            return len(batch)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._full.wait(self.flush_interval)
+            self._full.clear()
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        self._full.set()
+        self._thread.join()
+        self.flush()
+        for sink in self.sinks:
+            sink.close()
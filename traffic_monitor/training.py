@@ -0,0 +1,207 @@
+# Offline training: build a feature CSV from captures, fit the IsolationForest
+# and export it for the NumPy inference path. pandas and sklearn are imported
+# only by the functions that need them.
+import os
+from datetime import datetime
+
+import numpy as np
+
+from .analysis import FlowAnalyzer
+from .flow_features import BASE_FEATURES, FEATURE_NAMES
+from .forest_inference import average_path_length
+
+
+def flatten_forest(model, scaler):
+    trees = model.estimators_
+    max_nodes = max(tree.tree_.node_count for tree in trees)
+    shape = (len(trees), max_nodes)
+    feature = np.zeros(shape, dtype=np.int32)
+    threshold = np.zeros(shape, dtype=np.float64)
+    left = np.zeros(shape, dtype=np.int32)
+    right = np.zeros(shape, dtype=np.int32)
+    leaf_depth = np.zeros(shape, dtype=np.float64)
+    max_depth = 0
+    for i, (tree, features) in enumerate(zip(trees, model.estimators_features_)):
+        t = tree.tree_
+        count = t.node_count
+        is_leaf = t.children_left[:count] == -1
+        nodes = np.arange(count)
+        depth = np.zeros(count, dtype=np.int64)
+        # Nodes are stored parent-before-child, so one forward pass fills the depths
+        for node in range(count):
+            if not is_leaf[node]:
+                depth[t.children_left[node]] = depth[node] + 1
+                depth[t.children_right[node]] = depth[node] + 1
+        feature[i, :count] = np.where(is_leaf, 0, np.asarray(features)[np.maximum(t.feature[:count], 0)])
+        threshold[i, :count] = np.where(is_leaf, 0.0, t.threshold[:count])
+        left[i, :count] = np.where(is_leaf, nodes, t.children_left[:count])
+        right[i, :count] = np.where(is_leaf, nodes, t.children_right[:count])
+        leaf_depth[i, :count] = np.where(is_leaf, depth + average_path_length(t.n_node_samples[:count]), 0.0)
+        max_depth = max(max_depth, int(depth.max()))
+    return {
+        "feature": feature,
+        "threshold": threshold,
+        "left": left,
+        "right": right,
+        "leaf_depth": leaf_depth,
+        "max_depth": np.int64(max_depth),
+        "denominator": np.float64(len(trees) * average_path_length([model.max_samples_])[0]),
+        "offset": np.float64(model.offset_),
+        "scaler_mean": np.asarray(scaler.mean_, dtype=np.float64),
+        "scaler_scale": np.asarray(scaler.scale_, dtype=np.float64),
+        "feature_names": np.asarray(getattr(scaler, "feature_names_in_", BASE_FEATURES), dtype=str),
+    }
+
+
+def export_forest(model, scaler, path):
+    # Compact .npz for forest_inference.load_forest (no sklearn needed to score)
+    np.savez_compressed(path, **flatten_forest(model, scaler))
+
+
+def export_pickles(model_path, scaler_path, npz_path):
+    import joblib
+
+    export_forest(joblib.load(model_path), joblib.load(scaler_path), npz_path)
+    print(f"✅ Exported {model_path} + {scaler_path} to {npz_path}")
+
+
+def feature_columns(df):
+    # Flow-table features when the CSV has them, otherwise the original four
+    return [name for name in FEATURE_NAMES if name in df.columns]
+
+
+def build_training_csv(pcap_paths, csv_path, cache=None):
+    # One row per capture file, extracted natively in a single pass each;
+    # with an AnalysisCache, captures seen before are not parsed again
+    import pandas as pd
+
+    analyzer = FlowAnalyzer(cache=cache)
+    rows = []
+    for path in pcap_paths:
+        features = analyzer.run(path)
+        if not features or features["total_packets"] == 0:
+            continue
+        row = {"timestamp": datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y-%m-%d %H:%M:%S")}
+        row.update({name: features[name] for name in FEATURE_NAMES})
+        row["top_ip"] = features["top_ip"]
+        rows.append(row)
+    pd.DataFrame(rows, columns=["timestamp"] + FEATURE_NAMES + ["top_ip"]).to_csv(csv_path, index=False)
+    print(f"✅ Wrote {len(rows)} rows from {len(pcap_paths)} captures to {csv_path}")
+    if cache is not None:
+        cache.flush()
+        print(f"Analysis cache: {cache.hits} reused, {cache.misses} parsed ({cache.path})")
+
+
+def fit_model(features, contamination=0.1, random_state=42, scaler=None):
+    # Scale features and train the Isolation Forest on them; a scaler that was
+    # already fitted (e.g. incrementally over the whole CSV) is reused as is
+    from sklearn.ensemble import IsolationForest
+    from sklearn.preprocessing import StandardScaler
+
+    if scaler is None:
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(features)
+    else:
+        X_scaled = scaler.transform(features)
+    model = IsolationForest(contamination=contamination, random_state=random_state)
+    model.fit(X_scaled)
+    return model, scaler
+
+
+def sample_rows(sample, keys, chunk, rng, size):
+    # Bounded uniform subsample across chunks: every row gets a random key and
+    # the `size` smallest keys seen so far are kept (vectorized reservoir)
+    chunk_keys = rng.random(len(chunk))
+    if sample is not None:
+        chunk = np.concatenate([sample, chunk])
+        chunk_keys = np.concatenate([keys, chunk_keys])
+    if len(chunk) > size:
+        keep = np.argpartition(chunk_keys, size)[:size]
+        chunk, chunk_keys = chunk[keep], chunk_keys[keep]
+    return chunk, chunk_keys
+
+
+def peak_memory_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def train_model(csv_path, model_dir=None, chunk_rows=20000, sample_size=50000, seed=42):
+    # Timestamped model files go to model_dir (default: next to the CSV); the
+    # *_latest copies the detector loads always go next to the CSV. The CSV is
+    # streamed in chunks, so memory depends on chunk_rows and sample_size, not
+    # on how much history the CSV holds.
+    import joblib
+    import pandas as pd
+    from sklearn.preprocessing import StandardScaler
+
+    if not os.path.exists(csv_path):
+        print("CSV file not found!")
+        return
+
+    # Drop timestamp and IP (not used for now)
+    header = pd.read_csv(csv_path, nrows=0)
+    columns = feature_columns(header)
+    # Explicit dtypes so pandas doesn't infer (and possibly upcast to object) per chunk
+    dtypes = {name: "float64" for name in columns}
+
+    # Pass 1: scaler statistics over every row, model trained on a bounded subsample
+    scaler = StandardScaler()
+    rng = np.random.default_rng(seed)
+    sample = keys = None
+    rows = 0
+    for chunk in pd.read_csv(csv_path, usecols=columns, dtype=dtypes, chunksize=chunk_rows):
+        scaler.partial_fit(chunk[columns])
+        sample, keys = sample_rows(sample, keys, chunk[columns].to_numpy(), rng, sample_size)
+        rows += len(chunk)
+    if not rows:
+        print("CSV has no rows to train on.")
+        return
+    print(f"Read {rows} rows; training on {len(sample)} sampled rows")
+    model, scaler = fit_model(pd.DataFrame(sample, columns=columns), scaler=scaler)
+
+    # Pass 2: label every row in chunks, appending to the labeled copy. Columns
+    # are read as text and written back untouched; only the features are parsed.
+    output_file = csv_path.replace(".csv", "_labeled.csv")
+    counts = {1: 0, -1: 0}
+    for index, chunk in enumerate(pd.read_csv(csv_path, dtype=str, keep_default_na=False, chunksize=chunk_rows)):
+        features = chunk[columns].astype("float64")
+        chunk['anomaly'] = model.predict(scaler.transform(features))  # 1 = normal, -1 = anomaly
+        chunk.to_csv(output_file, mode="w" if index == 0 else "a", header=index == 0, index=False)
+        labels = chunk['anomaly'].value_counts()
+        counts[1] += int(labels.get(1, 0))
+        counts[-1] += int(labels.get(-1, 0))
+    print(f"✅ Results with anomalies saved to: {output_file}")
+
+    # Save model and scaler with timestamp + latest version
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    model_dir_latest = os.path.dirname(csv_path)
+    model_dir = model_dir or model_dir_latest
+
+    model_path = os.path.join(model_dir, f"anomaly_model_{timestamp}.pkl")
+    scaler_path = os.path.join(model_dir, f"anomaly_scaler_{timestamp}.pkl")
+    joblib.dump(model, model_path)
+    joblib.dump(scaler, scaler_path)
+
+    joblib.dump(model, os.path.join(model_dir_latest, "anomaly_model_latest.pkl"))
+    joblib.dump(scaler, os.path.join(model_dir_latest, "anomaly_scaler_latest.pkl"))
+
+    # NumPy-only copy for the detector's fast inference path
+    forest_path = os.path.join(model_dir, f"anomaly_forest_{timestamp}.npz")
+    export_forest(model, scaler, forest_path)
+    export_forest(model, scaler, os.path.join(model_dir_latest, "anomaly_forest_latest.npz"))
+
+    print(f"✅ Model saved as: {model_path}")
+    print(f"✅ Scaler saved as: {scaler_path}")
+    print(f"✅ Forest exported as: {forest_path}")
+    print("✅ Also updated: anomaly_model_latest.pkl, anomaly_scaler_latest.pkl and anomaly_forest_latest.npz")
+
+    # Display quick summary
+    print(f"\nAnomaly Detection Summary:\nNormal: {counts[1]}\nAnomalies: {counts[-1]}")
+    peak = peak_memory_mb()
+    if peak is not None:
+        print(f"Peak memory: {peak:.1f} MB")